@@ -0,0 +1,92 @@
+"""
+Benchmark: training pipeline artifact I/O with CSV vs Parquet stage files.
+
+Replays the data hops of one TrainPipeline run on a synthetic APS-shaped dataset, once with .csv and once
+with .parquet file names, through the same save_dataframe/load_dataframe calls the stages use:
+- DataIngestion: writes the feature store, train and test files
+- DataValidation: reads train and test, writes the validated copies
+- DataPreprocessing: reads the validated train and test files
+- ModelEvaluation: reads the validated train and test files again (only the model columns)
+and reports the seconds spent per hop, the total, and the disk usage of all the files written.
+
+Run from the project root:  python benchmarks/bench_artifact_io.py [rows] [evaluation_columns]
+"""
+import os, sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from sensor.constant.training_pipeline import SCHEMA_FILE_PATH, TARGET_COLUMN
+from sensor.utils.main_utils import read_yaml_file, get_schema_dtypes, save_dataframe, load_dataframe
+
+
+def make_data(rng, n_rows, dtypes):
+    numerical = [name for name, dtype in dtypes.items() if dtype == "float64"]
+    x = rng.integers(0, 100000, size=(n_rows, len(numerical))).astype(float)
+    x[rng.random(x.shape) < 0.1] = np.nan
+    dataframe = pd.DataFrame(x, columns=numerical)
+    dataframe.insert(0, TARGET_COLUMN, np.where(rng.random(n_rows) < 0.02, "pos", "neg"))
+    return dataframe
+
+
+def run(directory, extension, dataframe, dtypes, evaluation_columns):
+    def path(name):
+        return os.path.join(directory, name + extension)
+
+    timings = {}
+
+    start = time.perf_counter()
+    save_dataframe(path("sensor"), dataframe, dtypes=dtypes)
+    train_set, test_set = train_test_split(dataframe, test_size=0.2, random_state=42)
+    save_dataframe(path("train"), train_set, dtypes=dtypes)
+    save_dataframe(path("test"), test_set, dtypes=dtypes)
+    timings["ingestion"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for name in ("train", "test"):
+        save_dataframe(path("valid_" + name), load_dataframe(path(name)), dtypes=dtypes)
+    timings["validation"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for name in ("train", "test"):
+        load_dataframe(path("valid_" + name))
+    timings["preprocessing"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for name in ("train", "test"):
+        load_dataframe(path("valid_" + name), columns=evaluation_columns)
+    timings["evaluation"] = time.perf_counter() - start
+
+    timings["total"] = sum(timings.values())
+    disk_bytes = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+    return timings, disk_bytes
+
+
+def main():
+    args = sys.argv[1:]
+    n_rows = int(args[0]) if len(args) > 0 else 60000
+    dtypes = get_schema_dtypes(read_yaml_file(SCHEMA_FILE_PATH))
+    dataframe = make_data(np.random.default_rng(0), n_rows, dtypes)
+    n_evaluation = int(args[1]) if len(args) > 1 else dataframe.shape[1] - 1
+    evaluation_columns = [TARGET_COLUMN] + [column for column in dataframe.columns if column != TARGET_COLUMN][:n_evaluation]
+
+    results = {}
+    for extension in (".csv", ".parquet"):
+        with tempfile.TemporaryDirectory() as directory:
+            results[extension] = run(directory, extension, dataframe, dtypes, evaluation_columns)
+
+    hops = list(results[".csv"][0])
+    print(f"{n_rows} rows x {dataframe.shape[1]} columns, evaluation reads {len(evaluation_columns)} columns")
+    print(f"{'format':>9} " + " ".join(f"{hop:>13}" for hop in hops) + f" {'disk MB':>8}")
+    for extension, (timings, disk_bytes) in results.items():
+        print(f"{extension.lstrip('.'):>9} " + " ".join(f"{timings[hop]:>12.2f}s" for hop in hops)
+              + f" {disk_bytes / 2 ** 20:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
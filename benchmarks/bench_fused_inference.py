@@ -0,0 +1,71 @@
+"""
+Benchmark: SensorModel.predict (sklearn Pipeline + XGBClassifier.predict) vs the FusedSensorModel kernel.
+
+Trains a small model on synthetic APS-shaped data, checks that the fused path produces
+bit-for-bit identical transformed matrices and labels, then times both paths per batch size.
+
+Run from the project root:  python benchmarks/bench_fused_inference.py
+"""
+import os, sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from sklearn.impute import SimpleImputer
+from sklearn.preprocessing import RobustScaler
+from sklearn.pipeline import Pipeline
+from xgboost import XGBClassifier
+
+from sensor.ml_model_components.model.estimator import SensorModel
+from sensor.ml_model_components.model.fused_model import FusedSensorModel
+
+N_FEATURES = 163
+BATCH_SIZES = [1, 64, 1000, 10000]
+
+
+def make_data(rng, n_rows, feature_names):
+    x = rng.integers(0, 100000, size=(n_rows, len(feature_names))).astype(float)
+    x[rng.random(x.shape) < 0.1] = np.nan
+    y = (np.nan_to_num(x[:, 0]) + np.nan_to_num(x[:, 5]) > 110000).astype(int)
+    return pd.DataFrame(x, columns=feature_names), y
+
+
+def best_time(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    rng = np.random.default_rng(42)
+    feature_names = [f"f{i:03d}" for i in range(N_FEATURES)]
+    x_train, y_train = make_data(rng, 5000, feature_names)
+
+    preprocessor = Pipeline(steps=[
+        ('Imputer', SimpleImputer(strategy="constant", fill_value=0)),
+        ('RobustScaler', RobustScaler())
+    ])
+    model = XGBClassifier(n_estimators=100).fit(preprocessor.fit_transform(x_train), y_train)
+    sensor_model = SensorModel(preprocessor=preprocessor, model=model)
+    fused_model = FusedSensorModel.from_sensor_model(sensor_model)
+
+    print(f"{'batch':>7} {'sklearn ms':>11} {'fused ms':>9} {'speedup':>8}  identical")
+    for batch_size in BATCH_SIZES:
+        x_batch, _ = make_data(rng, batch_size, feature_names)
+
+        identical = (np.array_equal(preprocessor.transform(x_batch), fused_model.transform(x_batch), equal_nan=True)
+                     and np.array_equal(sensor_model.predict(x_batch), fused_model.predict(x_batch)))
+
+        repeats = 200 if batch_size <= 64 else 20
+        sklearn_ms = best_time(lambda: sensor_model.predict(x_batch), repeats) * 1000
+        fused_ms = best_time(lambda: fused_model.predict(x_batch), repeats) * 1000
+        print(f"{batch_size:>7} {sklearn_ms:>11.3f} {fused_ms:>9.3f} {sklearn_ms / fused_ms:>7.2f}x  {identical}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark: cold-start cost of a serving worker.
+
+Imports `main` in fresh interpreters and reports the best and median wall time, then lists which
+heavy training-only modules the import pulled in. Exits with status 1 when the median is above
+--max-seconds or a training-only module is imported, so it can gate cold-start regressions in CI.
+
+Run from the project root:  python benchmarks/bench_import_time.py [--repeats 5] [--max-seconds 2.0]
+"""
+import os, sys
+import argparse
+import json
+import statistics
+import subprocess
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Needed only by /train, so a serving worker must not import them when `main` is imported
+TRAINING_ONLY_MODULES = ["xgboost", "imblearn", "sklearn.model_selection", "pymongo", "scipy.stats"]
+# Needed to load the champion, so they are imported by the startup hook rather than at import time
+MODEL_LOAD_MODULES = ["sklearn", "dill"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "modules": [m for m in %r if m in sys.modules]}))
+"""
+
+
+def measure_once() -> dict:
+    result = subprocess.run([sys.executable, "-c", PROBE % (TRAINING_ONLY_MODULES + MODEL_LOAD_MODULES)],
+                            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=None)
+    args = parser.parse_args()
+
+    runs = [measure_once() for _ in range(args.repeats)]
+    timings = [run["seconds"] for run in runs]
+    imported = runs[-1]["modules"]
+    median = statistics.median(timings)
+
+    print(f"import main: best {min(timings):.3f}s  median {median:.3f}s  over {args.repeats} runs")
+    print(f"heavy modules imported: {imported or 'none'}")
+
+    failures = [m for m in imported if m in TRAINING_ONLY_MODULES]
+    if failures:
+        print(f"FAIL: training-only modules imported by a serving worker: {failures}")
+    if args.max_seconds is not None and median > args.max_seconds:
+        print(f"FAIL: median import time {median:.3f}s is above {args.max_seconds:.3f}s")
+        failures.append("max_seconds")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark: dill-pickled model.pkl vs the native model artifact folder (booster.ubj + preprocessor.npz + manifest.json).
+
+Trains a model on synthetic APS-shaped data, saves it both ways, checks that both load to identical
+predictions, then reports the on-disk size and the best load time of each format.
+
+Run from the project root:  python benchmarks/bench_model_artifact.py [n_estimators ...]
+"""
+import os, sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from sklearn.impute import SimpleImputer
+from sklearn.preprocessing import RobustScaler
+from sklearn.pipeline import Pipeline
+from xgboost import XGBClassifier
+
+from sensor.utils.main_utils import save_object, load_object
+from sensor.ml_model_components.model.estimator import SensorModel
+from sensor.ml_model_components.model.fused_model import FusedSensorModel
+from sensor.ml_model_components.model.model_artifact import save_model_artifact, load_model_artifact
+
+N_FEATURES = 163
+REPEATS = 5
+
+
+def make_data(rng, n_rows, feature_names):
+    x = rng.integers(0, 100000, size=(n_rows, len(feature_names))).astype(float)
+    x[rng.random(x.shape) < 0.1] = np.nan
+    y = (np.nan_to_num(x[:, 0]) + np.nan_to_num(x[:, 5]) > 110000).astype(int)
+    return pd.DataFrame(x, columns=feature_names), y
+
+
+def folder_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def best_time(fn):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    rng = np.random.default_rng(42)
+    feature_names = [f"f{i:03d}" for i in range(N_FEATURES)]
+    x_train, y_train = make_data(rng, 5000, feature_names)
+    x_eval, _ = make_data(rng, 2000, feature_names)
+    n_estimators_list = [int(arg) for arg in sys.argv[1:]] or [100, 500]
+
+    print(f"{'trees':>6} {'pkl KB':>8} {'native KB':>10} {'pkl load ms':>12} {'native load ms':>15}  identical")
+    for n_estimators in n_estimators_list:
+        preprocessor = Pipeline(steps=[
+            ('Imputer', SimpleImputer(strategy="constant", fill_value=0)),
+            ('RobustScaler', RobustScaler())
+        ])
+        model = XGBClassifier(n_estimators=n_estimators).fit(preprocessor.fit_transform(x_train), y_train)
+        sensor_model = SensorModel(preprocessor=preprocessor, model=model)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pkl_path = os.path.join(tmp_dir, "model.pkl")
+            artifact_dir = os.path.join(tmp_dir, "model_artifact")
+            save_object(pkl_path, sensor_model)
+            save_model_artifact(FusedSensorModel.from_sensor_model(sensor_model), artifact_dir)
+
+            identical = np.array_equal(load_object(pkl_path).predict(x_eval),
+                                       load_model_artifact(artifact_dir).predict(x_eval))
+            pkl_ms = best_time(lambda: load_object(pkl_path)) * 1000
+            native_ms = best_time(lambda: load_model_artifact(artifact_dir)) * 1000
+
+            print(f"{n_estimators:>6} {folder_size(pkl_path) / 1024:>8.1f} {folder_size(artifact_dir) / 1024:>10.1f} "
+                  f"{pkl_ms:>12.2f} {native_ms:>15.2f}  {identical}")
+
+
+if __name__ == "__main__":
+    main()
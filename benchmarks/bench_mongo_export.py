@@ -0,0 +1,71 @@
+"""
+Benchmark: MongoDB export of an APS-shaped collection, list(find()) vs the streaming exporter by partitions.
+
+Seeds a scratch collection with synthetic documents holding numbers and 'na' strings, as collections loaded
+by a plain pd.read_csv dump do, then reports the best export time of:
+- list: pd.DataFrame(list(collection.find())), the previous exporter
+- streaming with 1, 2, 4, 8 ... concurrent _id ranges (SensorData.export_collection_as_dataframe)
+The collection is dropped at the end. Needs a MongoDB server: MONGO_DB_URL, e.g. mongodb://localhost:27017
+
+Run from the project root:  python benchmarks/bench_mongo_export.py [documents] [partitions ...]
+"""
+import os, sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+N_FEATURES = 170
+REPEATS = 3
+COLLECTION_NAME = "bench_aps_export"
+
+
+def make_documents(rng, n_documents):
+    x = rng.integers(0, 100000, size=(n_documents, N_FEATURES)).astype(object)
+    x[rng.random(x.shape) < 0.1] = "na"
+    frame = pd.DataFrame(x, columns=[f"f{i:03d}" for i in range(N_FEATURES)])
+    frame.insert(0, "class", np.where(rng.random(n_documents) < 0.02, "pos", "neg"))
+    return frame.to_dict(orient="records")
+
+
+def best_of(function):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    from sensor.data_access.sensor_data import SensorData
+
+    args = sys.argv[1:]
+    n_documents = int(args[0]) if args else 60000
+    partitions = [int(arg) for arg in args[1:]] or [1, 2, 4, 8]
+
+    sensor_data = SensorData()
+    collection = sensor_data.mongo_client.database[COLLECTION_NAME]
+    collection.drop()
+    try:
+        documents = make_documents(np.random.default_rng(0), n_documents)
+        for start in range(0, n_documents, 10000):
+            collection.insert_many(documents[start:start + 10000])
+        del documents
+
+        seconds, _ = best_of(lambda: pd.DataFrame(list(collection.find())))
+        print(f"{'exporter':>14} {'seconds':>8} {'docs/sec':>10}")
+        print(f"{'list':>14} {seconds:>8.2f} {n_documents / seconds:>10.0f}")
+        for count in partitions:
+            seconds, dataframe = best_of(lambda: sensor_data.export_collection_as_dataframe(
+                COLLECTION_NAME, partitions=count))
+            assert len(dataframe) == n_documents
+            print(f"{f'streaming x{count}':>14} {seconds:>8.2f} {n_documents / seconds:>10.0f}")
+    finally:
+        collection.drop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark: scoring throughput and tail latency with default vs budgeted XGBoost threads.
+
+Starts N worker processes that each score 200-row batches with the same synthetic model for a fixed time,
+optionally next to a CPU-bound "training" process, and reports the total rows/sec and the p99 batch latency.
+- default: every worker lets XGBoost use all cores (the oversubscribed layout)
+- budgeted: every worker uses ResourceConfig(...).predict_threads, as the serving app does
+
+Run from the project root:  python benchmarks/bench_thread_budget.py [workers] [seconds] [--with-training]
+"""
+import os, sys
+import time
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+N_FEATURES = 163
+BATCH_ROWS = 200
+
+
+def make_booster(path):
+    from xgboost import XGBClassifier
+    rng = np.random.default_rng(42)
+    x = rng.random((5000, N_FEATURES))
+    y = (x[:, 0] + x[:, 5] > 1.1).astype(int)
+    XGBClassifier(n_estimators=200).fit(x, y).get_booster().save_model(path)
+
+
+def score_worker(model_path, nthread, seconds, queue):
+    from xgboost import Booster, DMatrix
+    booster = Booster(model_file=model_path)
+    if nthread is not None:
+        booster.set_param({"nthread": nthread})
+    batch = np.random.default_rng(os.getpid()).random((BATCH_ROWS, N_FEATURES))
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        booster.predict(DMatrix(batch, nthread=nthread or -1))
+        latencies.append(time.perf_counter() - start)
+    queue.put(latencies)
+
+
+def training_hog(nthread, seconds):
+    from xgboost import XGBClassifier
+    rng = np.random.default_rng(0)
+    x = rng.random((20000, N_FEATURES))
+    y = (x[:, 1] > 0.5).astype(int)
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        XGBClassifier(n_estimators=20, n_jobs=nthread).fit(x, y)
+
+
+def run(model_path, workers, seconds, predict_threads, training_threads):
+    queue = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=score_worker, args=(model_path, predict_threads, seconds, queue))
+                 for _ in range(workers)]
+    if training_threads is not False:
+        processes.append(multiprocessing.Process(target=training_hog, args=(training_threads, seconds)))
+    for process in processes:
+        process.start()
+    latencies = np.concatenate([queue.get() for _ in range(workers)])
+    for process in processes:
+        process.join()
+    return len(latencies) * BATCH_ROWS / seconds, np.percentile(latencies, 99) * 1000
+
+
+def main():
+    from sensor.configuration.resource_config import ResourceConfig
+    import tempfile
+
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    workers = int(args[0]) if len(args) > 0 else 2
+    seconds = float(args[1]) if len(args) > 1 else 5.0
+    with_training = "--with-training" in sys.argv
+
+    os.environ.setdefault("SENSOR_SERVING_WORKERS", str(workers))
+    budget = ResourceConfig()
+    print(f"budget: {budget.to_dict()}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = os.path.join(tmp_dir, "booster.ubj")
+        make_booster(model_path)
+
+        print(f"{'layout':>9} {'rows/sec':>10} {'p99 ms':>8}")
+        for name, predict_threads, training_threads in (
+                ("default", None, None if with_training else False),
+                ("budgeted", budget.predict_threads, budget.training_threads if with_training else False)):
+            rows_per_sec, p99_ms = run(model_path, workers, seconds, predict_threads, training_threads)
+            print(f"{name:>9} {rows_per_sec:>10.0f} {p99_ms:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,77 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
-from sensor.pipeline.training_pipeline import TrainPipeline
+from fastapi import FastAPI, File, UploadFile, HTTPException, Body
 from sensor.logger import logging
 from sensor.exception import SensorException
 from sensor.pipeline.prediction_pipeline import PredictionPipeline
-from sensor.constant.application import APP_HOST, APP_PORT
+from sensor.pipeline.micro_batcher import MicroBatcher
+from sensor.pipeline.inference_executor import InferenceExecutor, InferenceSaturatedError
+from sensor.pipeline.training_job_runner import TrainingJobRunner
+from sensor.ml_model_components.model.input_validator import InputValidationError
+from sensor.utils.upload_utils import UploadParseError
+from sensor.constant.application import APP_HOST, APP_PORT, MODEL_PRELOAD_ON_STARTUP, PREDICTION_PREVIEW_ROWS
+from sensor.utils.metrics import REGISTRY, PREDICT_STAGE_SECONDS
 import os, sys
-import pandas as pd
+import asyncio
+import numpy as np
+from contextlib import asynccontextmanager
 import uvicorn
 from starlette.responses import RedirectResponse
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
+
+
+def preload_model() -> None:
+    """
+    Loads and warms up the champion so the first request does not pay for it.
+    A missing model is not fatal: the server still starts so /train can produce one.
+    """
+    try:
+        PredictionPipeline().model_holder.reload()
+    except Exception as e:
+        logging.warning(f"No champion model preloaded at startup: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if MODEL_PRELOAD_ON_STARTUP:
+        await asyncio.get_running_loop().run_in_executor(None, preload_model)
+    # Cap the BLAS/OpenMP pools loaded so far to this worker's share of the cores
+    PredictionPipeline().resource_config.apply_serving()
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
+
+# CPU-bound parsing/scoring runs on a bounded pool so the event loop keeps serving other requests
+inference_executor = InferenceExecutor()
+
+# Training runs in its own process; a host-wide file lock allows one run across all workers
+training_job_runner = TrainingJobRunner()
+
+SERIALIZE_SECONDS = PREDICT_STAGE_SECONDS.labels("serialize")
+
+# Concurrent /predict/record calls are stacked into one vectorized SensorModel.predict call
+record_batcher = MicroBatcher(predict_fn=lambda records: PredictionPipeline().predict_records(records),
+                              inference_executor=inference_executor)
+
+
+def to_http_exception(e: Exception) -> HTTPException:
+    """
+    Maps backpressure to 503 (with Retry-After), timeouts to 504, unscorable or unreadable input to 400
+    and anything else to 500.
+    """
+    if isinstance(e, HTTPException):
+        return e
+    # Pipeline errors arrive wrapped in one or more SensorExceptions
+    cause = e
+    while isinstance(cause, SensorException):
+        cause = cause.message
+    if isinstance(cause, (InputValidationError, UploadParseError)):
+        return HTTPException(status_code=400, detail=str(cause))
+    if isinstance(e, InferenceSaturatedError):
+        return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    if isinstance(e, asyncio.TimeoutError):
+        return HTTPException(status_code=504, detail="Prediction timed out.")
+    return HTTPException(status_code=500, detail=str(e))
 
-app = FastAPI()
 
 @app.get("/", tags=["authentication"])
 async def root():
@@ -24,48 +85,204 @@ async def root():
 async def train_route():
     """
     Endpoint to trigger the Training Pipeline.
-    Includes a check to prevent multiple simultaneous runs.
+    Starts the run in a background process and returns its job id immediately.
+    Only one run can be active on the host; otherwise the running job id is returned,
+    or 409 when another worker started its run while this one was starting.
     """
     try:
-        train_pipeline = TrainPipeline()
-        
-        # Check if the pipeline is already active
-        if train_pipeline.is_pipeline_running:
-            return Response("Training pipeline is already running.")
-        
-        # Start the training process in the background
-        train_pipeline.run_pipeline()
-        
-        return Response("Training successful !!")
-    
+        # start() waits for the training process to take the host-wide lock, so it runs off the event loop
+        job_status = await asyncio.get_running_loop().run_in_executor(None, training_job_runner.start)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(SensorException(e, sys)))
 
+    # Check if the pipeline is already active
+    if job_status["status"] == "already_running":
+        return {"message": "Training pipeline is already running.", "job_id": job_status["job_id"],
+                "status_url": f"/train/status/{job_status['job_id']}"}
+
+    # Lost the race for the lock to a run started by another worker
+    if job_status["status"] == "rejected":
+        raise HTTPException(status_code=409, detail=f"Training pipeline is already running: job {job_status['job_id']}, "
+                                                    f"status at /train/status/{job_status['job_id']}.")
+
+    return {"message": "Training started.", "job_id": job_status["job_id"],
+            "status_url": f"/train/status/{job_status['job_id']}"}
+
+
+@app.get("/train/status/{job_id}")
+async def train_status_route(job_id: str):
+    """
+    Progress of a training job: overall status, current stage and per-stage timings.
+    """
+    job_status = training_job_runner.get_status(job_id)
+    if job_status is None:
+        raise HTTPException(status_code=404, detail=f"Unknown training job: {job_id}")
+    return job_status
+
 
 @app.post("/predict")
 async def predict_route(file: UploadFile = File(...)):
     """
-    Endpoint for future Prediction Pipeline integration.
-    You will upload a CSV here and receive predictions.
+    Upload a CSV, Parquet or Arrow IPC file and receive predictions.
+    The format is detected from the file's magic bytes or its content type.
     """
     try:
-        # 1. Read the uploaded CSV into a pandas DataFrame
-        df = pd.read_csv(file.file)
-        
-        # 2. Instantiate the Prediction Pipeline
-        pred_pipeline = PredictionPipeline()
-        
-        # 3. Get predictions (The pipeline handles dropping the target column)
-        prediction_df = pred_pipeline.predict(df)
-        
-        # 4. Convert the first few rows to JSON for the response
-        # In a real app, you might return the full CSV as a download
-        results = prediction_df.head(10).to_dict(orient="records")
-        
-        return {"predictions": results}
+        return await inference_executor.run(score_upload, file.file, file.content_type)
     
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise to_http_exception(e)
+
+
+def score_upload(file_obj, content_type: str = None) -> dict:
+    """
+    Blocking part of /predict, run on the inference pool.
+    """
+    # 1. Instantiate the Prediction Pipeline (cheap: the champion model stays loaded in the process)
+    pred_pipeline = PredictionPipeline()
+
+    # 2 & 3. Read the upload (CSV, Parquet or Arrow IPC) and get predictions
+    # The pipeline only reads the model's feature columns, so the target column is never loaded
+    # Every row is scored, only the first few come back with their features
+    prediction_df = pred_pipeline.predict_upload(file_obj, content_type, preview_rows=PREDICTION_PREVIEW_ROWS)
+
+    # 4. Convert the first few rows to JSON for the response
+    # In a real app, you might return the full CSV as a download
+    # Missing sensor readings become null, since NaN and infinity are not valid JSON
+    # Rows rejected by input validation have a null prediction and are listed in the report
+    with SERIALIZE_SECONDS.time():
+        preview_df = prediction_df.replace([np.inf, -np.inf], np.nan)
+        results = preview_df.astype(object).where(preview_df.notna(), None).to_dict(orient="records")
+
+    validation_report = pred_pipeline.validation_report
+    return {"predictions": results,
+            "validation": None if validation_report is None else validation_report.to_dict()}
+
+
+@app.post("/predict/stream")
+async def predict_stream_route(file: UploadFile = File(...), output_format: str = "csv"):
+    """
+    Scores the whole uploaded CSV/Parquet/Arrow file in fixed-size chunks and streams every prediction back.
+    Memory stays bounded by one chunk and the first rows are returned before the upload is fully parsed.
+    output_format: "csv" or "ndjson"
+    """
+    try:
+        if output_format not in ("csv", "ndjson"):
+            raise HTTPException(status_code=400, detail="output_format must be 'csv' or 'ndjson'")
+
+        pred_pipeline = PredictionPipeline()
+        prediction_chunks = await inference_executor.run(pred_pipeline.predict_chunks, file.file, file.content_type)
+
+        def serialize():
+            for i, chunk in enumerate(prediction_chunks):
+                with SERIALIZE_SECONDS.time():
+                    if output_format == "csv":
+                        payload = chunk.to_csv(index=False, header=(i == 0))
+                    else:
+                        payload = chunk.to_json(orient="records", lines=True)
+                yield payload
+
+        # Each chunk is parsed, scored and serialized on the inference pool; the stream holds one slot
+        media_type = "text/csv" if output_format == "csv" else "application/x-ndjson"
+        return StreamingResponse(inference_executor.iterate(serialize()), media_type=media_type,
+                                 headers={"Content-Disposition": f"attachment; filename=predictions.{output_format}"})
+
+    except Exception as e:
+        raise to_http_exception(e)
+
+
+@app.post("/predict/record")
+async def predict_record_route(record: dict = Body(...)):
+    """
+    Scores a single APS reading sent as JSON (feature name -> value).
+    Records arriving together are micro-batched; the response reports the batch it was scored in.
+    """
+    try:
+        result = await record_batcher.submit(record)
+        if result.prediction is None:
+            raise HTTPException(status_code=422, detail="Record rejected by input validation "
+                                                        "(unparseable or infinite feature values).")
+        return {
+            "prediction": result.prediction,
+            "batch_size": result.batch_size,
+            "batch_latency_ms": result.batch_latency_ms
+        }
+
+    except InputValidationError as e:
+        # The record names too few model features (the unknown keys are in the message)
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise to_http_exception(e)
+
+
+@app.get("/predict/record/stats")
+async def predict_record_stats_route():
+    """
+    Throughput counters of the single-record micro-batcher.
+    """
+    return record_batcher.stats()
+
+
+@app.get("/predict/cache/stats")
+async def predict_cache_stats_route():
+    """
+    Hit/miss rates of the prediction cache for the current champion.
+    """
+    prediction_cache = PredictionPipeline().prediction_cache
+    if prediction_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **prediction_cache.stats()}
+
+
+@app.get("/predict/shadow/stats")
+async def predict_shadow_stats_route():
+    """
+    Champion vs unpromoted challenger on sampled live batches: agreement rate and per-model latency.
+    """
+    shadow_scorer = PredictionPipeline().shadow_scorer
+    if shadow_scorer is None:
+        return {"enabled": False}
+    return {"enabled": True, **shadow_scorer.stats()}
+
+
+@app.get("/predict/drift")
+async def predict_drift_route():
+    """
+    Per-feature drift (PSI) of the traffic served since the champion was loaded (or the last reset),
+    against the training histograms saved with the model.
+    """
+    drift_monitor = PredictionPipeline().drift_monitor
+    if drift_monitor is None:
+        return {"enabled": False}
+    return {"enabled": True, **drift_monitor.report()}
+
+
+@app.post("/predict/drift/reset")
+async def predict_drift_reset_route():
+    """
+    Starts a new drift observation window.
+    """
+    drift_monitor = PredictionPipeline().drift_monitor
+    if drift_monitor is None:
+        return {"enabled": False}
+    drift_monitor.reset()
+    return {"enabled": True, "reset": True}
+
+
+@app.get("/predict/pool/stats")
+async def predict_pool_stats_route():
+    """
+    Occupancy and rejection counters of the bounded inference pool, and this worker's CPU thread budget.
+    """
+    return {**inference_executor.stats(), "thread_budget": PredictionPipeline().resource_config.to_dict()}
+
+
+@app.get("/metrics")
+async def metrics_route():
+    """
+    Prometheus scrape endpoint: per-stage prediction latency histograms, rows scored, batch sizes,
+    champion model load time and timestamp, and training stage durations.
+    """
+    return Response(content=REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 if __name__ == "__main__":
@@ -1,3 +1,2 @@
 from dotenv import load_dotenv
-print("Loading environment variables from .env file...")
 load_dotenv()
\ No newline at end of file
@@ -11,20 +11,22 @@ from sensor.exception import SensorException
 import logging
 logger = logging.getLogger(__name__)
 
-from sensor.utils.main_utils import read_yaml_file, write_yaml_file
-from sensor.constant.training_pipeline import SCHEMA_FILE_PATH, SCHEMA_DROP_COLS
+from sensor.utils.main_utils import read_yaml_file, write_yaml_file, get_schema_dtypes, get_schema_export_spec, cast_dataframe, save_dataframe
+from sensor.utils.artifact_writer import artifact_writer
+from sensor.constant.training_pipeline import SCHEMA_FILE_PATH, DATA_INGESTION_EXPORT_PARTITIONS
 
 from sensor.constant.database import COLLECTION_NAME
 from sensor.entity.config_entity import DataIngestionConfig
 from sensor.entity.artifact_entity import DataIngestionArtifact
 from sensor.data_access.sensor_data import SensorData
+from sensor.data_access.feature_store import FeatureStore
 
 
 class DataIngestion:
     """
     Handles the data ingestion stage:
-    - Extracts data from MongoDB (feature store)
-    - Cleans and saves it to local feature store
+    - Extracts the modeled columns from MongoDB: schema drop_columns never leave the server
+    - Saves them to the local feature store
     - Splits the data into training and testing sets
     - Returns metadata (artifact) for the next pipeline stages
     """
@@ -39,8 +41,12 @@ class DataIngestion:
 
     def export_data_into_feature_store(self) -> DataFrame:
         """
-        Step 1: Export data from MongoDB and save it to the feature store as a CSV file.
-        Returns the extracted DataFrame for further processing.
+        Step 1: Bring the persistent feature store up to date with MongoDB.
+        Only documents newer than the store's watermark are exported (all of them when
+        incremental ingestion is off or the store cannot be trusted).
+        The schema compiles into the export: drop_columns are excluded by the server's projection and
+        the optional export_filter selects the documents, so the store holds exactly the modeled columns.
+        Returns the full feature store DataFrame for further processing.
         """
         try:
             logger.info("Exporting data from MongoDB to feature store")
@@ -48,19 +54,16 @@ class DataIngestion:
             # Create a SensorData object to interact with MongoDB
             sensor_data = SensorData()
 
-            # Fetch the collection as a Pandas DataFrame
-            dataframe = sensor_data.export_collection_as_dataframe(collection_name=COLLECTION_NAME)
+            # The feature store keeps its part files and watermark across runs
+            feature_store = FeatureStore(file_path=self.data_ingestion_config.feature_store_file_path,
+                                         state_file_path=self.data_ingestion_config.feature_store_state_file_path)
 
-            # Get the path to store the exported feature data
-            feature_store_file_path = self.data_ingestion_config.feature_store_file_path
-
-            # Create directory for feature store if it doesn’t exist
-            dir_path = os.path.dirname(feature_store_file_path)
-            if dir_path:
-                os.makedirs(dir_path, exist_ok=True)
-
-            # Save the data to CSV
-            dataframe.to_csv(feature_store_file_path, index=False, header=True)
+            # Fetch the new documents, reading _id ranges concurrently
+            exclude_columns, query = get_schema_export_spec(self._schema_config)
+            dataframe = feature_store.sync(sensor_data, collection_name=COLLECTION_NAME,
+                                           full_refresh=not self.data_ingestion_config.incremental,
+                                           partitions=DATA_INGESTION_EXPORT_PARTITIONS,
+                                           query=query, exclude_columns=exclude_columns)
 
             logger.info("Data successfully exported to feature store")
             return dataframe
@@ -68,9 +71,10 @@ class DataIngestion:
         except Exception as e:
             raise SensorException(e, sys)
 
-    def split_data_as_train_test(self, dataframe: DataFrame) -> None:
+    def split_data_as_train_test(self, dataframe: DataFrame) -> tuple:
         """
-        Step 2: Split the dataset into training and testing sets and save them as CSV files.
+        Step 2: Split the dataset into training and testing sets and save them in the background.
+        Returns the (train, test) DataFrames exactly as the saved files load back.
         """
         try:
             logger.info("Splitting data into train and test sets")
@@ -91,11 +95,15 @@ class DataIngestion:
             if dir_path:
                 os.makedirs(dir_path, exist_ok=True)
 
-            # Save train and test datasets separately
-            train_set.to_csv(train_file_path, index=False, header=True)
-            test_set.to_csv(test_file_path, index=False, header=True)
+            # Save train and test datasets separately, with the dtypes declared in the schema
+            dtypes = get_schema_dtypes(self._schema_config)
+            train_set = cast_dataframe(train_set, dtypes).reset_index(drop=True)
+            test_set = cast_dataframe(test_set, dtypes).reset_index(drop=True)
+            artifact_writer.submit(save_dataframe, train_file_path, train_set, dtypes=dtypes)
+            artifact_writer.submit(save_dataframe, test_file_path, test_set, dtypes=dtypes)
 
-            logger.info("Successfully split and saved the data into train and test files")
+            logger.info("Successfully split the data, train and test files are being saved")
+            return train_set, test_set
 
         except Exception as e:
             raise SensorException(e, sys)
@@ -103,32 +111,28 @@ class DataIngestion:
     def initiate_data_ingestion(self) -> DataIngestionArtifact:
         """
         Orchestrates the complete data ingestion process:
-        - Extract data from MongoDB
-        - Drop unnecessary columns
+        - Extract data from MongoDB, without the schema drop_columns
         - Split into train/test
         - Create and return a DataIngestionArtifact object
         """
         try:
-            # --- Step 1: Export data from MongoDB to feature store ---
+            # --- Step 1: Export data from MongoDB to feature store (drop_columns are not exported) ---
             dataframe = self.export_data_into_feature_store()
 
-            # --- Step 2: Drop columns defined in schema constants ---
-            # Using errors='ignore' ensures it won’t crash if a column doesn’t exist
-            dataframe = dataframe.drop(self._schema_config["drop_columns"],axis=1)
-            logger.info(f"Dropped unnecessary columns: {SCHEMA_DROP_COLS}")
-
-            # --- Step 3: Split into training and testing sets ---
-            self.split_data_as_train_test(dataframe=dataframe)
+            # --- Step 2: Split into training and testing sets ---
+            train_set, test_set = self.split_data_as_train_test(dataframe=dataframe)
 
-            # --- Step 4: Create a DataIngestionArtifact to store metadata paths ---
+            # --- Step 3: Create a DataIngestionArtifact with the paths and the in-memory frames ---
             data_ingestion_artifact = DataIngestionArtifact(
                 training_file_path=self.data_ingestion_config.train_file_path,
-                test_file_path=self.data_ingestion_config.test_file_path
+                test_file_path=self.data_ingestion_config.test_file_path,
+                train_dataframe=train_set,
+                test_dataframe=test_set
             )
 
             logger.info(f"Data ingestion completed successfully. Artifact: {data_ingestion_artifact}")
 
-            # --- Step 5: Return the artifact for the next pipeline stage ---
+            # --- Step 4: Return the artifact for the next pipeline stage ---
             return data_ingestion_artifact
 
         except Exception as e:
@@ -20,7 +20,9 @@ from sensor.entity.artifact_entity import (
     DataPreprocessingArtifact,
 )
 from sensor.ml_model_components.model.estimator import TargetValueMapping
-from sensor.utils.main_utils import save_numpy_array_data, save_object
+from sensor.ml_model_components.model.feature_histogram import FeatureHistogram
+from sensor.utils.main_utils import save_numpy_array_data, save_object, load_dataframe
+from sensor.utils.artifact_writer import artifact_writer
 
 class DataPreprocessing:
     def __init__(self, data_validation_artifact: DataValidationArtifact,
@@ -34,7 +36,7 @@ class DataPreprocessing:
     @staticmethod
     def read_data(file_path: str) -> pd.DataFrame:
         try:
-            return pd.read_csv(file_path)
+            return load_dataframe(file_path)
         except Exception as e:
             raise SensorException(e, sys)
         
@@ -55,9 +57,13 @@ class DataPreprocessing:
         try:
             logger.info("Starting data preprocessing")
 
-            # ------1. Read training and testing data------
-            train_df = DataPreprocessing.read_data(self.data_validation_artifact.valid_train_file_path)
-            test_df = DataPreprocessing.read_data(self.data_validation_artifact.valid_test_file_path)
+            # ------1. Read training and testing data (handed over in memory by validation when available)------
+            train_df = self.data_validation_artifact.valid_train_dataframe
+            if train_df is None:
+                train_df = DataPreprocessing.read_data(self.data_validation_artifact.valid_train_file_path)
+            test_df = self.data_validation_artifact.valid_test_dataframe
+            if test_df is None:
+                test_df = DataPreprocessing.read_data(self.data_validation_artifact.valid_test_file_path)
             logger.info("Read training and testing data successfully")
 
             # ------2. Separate features and target variable------
@@ -90,20 +96,37 @@ class DataPreprocessing:
             train_array = np.c_[X_train_resampled , y_train_resampled]
             test_array = np.c_[X_test_final , y_test_final]
 
-            # Save the preprocessed training and testing data as numpy arrays
-            save_numpy_array_data(self.data_preprocessing_config.processed_train_file_path , train_array)
-            save_numpy_array_data(self.data_preprocessing_config.processed_test_file_path , test_array)
-            logger.info("Saved preprocessed training and testing data")
+            # Save the preprocessed training and testing data as numpy arrays, in the background
+            artifact_writer.submit(save_numpy_array_data, self.data_preprocessing_config.processed_train_file_path , train_array)
+            artifact_writer.submit(save_numpy_array_data, self.data_preprocessing_config.processed_test_file_path , test_array)
+            logger.info("Saving preprocessed training and testing data")
 
             # Save the preprocessing object
-            save_object(self.data_preprocessing_config.preprocessed_object_file_path , preprocessor)
-            logger.info("Saved preprocessing object")
+            artifact_writer.submit(save_object, self.data_preprocessing_config.preprocessed_object_file_path , preprocessor)
+            logger.info("Saving preprocessing object")
+
+            # Reference histograms of the raw (not imputed, not resampled) training features, saved with the model
+            # so the prediction service can measure drift of served traffic against them
+            reference_histogram_file_path = self.data_preprocessing_config.reference_histogram_file_path
+            os.makedirs(os.path.dirname(reference_histogram_file_path), exist_ok=True)
+            reference_histogram = FeatureHistogram.fit(
+                X_train.to_numpy(dtype=np.float64, na_value=np.nan),
+                feature_names=X_train.columns,
+                bins=self.data_preprocessing_config.reference_histogram_bins
+            )
+            artifact_writer.submit(reference_histogram.save, reference_histogram_file_path)
+            logger.info("Saving reference feature histograms")
 
             # Create and return the DataPreprocessingArtifact
             data_preprocessing_artifact = DataPreprocessingArtifact(
                 preprocessed_object_file_path=self.data_preprocessing_config.preprocessed_object_file_path,
                 processed_train_file_path=self.data_preprocessing_config.processed_train_file_path,
-                processed_test_file_path=self.data_preprocessing_config.processed_test_file_path
+                processed_test_file_path=self.data_preprocessing_config.processed_test_file_path,
+                reference_histogram_file_path=reference_histogram_file_path,
+                train_array=train_array,
+                test_array=test_array,
+                preprocessor=preprocessor,
+                reference_histogram=reference_histogram
             )
 
             logger.info("Data preprocessing completed successfully")
@@ -12,7 +12,8 @@ logger = logging.getLogger(__name__)
 
 from sensor.constant.training_pipeline import SCHEMA_FILE_PATH
 
-from sensor.utils.main_utils import read_yaml_file, write_yaml_file
+from sensor.utils.main_utils import read_yaml_file, write_yaml_file, get_schema_dtypes, save_dataframe, load_dataframe
+from sensor.utils.artifact_writer import artifact_writer
 from sensor.entity.config_entity import DataValidationConfig
 from sensor.entity.artifact_entity import DataValidationArtifact, DataIngestionArtifact
 
@@ -30,7 +31,7 @@ class DataValidation:
     @staticmethod
     def read_data(file_path) -> pd.DataFrame:
         try:
-            return pd.read_csv(file_path, na_values="na")
+            return load_dataframe(file_path)
         except Exception as e:
             raise SensorException(e, sys)
 
@@ -97,9 +98,13 @@ class DataValidation:
             train_file_path = self.data_ingestion_artifact.training_file_path
             test_file_path = self.data_ingestion_artifact.test_file_path
 
-            # Using class static method as in your provided code
-            train_dataframe = DataValidation.read_data(train_file_path)
-            test_dataframe = DataValidation.read_data(test_file_path)
+            # Frames handed over by ingestion are used as they are; the files are read only without them
+            train_dataframe = self.data_ingestion_artifact.train_dataframe
+            if train_dataframe is None:
+                train_dataframe = DataValidation.read_data(train_file_path)
+            test_dataframe = self.data_ingestion_artifact.test_dataframe
+            if test_dataframe is None:
+                test_dataframe = DataValidation.read_data(test_file_path)
 
             # --- 2. Validation Checks (Using Direct Exception Raising for Clarity) ---
 
@@ -147,20 +152,20 @@ class DataValidation:
                 valid_train_file_path = self.data_validation_config.valid_train_file_path
                 valid_test_file_path = self.data_validation_config.valid_test_file_path
 
-                # Save the data to the VALID location
-                train_dataframe.to_csv(valid_train_file_path, index=False, header=True)
-                test_dataframe.to_csv(valid_test_file_path, index=False, header=True)
-                logger.info(f"Data saved to valid directory: {self.data_validation_config.valid_data_dir}")
+                # Save the data to the VALID location, in the background
+                artifact_writer.submit(save_dataframe, valid_train_file_path, train_dataframe, dtypes=get_schema_dtypes(self._schema_config))
+                artifact_writer.submit(save_dataframe, valid_test_file_path, test_dataframe, dtypes=get_schema_dtypes(self._schema_config))
+                logger.info(f"Data being saved to valid directory: {self.data_validation_config.valid_data_dir}")
 
             else:
                 # Use the pre-calculated paths from the config object
                 invalid_train_file_path = self.data_validation_config.invalid_train_file_path
                 invalid_test_file_path = self.data_validation_config.invalid_test_file_path
 
-                # Save the data to the INVALID location
-                train_dataframe.to_csv(invalid_train_file_path, index=False, header=True)
-                test_dataframe.to_csv(invalid_test_file_path, index=False, header=True)
-                logger.info(f"Data saved to invalid directory due to drift: {self.data_validation_config.invalid_data_dir}")
+                # Save the data to the INVALID location, in the background
+                artifact_writer.submit(save_dataframe, invalid_train_file_path, train_dataframe, dtypes=get_schema_dtypes(self._schema_config))
+                artifact_writer.submit(save_dataframe, invalid_test_file_path, test_dataframe, dtypes=get_schema_dtypes(self._schema_config))
+                logger.info(f"Data being saved to invalid directory due to drift: {self.data_validation_config.invalid_data_dir}")
 
             # --- 5. Create and Return Artifact ---
             data_validation_artifact = DataValidationArtifact(
@@ -170,6 +175,8 @@ class DataValidation:
                 invalid_train_file_path=invalid_train_file_path,
                 invalid_test_file_path=invalid_test_file_path,
                 drift_report_file_path=self.data_validation_config.drift_report_file_path,
+                valid_train_dataframe=train_dataframe if validation_status else None,
+                valid_test_dataframe=test_dataframe if validation_status else None,
             )
 
             logger.info(f"Data validation artifact created: {data_validation_artifact}")
@@ -13,7 +13,7 @@ from sensor.entity.artifact_entity import ( DataValidationArtifact,
                                            ModelTrainerArtifact,
                                            ModelEvaluationArtifact)
 
-from sensor.utils.main_utils import save_object,load_object,write_yaml_file
+from sensor.utils.main_utils import save_object,load_object,write_yaml_file,load_dataframe
 from sensor.ml_model_components.metric.classification_metric import get_classification_score
 from sensor.ml_model_components.model.estimator import ( SensorModel,
                                                         TargetValueMapping )
@@ -28,25 +28,44 @@ class ModelEvaluation:
         except Exception as e:
             raise SensorException(e, sys)
 
+    @staticmethod
+    def get_evaluation_columns(*models) -> list:
+        """
+        Target plus the union of the models' input features, in first-seen order;
+        None (every column) when a model does not record the features it was fitted on.
+        """
+        columns = [TARGET_COLUMN]
+        for model in models:
+            feature_names = getattr(getattr(model, "preprocessor", None), "feature_names_in_", None)
+            if feature_names is None:
+                return None
+            columns.extend(name for name in feature_names if name not in columns)
+        return columns
+
+    @staticmethod
+    def get_model_input(x_eval, model, columns):
+        # With pruned columns the frame holds the union of both models' features, in the challenger's order
+        if columns is None:
+            return x_eval
+        return x_eval[list(model.preprocessor.feature_names_in_)]
+
+    @staticmethod
+    def load_evaluation_data(dataframe, file_path, columns) -> pd.DataFrame:
+        # The validated frame handed over in memory when there is one, else the file
+        if dataframe is None:
+            return load_dataframe(file_path, columns=columns)
+        return dataframe if columns is None else dataframe[columns]
+
     def initiate_model_evaluation(self) -> ModelEvaluationArtifact:
         try:
             logger.info("Starting model evaluation stage")
             
-            # 1. Load and Prepare the "Evaluation Arena" (Full Dataset)
-            train_df = pd.read_csv(self.data_validation_artifact.valid_train_file_path)
-            test_df = pd.read_csv(self.data_validation_artifact.valid_test_file_path)
-            
-            # Combine for a statistically robust evaluation
-            df = pd.concat([train_df, test_df])
-            y_true = df[TARGET_COLUMN].replace(TargetValueMapping().to_dict())
-            x_eval = df.drop(TARGET_COLUMN, axis=1)
-
-            # 2. Identify the Challenger (The model we just trained)
+            # 1. Identify the Challenger (The model we just trained)
             trained_model_path = self.model_trainer_artifact.trained_model_file_path
             model_resolver = ModelResolver()
             is_model_accepted = True  # Default assumption
 
-            # 3. Handle the "First Run" Scenario
+            # 2. Handle the "First Run" Scenario: nothing to compare, so the data is not even read
             if not model_resolver.is_model_exists():
                 logger.info("No production model found. Automatically accepting the current trained model.")
                 model_evaluation_artifact = ModelEvaluationArtifact(
@@ -59,17 +78,31 @@ class ModelEvaluation:
                 )
                 return model_evaluation_artifact
 
-            # 4. Handle the "Battle" Scenario (Production model exists)
+            # 3. Handle the "Battle" Scenario (Production model exists)
             logger.info("Production model exists. Loading models for comparison.")
             best_model_path = model_resolver.get_best_model_path()
             
             # Load the Champion and the Challenger
             best_model = load_object(file_path=best_model_path)
-            trained_model = load_object(file_path=trained_model_path)
+            trained_model = self.model_trainer_artifact.trained_model
+            if trained_model is None:
+                trained_model = load_object(file_path=trained_model_path)
+
+            # 4. Load the "Evaluation Arena" (Full Dataset), reading only the columns the two models use
+            columns = self.get_evaluation_columns(trained_model, best_model)
+            train_df = self.load_evaluation_data(self.data_validation_artifact.valid_train_dataframe,
+                                                 self.data_validation_artifact.valid_train_file_path, columns)
+            test_df = self.load_evaluation_data(self.data_validation_artifact.valid_test_dataframe,
+                                                self.data_validation_artifact.valid_test_file_path, columns)
+
+            # Combine for a statistically robust evaluation
+            df = pd.concat([train_df, test_df])
+            y_true = df[TARGET_COLUMN].replace(TargetValueMapping().to_dict())
+            x_eval = df.drop(TARGET_COLUMN, axis=1)
 
-            # Generate Predictions using the full evaluation set
-            y_trained_pred = trained_model.predict(x_eval)
-            y_best_pred = best_model.predict(x_eval)
+            # Generate Predictions using the full evaluation set, each model on the features it was fitted on
+            y_trained_pred = trained_model.predict(self.get_model_input(x_eval, trained_model, columns))
+            y_best_pred = best_model.predict(self.get_model_input(x_eval, best_model, columns))
 
             # Calculate metrics
             trained_metric = get_classification_score(y_true, y_trained_pred)
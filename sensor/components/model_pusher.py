@@ -5,6 +5,7 @@ from sensor.logger import logging as global_logging
 from sensor.exception import SensorException
 logger = global_logging.getLogger(__name__)
 
+from sensor.constant.training_pipeline import MODEL_ARTIFACT_DIR_NAME
 from sensor.entity.config_entity import ModelPusherConfig
 from sensor.entity.artifact_entity import(ModelPusherArtifact , 
                                           ModelEvaluationArtifact
@@ -32,15 +33,40 @@ class ModelPusher:
             logger.info(f"Copied trained model from {trained_model_path} to {model_file_path}")
             
             # 2. Copy the trained model to the saved model directory for deployment
+            # The native model artifact goes in first: once model.pkl is visible a serving process may load it and
+            # export the artifact itself. Everything is copied under a temporary name so nothing half-written is seen.
             saved_model_path = self.model_pusher_config.saved_model_path
             os.makedirs(os.path.dirname(saved_model_path),exist_ok=True)
-            shutil.copy(src=trained_model_path, dst=saved_model_path)
+
+            saved_model_artifact_dir = None
+            trained_model_artifact_dir = os.path.join(os.path.dirname(trained_model_path), MODEL_ARTIFACT_DIR_NAME)
+            if os.path.isdir(trained_model_artifact_dir):
+                shutil.copytree(trained_model_artifact_dir, self.model_pusher_config.model_artifact_dir, dirs_exist_ok=True)
+                saved_model_artifact_dir = self.model_pusher_config.saved_model_artifact_dir
+                # Leftovers of an interrupted push would make copytree / os.replace fail
+                for stale_dir in (f"{saved_model_artifact_dir}.tmp", saved_model_artifact_dir):
+                    if os.path.isdir(stale_dir):
+                        shutil.rmtree(stale_dir)
+                shutil.copytree(trained_model_artifact_dir, f"{saved_model_artifact_dir}.tmp")
+                os.replace(f"{saved_model_artifact_dir}.tmp", saved_model_artifact_dir)
+                logger.info(f"Copied model artifact from {trained_model_artifact_dir} to {saved_model_artifact_dir}")
+
+            shutil.copy(src=trained_model_path, dst=f"{saved_model_path}.tmp")
+            os.replace(f"{saved_model_path}.tmp", saved_model_path)
             logger.info(f"Copied trained model from {trained_model_path} to {saved_model_path}")
+
+            # 3. Publish the new champion by atomically rewriting the pointer file the serving side watches
+            pointer_file_path = self.model_pusher_config.saved_model_pointer_file_path
+            with open(f"{pointer_file_path}.tmp", "w") as pointer_file:
+                pointer_file.write(str(self.model_pusher_config.saved_model_timestamp))
+            os.replace(f"{pointer_file_path}.tmp", pointer_file_path)
+            logger.info(f"Published model {self.model_pusher_config.saved_model_timestamp} via {pointer_file_path}")
             
-            # 3. Create and return the ModelPusherArtifact
+            # 4. Create and return the ModelPusherArtifact
             model_pusher_artifact = ModelPusherArtifact(
                 saved_model_path=saved_model_path,
-                model_file_path=model_file_path
+                model_file_path=model_file_path,
+                saved_model_artifact_dir=saved_model_artifact_dir
             )
             logger.info(f"Model pusher artifact: {model_pusher_artifact}")
             return model_pusher_artifact
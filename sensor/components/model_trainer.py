@@ -9,6 +9,7 @@ logger = logging.getLogger(__name__)
 from xgboost import XGBClassifier
 from sklearn.model_selection import GridSearchCV
 
+from sensor.configuration.resource_config import ResourceConfig
 from sensor.utils.main_utils import load_numpy_array_data
 from sensor.utils.main_utils import save_object,load_object
 
@@ -19,6 +20,9 @@ from sensor.entity.config_entity import ModelTrainerConfig
 
 from sensor.ml_model_components.metric.classification_metric import get_classification_score
 from sensor.ml_model_components.model.estimator import SensorModel
+from sensor.ml_model_components.model.fused_model import FusedSensorModel
+from sensor.ml_model_components.model.model_artifact import save_model_artifact, get_schema_hash
+from sensor.ml_model_components.model.feature_histogram import FeatureHistogram
 
 class ModelTrainer:
     def __init__(self ,data_preprocessing_artifact : DataPreprocessingArtifact,
@@ -26,6 +30,7 @@ class ModelTrainer:
         try:
             self.model_trainer_config = model_trainer_config
             self.data_transformation_artifact = data_preprocessing_artifact
+            self.resource_config = ResourceConfig()
         except Exception as e:
             raise SensorException(e,sys)
     
@@ -43,7 +48,8 @@ class ModelTrainer:
                 'learning_rate': [0.1, 0.01, 0.05]
             }
 
-            xgb_clf = XGBClassifier()
+            # Each parallel CV fit gets an equal slice of the training threads, so fits x threads never exceed the budget
+            xgb_clf = XGBClassifier(n_jobs=self.resource_config.cv_fit_threads)
             
             # Initialize GridSearchCV
             grid_search = GridSearchCV(
@@ -51,7 +57,8 @@ class ModelTrainer:
                 param_grid=param_grid,
                 cv=3, # 3-fold cross-validation
                 verbose=1,
-                scoring='f1' # We prioritize F1-score for imbalanced sensor data
+                scoring='f1', # We prioritize F1-score for imbalanced sensor data
+                n_jobs=self.resource_config.cv_n_jobs
             )
 
             grid_search.fit(x_train, y_train)
@@ -67,16 +74,26 @@ class ModelTrainer:
         Trains the XGBoost model using either default or tuned parameters.
         """
         try:
+            n_jobs = self.resource_config.training_threads
             if best_params is not None:
-                xgb_clf = XGBClassifier(**best_params) # Unpack the best params
+                xgb_clf = XGBClassifier(n_jobs=n_jobs, **best_params) # Unpack the best params
             else:
-                xgb_clf = XGBClassifier()
+                xgb_clf = XGBClassifier(n_jobs=n_jobs)
             
             xgb_clf.fit(x_train, y_train)
             return xgb_clf
         except Exception as e:
             raise SensorException(e, sys)
         
+    def load_reference_histogram(self):
+        # The model artifact is still written without it; the prediction service then skips drift monitoring
+        if self.data_transformation_artifact.reference_histogram is not None:
+            return self.data_transformation_artifact.reference_histogram
+        reference_histogram_file_path = self.data_transformation_artifact.reference_histogram_file_path
+        if reference_histogram_file_path is None or not os.path.exists(reference_histogram_file_path):
+            return None
+        return FeatureHistogram.load(reference_histogram_file_path)
+
     def initiate_model_trainer(self) -> ModelTrainerArtifact:
         try:
             # ------1. Load transformed training and testing arrays------
@@ -85,8 +102,13 @@ class ModelTrainer:
             train_file_path = self.data_transformation_artifact.processed_train_file_path
             test_file_path = self.data_transformation_artifact.processed_test_file_path
 
-            train_arr = load_numpy_array_data(train_file_path)
-            test_arr = load_numpy_array_data(test_file_path)
+            # Arrays handed over in memory by preprocessing are used directly; the files are read only without them
+            train_arr = self.data_transformation_artifact.train_array
+            if train_arr is None:
+                train_arr = load_numpy_array_data(train_file_path)
+            test_arr = self.data_transformation_artifact.test_array
+            if test_arr is None:
+                test_arr = load_numpy_array_data(test_file_path)
 
             #------2. Split training and testing arrays into input and target feature------
             logger.info("Splitting training and testing arrays into input and target feature")
@@ -119,8 +141,30 @@ class ModelTrainer:
             
             #------6. Save the trained model------
             logger.info("Saving the trained model")
-            preprocessor = load_object(file_path=self.data_transformation_artifact.preprocessed_object_file_path)
+            preprocessor = self.data_transformation_artifact.preprocessor
+            if preprocessor is None:
+                preprocessor = load_object(file_path=self.data_transformation_artifact.preprocessed_object_file_path)
             sensor_model = SensorModel(preprocessor=preprocessor , model=model)
+
+            # Native artifact (booster.ubj + preprocessor.npz + manifest.json) the prediction service loads without unpickling.
+            # Written before model.pkl: the shadow scorer loads a trainer's model.pkl as soon as it appears and would
+            # otherwise export a bare artifact (no metrics, schema hash or reference histogram) in its place.
+            # A folder left by an earlier attempt is replaced, never kept.
+            trained_model_artifact_dir = self.model_trainer_config.trained_model_artifact_dir
+            try:
+                save_model_artifact(
+                    kernel=FusedSensorModel.from_sensor_model(sensor_model),
+                    artifact_dir=trained_model_artifact_dir,
+                    metrics={"train": train_metric, "test": test_metric},
+                    schema_hash=get_schema_hash(),
+                    reference_histogram=self.load_reference_histogram(),
+                    overwrite=True
+                )
+                logger.info(f"Trained model artifact saved at : {trained_model_artifact_dir}")
+            except ValueError as e:
+                trained_model_artifact_dir = None
+                logger.warning(f"Model artifact not written, the model will be served from model.pkl: {e}")
+
             trained_model_file_path = self.model_trainer_config.trained_model_file_path
             save_object(file_path=trained_model_file_path , obj=sensor_model)
             logger.info(f"Trained model saved at : {trained_model_file_path}")
@@ -129,7 +173,9 @@ class ModelTrainer:
             model_trainer_artifact = ModelTrainerArtifact(
                 trained_model_file_path=trained_model_file_path,
                 train_metric_artifact=train_metric,
-                test_metric_artifact=test_metric
+                test_metric_artifact=test_metric,
+                trained_model_artifact_dir=trained_model_artifact_dir,
+                trained_model=sensor_model
             )
             logger.info(f"Model Trainer Artifact : {model_trainer_artifact}")
             return model_trainer_artifact
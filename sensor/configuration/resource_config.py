@@ -0,0 +1,103 @@
+import os, sys
+
+from sensor.exception import SensorException
+
+import logging
+logger = logging.getLogger(__name__)
+
+from sensor.constant.env_variable import (SERVING_WORKERS_KEY, SERVING_CPU_SHARE_KEY, SERVING_THREADS_KEY,
+                                          TRAINING_THREADS_KEY, CV_N_JOBS_KEY)
+from sensor.constant.application import (DEFAULT_SERVING_WORKERS, DEFAULT_SERVING_CPU_SHARE,
+                                         INFERENCE_MAX_WORKERS)
+
+# Variables read by OpenMP, OpenBLAS, MKL and numexpr when they create their thread pools
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+
+def get_available_cpus() -> int:
+    """
+    Cores this process may run on (respects taskset/cgroup affinity, unlike os.cpu_count()).
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _env_number(key: str, cast, default):
+    value = os.getenv(key)
+    return default if value in (None, "") else cast(value)
+
+
+class ResourceConfig:
+    """
+    Host-wide CPU thread budget, split per role so serving and training never oversubscribe the box.
+    - serving: `serving_cpu_share` of the cores divided between `serving_workers` uvicorn processes
+    - training: the remaining cores, for the training child process
+    - cross-validation: `cv_n_jobs` parallel GridSearchCV fits, each XGBoost fit getting an equal slice
+    Every value can be pinned through the SENSOR_* environment variables in sensor/constant/env_variable.py.
+    """
+
+    def __init__(self, cpu_count: int = None):
+        try:
+            self.cpu_count = cpu_count if cpu_count is not None else get_available_cpus()
+            self.serving_workers = max(1, _env_number(SERVING_WORKERS_KEY, int, DEFAULT_SERVING_WORKERS))
+            self.serving_cpu_share = _env_number(SERVING_CPU_SHARE_KEY, float, DEFAULT_SERVING_CPU_SHARE)
+
+            serving_budget = max(1, int(self.cpu_count * self.serving_cpu_share))
+            self.serving_threads = max(1, _env_number(SERVING_THREADS_KEY, int,
+                                                      serving_budget // self.serving_workers))
+            self.training_threads = max(1, _env_number(TRAINING_THREADS_KEY, int,
+                                                       self.cpu_count - self.serving_threads * self.serving_workers))
+            self.cv_n_jobs = max(1, min(_env_number(CV_N_JOBS_KEY, int, self.training_threads), self.training_threads))
+        except Exception as e:
+            raise SensorException(e, sys)
+
+    @property
+    def predict_threads(self) -> int:
+        # Each of the INFERENCE_MAX_WORKERS concurrent scoring jobs gets an equal slice of the worker's budget
+        return max(1, self.serving_threads // INFERENCE_MAX_WORKERS)
+
+    @property
+    def cv_fit_threads(self) -> int:
+        return max(1, self.training_threads // self.cv_n_jobs)
+
+    def to_dict(self) -> dict:
+        return {
+            "cpu_count": self.cpu_count,
+            "serving_workers": self.serving_workers,
+            "serving_threads": self.serving_threads,
+            "predict_threads": self.predict_threads,
+            "training_threads": self.training_threads,
+            "cv_n_jobs": self.cv_n_jobs,
+            "cv_fit_threads": self.cv_fit_threads,
+        }
+
+    @staticmethod
+    def set_thread_env(threads: int) -> None:
+        """
+        Sets the OpenMP/BLAS thread variables; only effective before those libraries are loaded,
+        so call it at the start of a fresh process (e.g. the training child).
+        """
+        for key in THREAD_ENV_VARS:
+            os.environ[key] = str(threads)
+
+    @staticmethod
+    def limit_native_threads(threads: int) -> None:
+        """
+        Caps the BLAS and OpenMP pools already loaded in this process (numpy, scipy, sklearn, xgboost).
+        """
+        try:
+            from threadpoolctl import threadpool_limits
+            threadpool_limits(limits=threads)
+        except ImportError:
+            logger.warning("threadpoolctl is not installed; native thread pools are not capped")
+
+    def apply_serving(self) -> None:
+        self.limit_native_threads(self.serving_threads)
+        logger.info(f"Serving thread budget: {self.to_dict()}")
+
+    def apply_training(self) -> None:
+        self.set_thread_env(self.training_threads)
+        self.limit_native_threads(self.training_threads)
+        logger.info(f"Training thread budget: {self.to_dict()}")
@@ -1,2 +1,44 @@
 APP_HOST = "0.0.0.0"
-APP_PORT = 8080
\ No newline at end of file
+APP_PORT = 8080
+
+# Serving related constants
+MODEL_RELOAD_CHECK_INTERVAL_SECONDS: float = 1.0 # how often the prediction service looks for a newly pushed model
+MODEL_PRELOAD_ON_STARTUP: bool = True # load and warm up the champion before the server accepts requests
+MODEL_ARTIFACT_ENABLED: bool = True # serve from the native model artifact folder (exported on first load if missing) instead of unpickling model.pkl; only its preprocessor arrays are shared between workers, each worker still parses booster.ubj into private XGBoost trees (about 2-3x the file size, ~0.8 MB for a 400-tree model)
+INPUT_VALIDATION_ENABLED: bool = True # check and coerce every scored batch against the schema, leaving out rows with unparseable or infinite values
+INPUT_NA_TOKENS: tuple = ("na", "NA", "") # text read as a missing value (the APS dataset writes missing readings as 'na')
+INPUT_REJECTED_ROWS_REPORTED: int = 100 # rejected row numbers listed in a validation report; the count is always complete
+INPUT_RECORD_MIN_FEATURES: int = 1 # model features a single JSON record must name; a record matching fewer is rejected with its unknown keys
+PREDICTION_PREVIEW_ROWS: int = 10 # leading rows of an upload returned by /predict with their predictions (every row is scored)
+PREDICTION_CHUNK_SIZE: int = 10000 # rows parsed and scored at a time by the streaming /predict/stream endpoint
+MICRO_BATCH_MAX_SIZE: int = 64 # most single records /predict/record scores in one vectorized call
+MICRO_BATCH_MAX_WAIT_MS: float = 5.0 # longest a record waits for others to join its batch
+MICRO_BATCH_MAX_QUEUED_RECORDS: int = 1024 # records waiting for a micro-batch before /predict/record gets 503
+INFERENCE_MAX_WORKERS: int = 4 # threads running parsing/scoring off the event loop
+INFERENCE_MAX_QUEUE_DEPTH: int = 16 # jobs allowed to wait for a worker before requests get 503
+INFERENCE_TIMEOUT_SECONDS: float = 60.0 # longest a request waits for its scoring job
+PREDICTION_CACHE_ENABLED: bool = False # reuse predictions for rows/uploads the current champion already scored; off by default, since hashing a row costs about as much as scoring it with the fused kernel
+PREDICTION_CACHE_MAX_ROWS: int = 500000 # slots of the in-memory row table (rounded up to a power of two)
+PREDICTION_CACHE_MAX_FILES: int = 32 # whole-upload results kept in the in-memory LRU
+PREDICTION_CACHE_DISK_DIR: str = None # set to a folder (e.g. "prediction_cache") to add the on-disk tier
+METRICS_LATENCY_BUCKETS_SECONDS: tuple = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0) # /metrics per-stage latency buckets
+METRICS_BATCH_SIZE_BUCKETS: tuple = (1, 2, 4, 8, 16, 32, 64, 128, 256, 1024, 4096, 10000, 50000, 100000) # /metrics rows-per-scoring-call buckets
+METRICS_TRAINING_BUCKETS_SECONDS: tuple = (1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600) # /metrics training stage duration buckets
+LOG_QUEUE_MAX_SIZE: int = 10000 # log records buffered for the background writer; further records are dropped, never waited on
+LOG_JSON_FORMAT: bool = False # opt in to one JSON object per line; off keeps the plain text format existing log parsers read
+LOG_RATE_LIMIT_MAX_RECORDS: int = 20 # INFO/DEBUG records one call site may emit per interval, the rest are counted and dropped
+LOG_RATE_LIMIT_INTERVAL_SECONDS: float = 1.0 # length of that rate limiting window
+SHADOW_SAMPLE_RATE: float = 0.1 # fraction of scored batches also scored by the unpromoted challenger (0 disables shadow scoring)
+SHADOW_MAX_PENDING_BATCHES: int = 4 # sampled batches waiting for the shadow worker; more are skipped, never waited on
+SHADOW_CHALLENGER_CHECK_INTERVAL_SECONDS: float = 30.0 # how often the artifact folder is scanned for a newer challenger
+DEFAULT_SERVING_WORKERS: int = 1 # uvicorn workers assumed when SENSOR_SERVING_WORKERS is not set
+DEFAULT_SERVING_CPU_SHARE: float = 0.5 # cores kept for serving while training runs on the same host
+DRIFT_MONITORING_ENABLED: bool = True # bin every scored batch against the champion's reference histogram for /predict/drift
+DRIFT_MAX_ROWS_PER_BATCH: int = 256 # rows of a scored batch added to the drift histograms; larger batches are sampled with a fixed stride
+DRIFT_MIN_ROWS: int = 500 # binned rows needed before drift scores are reported
+DRIFT_PSI_THRESHOLD: float = 0.2 # population stability index from which a feature counts as drifted
+DRIFT_TOP_FEATURES: int = 10 # most drifted features listed by /predict/drift
+
+# Batch prediction related constants
+BATCH_PREDICTION_PARTITION_ROWS: int = 50000 # rows each batch prediction task reads and scores (CSV partitions are sized from a byte estimate)
+BATCH_PREDICTION_MONGO_WRITE_BATCH: int = 1000 # predictions per unordered bulk_write when writing back to MongoDB
@@ -1,2 +1,11 @@
+import os
+
+from sensor.constant.training_pipeline import ARTIFACT_DIR
+
 DATABASE_NAME = "sensor"
-COLLECTION_NAME = "aps_data"
\ No newline at end of file
+COLLECTION_NAME = "aps_data"
+
+# Bulk loading of CSV files into MongoDB (SensorData.dump_csv_file_to_mongodb_collection)
+BULK_LOAD_CHUNK_ROWS: int = 5000 # CSV rows read, converted and inserted as one unit
+BULK_LOAD_WORKERS: int = 4 # threads sending unordered insert_many calls; one chunk in flight per thread
+BULK_LOAD_CHECKPOINT_DIR: str = os.path.join(ARTIFACT_DIR, "bulk_load") # progress of every load, to resume failed ones
@@ -1 +1,7 @@
-MONGODB_URL_KEY = "MONGO_DB_URL"
\ No newline at end of file
+MONGODB_URL_KEY = "MONGO_DB_URL"
+# CPU thread budget (see sensor/configuration/resource_config.py); unset keys are derived from the core count
+SERVING_WORKERS_KEY = "SENSOR_SERVING_WORKERS" # uvicorn worker processes on the host
+SERVING_CPU_SHARE_KEY = "SENSOR_SERVING_CPU_SHARE" # fraction of the cores reserved for serving when training shares the box
+SERVING_THREADS_KEY = "SENSOR_SERVING_THREADS" # threads per serving worker (XGBoost + BLAS/OpenMP)
+TRAINING_THREADS_KEY = "SENSOR_TRAINING_THREADS" # threads for the training process
+CV_N_JOBS_KEY = "SENSOR_CV_N_JOBS" # GridSearchCV fits run in parallel
@@ -9,19 +9,29 @@ By defining constants in one place, it promotes consistency and makes it easier
 
 # General constants defined here
 TARGET_COLUMN = "class"
-FILE_NAME: str = 'sensor.csv'
+FILE_NAME: str = 'sensor.parquet' # stage data is Parquet; a .csv name switches a stage back to CSV
 PIPELINE_NAME: str = "sensor" # Name of the main pipeline folder
 
 # Define the common file name for all the stages
-TRAIN_FILE_NAME: str = "train.csv"
-TEST_FILE_NAME: str = "test.csv"
+TRAIN_FILE_NAME: str = "train.parquet"
+TEST_FILE_NAME: str = "test.parquet"
 
 SAVED_MODEL_DIR: str = "saved_models" # folder name where all the saved models will be stored
 MODEL_FILE_NAME = "model.pkl" # Name of the model file name
+SAVED_MODEL_POINTER_FILE_NAME: str = "latest" # file inside saved_models holding the champion timestamp
+MODEL_ARTIFACT_DIR_NAME: str = "model_artifact" # native model folder (booster.ubj, preprocessor.npz, manifest.json) next to model.pkl
 
 SCHEMA_DROP_COLS = "drop_columns"
 
 ARTIFACT_DIR: str = "artifact"  # folder name where all the artifacts will be stored
+TRAINING_JOBS_DIR: str = os.path.join(ARTIFACT_DIR, "training_jobs") # status files of background training jobs
+TRAINING_LOCK_FILE_PATH: str = os.path.join(ARTIFACT_DIR, "training.lock") # host-wide lock so only one training runs
+TRAINING_START_TIMEOUT_SECONDS: float = 60.0 # longest /train waits for a new training process to report whether it got the lock
+TRAINING_LOCK_RETRY_SECONDS: float = 2.0 # a new training process retries the lock this long, so a worker's brief running-job probe cannot reject it
+FEATURE_STORE_DIR: str = os.path.join(ARTIFACT_DIR, "feature_store") # persistent local copy of the collection, kept across runs
+FEATURE_STORE_STATE_FILE_NAME: str = "state.yaml" # watermark, columns and part files of the persistent feature store
+FEATURE_STORE_MAX_PARTS: int = 32 # appended part files are merged into one once there are this many
+ARTIFACT_WRITER_THREADS: int = 2 # background threads persisting stage artifacts; 0 saves them inline
 
 SCHEMA_FILE_PATH = os.path.join("config" , "schema.yaml") # Path of the schema file
 # Data Ingestion related constant start with DATA_INGESTION VARIBLEs
@@ -30,6 +40,10 @@ DATA_INGESTION_DIR_NAME: str = "data_ingestion" # folder name for data ingestion
 DATA_INGESTION_FEATURE_STORE_DIR: str = "feature_store" # folder name for feature store
 DATA_INGESTION_INGESTED_DIR: str = "ingested" # folder name for ingested data
 DATA_INGESTION_TRAIN_TEST_SPLIT_RATION: float = 0.2 # train test split ratio
+DATA_INGESTION_EXPORT_BATCH_SIZE: int = 2000 # documents per MongoDB cursor batch, also the parsing chunk of the export
+DATA_INGESTION_EXPORT_PARTITIONS: int = 4 # _id ranges of the collection exported concurrently
+DATA_INGESTION_INCREMENTAL: bool = True # append only documents newer than the feature store watermark
+DATA_INGESTION_NA_TOKENS: tuple = ("na", "") # values stored in MongoDB for missing sensor readings
 
 # Data Validation related constant start with DATA_VALIDATION VARIBLEs
 DATA_VALIDATION_DIR_NAME: str = "data_validation" # folder name for data validation
@@ -43,6 +57,9 @@ DATA_PREPROCESSING_DIR_NAME: str = "data_preprocessing" # folder name for data p
 DATA_PREPROCESSING_PROCESSED_DATA_DIR: str = "processed_data" # folder name for processed data
 DATA_PREPROCESSING_PROCESSED_OBJECT_DIR: str = "preprocessing_object" # folder name for preprocessor object
 PREPROCESSING_OBJECT_FILE_NAME = "preprocessor.pkl" # Name of the preprocessor object file name
+DATA_PREPROCESSING_REFERENCE_HISTOGRAM_DIR: str = "reference_histogram" # folder name for the training feature histograms
+REFERENCE_HISTOGRAM_FILE_NAME: str = "reference_histogram.npz" # file name of the feature histograms saved with the model
+REFERENCE_HISTOGRAM_BINS: int = 10 # quantile bins per feature (plus one for missing values) used for drift monitoring
 
 # Model Trainer related constant start with MODEL_TRAINER VARIBLEs
 MODEL_TRAINER_DIR_NAME: str = "model_trainer" # folder name for model trainer
@@ -0,0 +1,158 @@
+import os , sys
+from typing import Optional
+
+import pandas as pd
+from bson import json_util
+
+from sensor.exception import SensorException
+
+import logging
+logger = logging.getLogger(__name__)
+
+from sensor.constant.training_pipeline import SCHEMA_FILE_PATH, FEATURE_STORE_MAX_PARTS
+from sensor.utils.main_utils import read_yaml_file, write_yaml_file, get_schema_dtypes, save_dataframe, load_dataframe
+from sensor.data_access.sensor_data import SensorData
+
+
+class FeatureStore:
+    """
+    Persistent local copy of a MongoDB collection, kept in sync with an _id high-water mark.
+    - The data is a folder of part files (Parquet, or CSV when the folder name ends with .csv); the state file
+      holds the watermark (last exported _id), the columns, the row count and the parts it is made of
+    - sync() exports only the documents above the watermark and writes them as a new part, then replaces the
+      state; part files the state does not list (an append interrupted before its state) are deleted first
+    - A full export is done when there is no usable state, or when the number of documents at or below the
+      watermark no longer matches the stored rows (documents deleted, or inserted with an older _id)
+    - Once there are FEATURE_STORE_MAX_PARTS parts they are merged into one
+    - Only documents matching `query` are kept and `exclude_columns` are never exported; the state records
+      both, and changing either re-exports the store
+    Changes to documents already exported are not detected: sync(full_refresh=True) after such backfills.
+    """
+
+    def __init__(self, file_path: str, state_file_path: str, max_parts: int = FEATURE_STORE_MAX_PARTS):
+        self.file_path = file_path
+        self.state_file_path = state_file_path
+        self.max_parts = max_parts
+        self.part_extension = ".csv" if file_path.endswith(".csv") else ".parquet"
+        self._dtypes = get_schema_dtypes(read_yaml_file(SCHEMA_FILE_PATH))
+
+    def _part_path(self, part: str) -> str:
+        return os.path.join(self.file_path, part)
+
+    @staticmethod
+    def _and(query: dict, id_range: dict) -> dict:
+        return {"$and": [query, id_range]} if query else id_range
+
+    def _read_state(self, collection_name: str, database_name: str, export: dict) -> Optional[dict]:
+        if not os.path.exists(self.state_file_path) or not os.path.isdir(self.file_path):
+            return None
+        state = read_yaml_file(self.state_file_path)
+        if (state.get("collection"), state.get("database")) != (collection_name, database_name):
+            logger.info(f"Feature store holds {state.get('database')}.{state.get('collection')}, re-exporting")
+            return None
+        if state.get("export") != export:
+            logger.info("Feature store was exported with other excluded columns or filter, re-exporting")
+            return None
+        if state.get("watermark") is None or not state.get("parts") \
+                or not all(os.path.exists(self._part_path(part)) for part in state["parts"]):
+            return None
+        return state
+
+    def _write_state(self, collection_name: str, database_name: str, export: dict, watermark, columns, rows: int,
+                     parts: list) -> None:
+        # Written next to the final file and renamed, so a crash never leaves a half-written state
+        tmp_file_path = self.state_file_path + ".tmp"
+        write_yaml_file(tmp_file_path, {
+            "collection": collection_name,
+            "database": database_name,
+            "export": export,
+            "watermark": None if watermark is None else json_util.dumps({"_id": watermark}),
+            "columns": [str(column) for column in columns],
+            "rows": rows,
+            "parts": parts,
+        }, replace=True)
+        os.replace(tmp_file_path, self.state_file_path)
+
+    def _write_part(self, dataframe: pd.DataFrame) -> str:
+        # Parts are numbered after every file in the folder, so a new part never replaces a listed one
+        indexes = [int(name.split("-")[1].split(".")[0]) for name in os.listdir(self.file_path) if name.startswith("part-")]
+        part = f"part-{max(indexes, default=-1) + 1:05d}{self.part_extension}"
+        tmp_file_path = self._part_path("tmp-" + part)
+        save_dataframe(tmp_file_path, dataframe, dtypes=self._dtypes)
+        os.replace(tmp_file_path, self._part_path(part))
+        return part
+
+    def _remove_parts(self, keep: list) -> None:
+        for name in os.listdir(self.file_path):
+            if name not in keep:
+                os.remove(self._part_path(name))
+
+    def read(self, parts: list, columns: Optional[list] = None) -> pd.DataFrame:
+        frames = [load_dataframe(self._part_path(part), columns=columns) for part in parts]
+        return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+    def sync(self, sensor_data: SensorData, collection_name: str, database_name: Optional[str] = None,
+             full_refresh: bool = False, partitions: int = 1, query: Optional[dict] = None,
+             exclude_columns: Optional[list] = None) -> pd.DataFrame:
+        """
+        Brings the store up to date with the documents of the collection matching `query`, without the
+        `exclude_columns` fields, and returns its full content.
+        """
+        try:
+            database_name = database_name or sensor_data.mongo_client.database_name
+            collection = sensor_data.get_collection(collection_name, database_name)
+            query = query or {}
+            exclude_columns = sorted(exclude_columns or [])
+            export = {"query": json_util.dumps(query), "exclude_columns": exclude_columns}
+            last_document = next(iter(collection.find(query, {"_id": 1}).sort("_id", -1).limit(1)), None)
+            last_id = None if last_document is None else last_document["_id"]
+
+            state = None if full_refresh else self._read_state(collection_name, database_name, export)
+            if state is not None:
+                watermark = json_util.loads(state["watermark"])["_id"]
+                if collection.count_documents(self._and(query, {"_id": {"$lte": watermark}})) != state["rows"]:
+                    logger.info("Documents at or below the feature store watermark changed, re-exporting")
+                    state = None
+
+            os.makedirs(self.file_path, exist_ok=True)
+            if state is None:
+                return self._export_full(sensor_data, collection_name, database_name, export, last_id,
+                                         partitions, query, exclude_columns)
+
+            # Drop the parts of an append whose state was never written
+            parts = list(state["parts"])
+            self._remove_parts(keep=parts)
+            dataframe = self.read(parts)
+            if last_id is None or last_id <= watermark:
+                logger.info(f"Feature store is up to date: {state['rows']} records")
+                return dataframe
+
+            new_dataframe = sensor_data.export_collection_as_dataframe(
+                collection_name, database_name, columns=state["columns"], partitions=partitions,
+                query=self._and(query, {"_id": {"$gt": watermark, "$lte": last_id}}))
+            dataframe = pd.concat([dataframe, new_dataframe], ignore_index=True)
+            if len(parts) + 1 >= self.max_parts:
+                # Merge everything into one part; the old parts go once the state points to it
+                parts = [self._write_part(dataframe)]
+            else:
+                parts.append(self._write_part(new_dataframe))
+            self._write_state(collection_name, database_name, export, last_id, state["columns"], len(dataframe), parts)
+            self._remove_parts(keep=parts)
+            logger.info(f"Appended {len(new_dataframe)} new records to the feature store "
+                        f"({len(dataframe)} in total, {len(parts)} parts)")
+            return dataframe
+
+        except Exception as e:
+            raise SensorException(e, sys)
+
+    def _export_full(self, sensor_data: SensorData, collection_name: str, database_name: str, export: dict, last_id,
+                     partitions: int, query: dict, exclude_columns: list) -> pd.DataFrame:
+        if last_id is not None:
+            query = self._and(query, {"_id": {"$lte": last_id}})
+        dataframe = sensor_data.export_collection_as_dataframe(collection_name, database_name, partitions=partitions,
+                                                               query=query, exclude_columns=exclude_columns)
+        parts = [self._write_part(dataframe)]
+        self._write_state(collection_name, database_name, export, last_id, dataframe.columns, len(dataframe), parts)
+        self._remove_parts(keep=parts)
+        logger.info(f"Exported {len(dataframe)} records to the feature store {self.file_path}")
+        return dataframe
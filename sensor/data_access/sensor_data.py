@@ -1,15 +1,142 @@
 import os , sys
+import hashlib
+import itertools
+import operator
+import struct
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from typing import Optional
 
+import numpy as np
 import pandas as pd
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
 from sensor.logger import logging
 from sensor.exception import SensorException
 
 import logging
 logger = logging.getLogger(__name__)
 
-from sensor.constant.database import DATABASE_NAME
+from sensor.constant.database import DATABASE_NAME, BULK_LOAD_CHUNK_ROWS, BULK_LOAD_WORKERS, BULK_LOAD_CHECKPOINT_DIR
+from sensor.constant.training_pipeline import (SCHEMA_FILE_PATH, DATA_INGESTION_EXPORT_BATCH_SIZE,
+                                               DATA_INGESTION_NA_TOKENS)
+from sensor.utils.main_utils import parse_numeric_block, read_yaml_file, write_yaml_file
 from sensor.configuration.mongo_db_connection import MongoDBClient
+from sensor.entity.artifact_entity import BulkLoadArtifact
+
+DUPLICATE_KEY_ERROR_CODE = 11000
+
+class _ColumnBuffers:
+    """
+    Preallocated destination of a streamed export: one float64 Fortran-order buffer for the numeric columns,
+    which the DataFrame wraps without a copy, and one object buffer per text column.
+    - fill() parses a chunk of documents into a row range; disjoint ranges can be filled from several threads
+    - Cells of numeric columns holding other text are kept aside, and to_frame() turns those columns into
+      object columns holding the parsed numbers and the original text
+    """
+
+    def __init__(self, columns: list, text_columns: set, capacity: int):
+        self.columns = list(columns)
+        self.text_columns = text_columns
+        self.text_positions = [i for i, name in enumerate(self.columns) if name in text_columns]
+        self.numeric_positions = [i for i, name in enumerate(self.columns) if name not in text_columns]
+        self.numeric = np.empty((capacity, len(self.numeric_positions)), dtype=np.float64, order="F")
+        self.text = {position: np.empty(capacity, dtype=object) for position in self.text_positions}
+        self.stray_text = []  # (numeric column, rows, original values); list.append is thread-safe
+        # One getter pulls every projected field of a document as a tuple
+        self._getter = operator.itemgetter(*self.columns) if len(self.columns) > 1 else \
+            (lambda document: (document[self.columns[0]],))
+
+    @property
+    def capacity(self) -> int:
+        return len(self.numeric)
+
+    def grow(self, capacity: int) -> None:
+        self.numeric = _resize(self.numeric, capacity)
+        self.text = {position: _resize(buffer, capacity) for position, buffer in self.text.items()}
+
+    def fill(self, documents: list, offset: int) -> int:
+        """
+        Parses `documents` into rows offset.. of the buffers and returns the number of rows written.
+        """
+        try:
+            block = np.array([self._getter(document) for document in documents], dtype=object)
+        except KeyError:
+            # Some document lacks a field: read it as missing
+            block = np.array([tuple(document.get(name) for name in self.columns) for document in documents],
+                             dtype=object)
+        end = offset + len(block)
+
+        parsed, unparsed = parse_numeric_block(block[:, self.numeric_positions], DATA_INGESTION_NA_TOKENS)
+        self.numeric[offset:end] = parsed
+        if unparsed is not None:
+            for i in np.flatnonzero(unparsed.any(axis=0)):
+                rows = np.flatnonzero(unparsed[:, i])
+                self.stray_text.append((i, rows + offset, block[rows, self.numeric_positions[i]]))
+        for position in self.text_positions:
+            self.text[position][offset:end] = block[:, position]
+        return len(block)
+
+    def to_frame(self, rows) -> pd.DataFrame:
+        """
+        DataFrame in the original column order; `rows` is the number of rows filled from the top,
+        or the positions of the filled rows when the buffers have gaps.
+        """
+        select = (lambda values: values[:rows]) if isinstance(rows, int) else (lambda values: values[rows])
+
+        text = dict(self.text)
+        for i, stray_rows, values in self.stray_text:
+            position = self.numeric_positions[i]
+            if position not in text:
+                logger.warning(f"Column {self.columns[position]} holds non-numeric values, exporting it as text")
+                text[position] = self.numeric[:, i].astype(object)
+            text[position][stray_rows] = values
+
+        numeric = self.numeric
+        kept = [i for i, position in enumerate(self.numeric_positions) if position not in text]
+        if len(kept) < numeric.shape[1]:
+            numeric = numeric[:, kept]
+        if not isinstance(rows, int) or rows < len(numeric):
+            numeric = select(numeric)
+        dataframe = pd.DataFrame(np.asfortranarray(numeric), copy=False,
+                                 columns=[self.columns[self.numeric_positions[i]] for i in kept])
+
+        # Object columns go back to their position in the collection's field order
+        for position in sorted(text):
+            dataframe.insert(position, self.columns[position], select(text[position]))
+        return dataframe
+
+
+def _resize(buffer: np.ndarray, rows: int) -> np.ndarray:
+    resized = np.empty((rows,) + buffer.shape[1:], dtype=buffer.dtype, order="F")
+    copied = min(rows, len(buffer))
+    resized[:copied] = buffer[:copied]
+    return resized
+
+
+def _typed_column(values: pd.Series) -> list:
+    # Python values BSON can encode: missing -> None, integral numbers -> int, other numbers -> float, text as is
+    if pd.api.types.is_float_dtype(values.dtype):
+        array = values.to_numpy(dtype=np.float64)
+        typed = array.astype(object)
+        integral = np.isfinite(array) & (np.floor(array) == array) & (np.abs(array) < 2 ** 53)
+        typed[integral] = array[integral].astype(np.int64).astype(object)
+        typed[np.isnan(array)] = None
+        return typed.tolist()
+    if pd.api.types.is_numeric_dtype(values.dtype):
+        return values.tolist()
+    return values.astype(object).where(values.notna(), None).tolist()
+
+
+def _read_chunks(cursor, batch_size: int):
+    # Lists of at most batch_size documents; only one chunk is held at a time
+    cursor = cursor.batch_size(batch_size)
+    while True:
+        documents = list(itertools.islice(cursor, batch_size))
+        if not documents:
+            return
+        yield documents
+
 
 class SensorData:
     """
@@ -21,40 +148,252 @@ class SensorData:
         except Exception as e:
             raise SensorException(e, sys)
 
-    def export_collection_as_dataframe(self, collection_name: str, database_name: Optional[str] = None) -> pd.DataFrame:
-        try:
-            # Determine which database to use
-            if database_name is None:
-                collection = self.mongo_client.database[collection_name]
-            else:
-                collection = self.mongo_client.client[database_name][collection_name]
+    def get_collection(self, collection_name: str, database_name: Optional[str] = None):
+        if database_name is None:
+            return self.mongo_client.database[collection_name]
+        return self.mongo_client.client[database_name][collection_name]
+
+    @staticmethod
+    def _schema_text_columns() -> set:
+        # Columns the schema does not declare numerical (e.g. the 'class' label) are exported as text
+        schema = read_yaml_file(SCHEMA_FILE_PATH)
+        return {name for column in schema["columns"] for name, dtype in column.items() if dtype not in ("int", "float")}
 
-            # Convert MongoDB cursor to list and then to DataFrame
-            df = pd.DataFrame(list(collection.find()))
+    def export_collection_as_dataframe(self, collection_name: str, database_name: Optional[str] = None,
+                                       columns: Optional[list] = None,
+                                       batch_size: int = DATA_INGESTION_EXPORT_BATCH_SIZE,
+                                       partitions: int = 1, query: Optional[dict] = None,
+                                       exclude_columns: Optional[list] = None,
+                                       include_id: bool = False) -> pd.DataFrame:
+        """
+        Streams a collection into a DataFrame without materializing its documents.
+        - Only documents matching `query` are read, and only `columns` are projected
+          (default: the fields of the first matching document), never `exclude_columns`, and `_id` only with
+          `include_id` (then the first column, kept as object)
+        - Cursors are read `batch_size` documents at a time; each chunk is parsed into preallocated
+          float64 column buffers, with 'na' read as NaN; schema text columns stay object columns
+        - With `partitions` > 1 the collection is split into _id ranges read concurrently, one cursor per
+          thread over the shared connection pool, each filling its own slice of the buffers (rows in _id order)
+        Peak memory is the numeric matrix plus one chunk of documents per cursor.
+        """
+        try:
+            collection = self.get_collection(collection_name, database_name)
+            exclude_columns = set(exclude_columns or [])
+            if columns is None:
+                first_document = collection.find_one(query or {}, {"_id": 0, **{name: 0 for name in exclude_columns}})
+                if first_document is None:
+                    logger.info(f"Exported 0 records from {collection_name}")
+                    return pd.DataFrame()
+                columns = list(first_document)
+            columns = [name for name in columns if name not in exclude_columns]
+            text_columns = self._schema_text_columns()
+            if include_id:
+                columns = ["_id", *(name for name in columns if name != "_id")]
+                text_columns = text_columns | {"_id"}
+            projection = {**{name: 1 for name in columns}, "_id": int(include_id)}
 
-            if not df.empty and "_id" in df.columns:
-                df.drop(columns=["_id"], inplace=True)
+            if partitions > 1:
+                dataframe = self._export_partitioned(collection, query or {}, columns, text_columns, projection,
+                                                     batch_size, partitions)
+            else:
+                # A filtered export counts its documents (an index count for _id ranges) instead of estimating
+                expected = collection.count_documents(query) if query else collection.estimated_document_count()
+                buffers = _ColumnBuffers(columns, text_columns, max(expected, 1))
+                rows = 0
+                for documents in _read_chunks(collection.find(query or {}, projection), batch_size):
+                    if rows + len(documents) > buffers.capacity:
+                        # The count was an estimate: grow geometrically
+                        buffers.grow(max(buffers.capacity * 2, rows + len(documents)))
+                    rows += buffers.fill(documents, rows)
+                dataframe = buffers.to_frame(rows)
 
-            logger.info(f"Exported {len(df)} records from {collection_name}")
-            return df
+            logger.info(f"Exported {len(dataframe)} records from {collection_name}")
+            return dataframe
 
         except Exception as e:
             raise SensorException(e, sys)
 
-    def dump_csv_file_to_mongodb_collection(self, file_path: str, collection_name: str, database_name: Optional[str] = None):
+    @staticmethod
+    def _plan_id_ranges(collection, query: dict, partitions: int, batch_size: int) -> list:
+        """
+        Splits the documents matching `query` into at most `partitions` _id ranges of about the same size,
+        each at least one batch, using only the _id index. Returns (query filter, first row, rows) per range.
+        """
+        total = collection.count_documents(query)
+        partitions = max(1, min(partitions, total // batch_size))
+        if total == 0:
+            return []
+        offsets = [total * k // partitions for k in range(partitions)] + [total]
+
+        def id_at(skip: int, direction: int = 1):
+            return next(iter(collection.find(query, {"_id": 1}).sort("_id", direction).skip(skip).limit(1)))["_id"]
+
+        bounds = [id_at(offset) for offset in offsets[:-1]]
+        # The last range stops at the current last _id: documents inserted meanwhile are not exported
+        last_id = id_at(0, direction=-1)
+        ranges = []
+        for k, start in enumerate(bounds):
+            stop = {"$lt": bounds[k + 1]} if k + 1 < len(bounds) else {"$lte": last_id}
+            id_range = {"_id": {"$gte": start, **stop}}
+            ranges.append(({"$and": [query, id_range]} if query else id_range, offsets[k], offsets[k + 1] - offsets[k]))
+        return ranges
+
+    def _export_partitioned(self, collection, query: dict, columns: list, text_columns: set, projection: dict,
+                            batch_size: int, partitions: int) -> pd.DataFrame:
+        ranges = self._plan_id_ranges(collection, query, partitions, batch_size)
+        buffers = _ColumnBuffers(columns, text_columns, sum(rows for _, _, rows in ranges))
+
+        def export_range(range_query: dict, offset: int, rows: int):
+            # Fills rows offset..offset + rows; documents beyond the planned count (inserted inside
+            # the range after planning) go to an overflow buffer of their own
+            filled, overflow, overflow_rows = 0, None, 0
+            cursor = collection.find(range_query, dict(projection)).sort("_id", 1)
+            for documents in _read_chunks(cursor, batch_size):
+                room = rows - filled
+                if room > 0:
+                    filled += buffers.fill(documents[:room], offset + filled)
+                    documents = documents[room:]
+                if documents:
+                    if overflow is None:
+                        overflow = _ColumnBuffers(columns, text_columns, len(documents))
+                    if overflow_rows + len(documents) > overflow.capacity:
+                        overflow.grow(max(overflow.capacity * 2, overflow_rows + len(documents)))
+                    overflow_rows += overflow.fill(documents, overflow_rows)
+            return filled, None if overflow is None else overflow.to_frame(overflow_rows)
+
+        with ThreadPoolExecutor(max_workers=max(len(ranges), 1)) as executor:
+            results = list(executor.map(lambda planned: export_range(*planned), ranges))
+        logger.info(f"Exported {len(ranges)} _id ranges concurrently")
+
+        if all(filled == rows and overflow is None for (_, _, rows), (filled, overflow) in zip(ranges, results)):
+            return buffers.to_frame(buffers.capacity)
+
+        # The collection changed during the export: keep the rows actually read, still in range order
+        positions = np.concatenate([np.arange(offset, offset + filled, dtype=np.int64)
+                                    for (_, offset, _), (filled, _) in zip(ranges, results)] or [np.empty(0, np.int64)])
+        dataframe = buffers.to_frame(positions)
+        if all(overflow is None for _, overflow in results):
+            return dataframe
+        pieces, start = [], 0
+        for filled, overflow in results:
+            pieces.append(dataframe.iloc[start:start + filled])
+            start += filled
+            if overflow is not None:
+                pieces.append(overflow)
+        return pd.concat(pieces, ignore_index=True)
+
+    @staticmethod
+    def _read_checkpoint(checkpoint_file_path: str, file_path: str, chunk_rows: int) -> Optional[dict]:
+        # A checkpoint is only resumed for the same file content and chunking, otherwise the load restarts
+        if not os.path.exists(checkpoint_file_path):
+            return None
+        checkpoint = read_yaml_file(checkpoint_file_path)
+        file_stat = os.stat(file_path)
+        if (checkpoint.get("file_size"), checkpoint.get("file_mtime_ns"), checkpoint.get("chunk_rows")) != \
+                (file_stat.st_size, file_stat.st_mtime_ns, chunk_rows):
+            logger.warning(f"{file_path} or the chunk size changed since checkpoint {checkpoint_file_path}, "
+                           f"loading from the start")
+            return None
+        return checkpoint
+
+    @staticmethod
+    def _write_checkpoint(checkpoint_file_path: str, checkpoint: dict) -> None:
+        tmp_file_path = checkpoint_file_path + ".tmp"
+        write_yaml_file(tmp_file_path, checkpoint, replace=True)
+        os.replace(tmp_file_path, checkpoint_file_path)
+
+    @staticmethod
+    def _load_chunk(collection, chunk: pd.DataFrame, object_ids: list) -> tuple:
+        """
+        Inserts one chunk with an unordered insert_many; returns (documents inserted, duplicates skipped).
+        """
+        names = ["_id", *(str(column) for column in chunk.columns)]
+        values = [_typed_column(chunk[column]) for column in chunk.columns]
+        documents = [dict(zip(names, row)) for row in zip(object_ids, *values)]
+        del values
         try:
-            df = pd.read_csv(file_path)
-            df.reset_index(drop=True, inplace=True)
-            records = df.to_dict(orient="records")
+            collection.insert_many(documents, ordered=False)
+            return len(documents), 0
+        except BulkWriteError as e:
+            # A chunk resent after a failure: the documents it already wrote collide on their deterministic _id
+            errors = e.details.get("writeErrors", [])
+            if any(error.get("code") != DUPLICATE_KEY_ERROR_CODE for error in errors):
+                raise
+            return e.details.get("nInserted", len(documents) - len(errors)), len(errors)
 
-            if database_name is None:
-                collection = self.mongo_client.database[collection_name]
-            else:
-                collection = self.mongo_client.client[database_name][collection_name]
+    def dump_csv_file_to_mongodb_collection(self, file_path: str, collection_name: str, database_name: Optional[str] = None,
+                                            chunk_rows: int = BULK_LOAD_CHUNK_ROWS, workers: int = BULK_LOAD_WORKERS,
+                                            checkpoint_file_path: Optional[str] = None) -> BulkLoadArtifact:
+        """
+        Loads a CSV file into a collection, resumably:
+        - The file is read `chunk_rows` rows at a time and every chunk becomes typed documents
+          ('na' -> null, integral numbers -> int, other numbers -> float)
+        - `workers` threads send the chunks as unordered insert_many calls; at most one chunk per worker is
+          in flight, so memory stays bounded by `workers` chunks whatever the file size
+        - Every document gets a deterministic ObjectId (load start time, load key, row number), so ids grow
+          with the row order and a chunk sent twice only produces duplicate key errors, which are skipped
+        - Finished chunks are recorded in a checkpoint file; running the same load again after a failure
+          skips them, and a load that already completed is not repeated
+        """
+        try:
+            start_time = time.perf_counter()
+            database_name = database_name or self.mongo_client.database_name
+            collection = self.get_collection(collection_name, database_name)
+            load_key = f"{os.path.abspath(file_path)}:{database_name}:{collection_name}"
+            key_digest = hashlib.sha1(load_key.encode()).digest()
+            if checkpoint_file_path is None:
+                checkpoint_file_path = os.path.join(BULK_LOAD_CHECKPOINT_DIR,
+                                                    f"{database_name}.{collection_name}.{key_digest.hex()[:12]}.yaml")
+
+            checkpoint = self._read_checkpoint(checkpoint_file_path, file_path, chunk_rows)
+            if checkpoint is None:
+                file_stat = os.stat(file_path)
+                checkpoint = {"file_path": os.path.abspath(file_path), "file_size": file_stat.st_size,
+                              "file_mtime_ns": file_stat.st_mtime_ns, "chunk_rows": chunk_rows,
+                              "load_time": int(time.time()), "completed_chunks": [], "done": False}
+            elif checkpoint["done"]:
+                logger.info(f"{file_path} was already loaded into {collection_name} ({checkpoint_file_path})")
+                return BulkLoadArtifact(file_path, collection_name, 0, 0, len(checkpoint["completed_chunks"]), 0.0, 0.0)
+
+            completed = set(checkpoint["completed_chunks"])
+            chunks_resumed = len(completed)
+            if chunks_resumed:
+                logger.info(f"Resuming the load of {file_path}: {chunks_resumed} chunks already loaded")
+            id_prefix = struct.pack(">I", checkpoint["load_time"]) + key_digest[:3]
+            inserted = skipped = 0
+            in_flight = {}
 
-            if records:
-                collection.insert_many(records)
-                logger.info(f"Dumped {len(records)} records into {collection_name}")
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                chunks = pd.read_csv(file_path, chunksize=chunk_rows, na_values="na")
+                for index, chunk in enumerate(itertools.chain(chunks, [None])):
+                    # Collect finished chunks: all of them after the last one, or one as soon as every worker is busy
+                    while in_flight and (chunk is None or len(in_flight) >= workers):
+                        finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            chunk_inserted, chunk_skipped = future.result()
+                            inserted, skipped = inserted + chunk_inserted, skipped + chunk_skipped
+                            completed.add(in_flight.pop(future))
+                        checkpoint["completed_chunks"] = sorted(completed)
+                        self._write_checkpoint(checkpoint_file_path, checkpoint)
+                    if chunk is None:
+                        break
+                    if index in completed:
+                        continue
+                    first_row = index * chunk_rows
+                    object_ids = [ObjectId(id_prefix + row.to_bytes(5, "big"))
+                                  for row in range(first_row, first_row + len(chunk))]
+                    in_flight[executor.submit(self._load_chunk, collection, chunk, object_ids)] = index
+                    del chunk
+
+            checkpoint["done"] = True
+            self._write_checkpoint(checkpoint_file_path, checkpoint)
+            seconds = time.perf_counter() - start_time
+            artifact = BulkLoadArtifact(file_path=file_path, collection_name=collection_name,
+                                        documents_inserted=inserted, documents_skipped=skipped,
+                                        chunks_resumed=chunks_resumed, seconds=round(seconds, 3),
+                                        documents_per_second=round(inserted / seconds, 1) if seconds else 0.0)
+            logger.info(f"Dumped {inserted} records into {collection_name}: {artifact}")
+            return artifact
 
         except Exception as e:
-            raise SensorException(e, sys)
\ No newline at end of file
+            raise SensorException(e, sys)
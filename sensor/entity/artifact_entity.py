@@ -1,10 +1,13 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 @dataclass
 
 class DataIngestionArtifact: # significance - holds file paths for training and testing datasets
     training_file_path: str
     test_file_path: str
+    # In-memory copies handed to the next stage while the files are written in the background (None: read the files)
+    train_dataframe: object = field(default=None, repr=False)
+    test_dataframe: object = field(default=None, repr=False)
 
 @dataclass
 class DataValidationArtifact: # significance - holds file paths and status for data validation results
@@ -14,12 +17,19 @@ class DataValidationArtifact: # significance - holds file paths and status for d
     invalid_train_file_path: str
     invalid_test_file_path: str
     drift_report_file_path: str
+    valid_train_dataframe: object = field(default=None, repr=False)
+    valid_test_dataframe: object = field(default=None, repr=False)
 
 @dataclass
 class DataPreprocessingArtifact: # significance - holds file paths for preprocessed data and preprocessing object
     preprocessed_object_file_path: str
     processed_train_file_path: str
     processed_test_file_path: str
+    reference_histogram_file_path: str = None # raw training feature histograms for drift monitoring
+    train_array: object = field(default=None, repr=False)
+    test_array: object = field(default=None, repr=False)
+    preprocessor: object = field(default=None, repr=False)
+    reference_histogram: object = field(default=None, repr=False)
 
 @dataclass
 class ClassificationMetricArtifact:
@@ -32,6 +42,8 @@ class ModelTrainerArtifact: # significance - holds file path for the trained mod
     trained_model_file_path: str
     train_metric_artifact: ClassificationMetricArtifact
     test_metric_artifact: ClassificationMetricArtifact
+    trained_model_artifact_dir: str = None # native model folder, None when the model could not be exported
+    trained_model: object = field(default=None, repr=False)
 
 @dataclass
 class ModelEvaluationArtifact: # significance - holds evaluation status and report file path
@@ -45,4 +57,26 @@ class ModelEvaluationArtifact: # significance - holds evaluation status and repo
 @dataclass
 class ModelPusherArtifact: # significance - holds file paths for the pushed model and its directory
     saved_model_path: str
-    model_file_path: str
\ No newline at end of file
+    model_file_path: str
+    saved_model_artifact_dir: str = None
+
+@dataclass
+class BatchPredictionArtifact: # significance - summary of one offline bulk scoring run
+    model_id: int
+    rows_scored: int
+    rows_rejected: int
+    partitions: int
+    workers: int
+    seconds: float
+    rows_per_second: float
+    output: str
+
+@dataclass
+class BulkLoadArtifact: # significance - summary of one CSV load into MongoDB
+    file_path: str
+    collection_name: str
+    documents_inserted: int
+    documents_skipped: int
+    chunks_resumed: int
+    seconds: float
+    documents_per_second: float
@@ -2,11 +2,13 @@ from datetime import datetime
 import os , sys
 
 from sensor.constant.training_pipeline import PIPELINE_NAME , ARTIFACT_DIR , DATA_INGESTION_DIR_NAME , FILE_NAME , DATA_INGESTION_FEATURE_STORE_DIR , DATA_INGESTION_INGESTED_DIR , TEST_FILE_NAME , DATA_INGESTION_COLLECTION_NAME , TRAIN_FILE_NAME , DATA_INGESTION_TRAIN_TEST_SPLIT_RATION
+from sensor.constant.training_pipeline import FEATURE_STORE_DIR , FEATURE_STORE_STATE_FILE_NAME , DATA_INGESTION_INCREMENTAL
 from sensor.constant.training_pipeline import DATA_VALIDATION_DIR_NAME , DATA_VALIDATION_VALID_DIR , DATA_VALIDATION_INVALID_DIR , DATA_VALIDATION_DRIFT_REPORT_DIR , DATA_VALIDATION_DRIFT_REPORT_FILE_NAME
 from sensor.constant.training_pipeline import DATA_PREPROCESSING_DIR_NAME , DATA_PREPROCESSING_PROCESSED_DATA_DIR , DATA_PREPROCESSING_PROCESSED_OBJECT_DIR , PREPROCESSING_OBJECT_FILE_NAME
+from sensor.constant.training_pipeline import DATA_PREPROCESSING_REFERENCE_HISTOGRAM_DIR , REFERENCE_HISTOGRAM_FILE_NAME , REFERENCE_HISTOGRAM_BINS
 from sensor.constant.training_pipeline import MODEL_TRAINER_DIR_NAME , MODEL_TRAINER_TRAINED_MODEL_DIR , MODEL_TRAINER_TRAINED_MODEL_NAME , MODEL_TRAINER_EXPECTED_SCORE , MODEL_TRAINER_OVERFITTING_UNDERFITTING_THRESHOLD
 from sensor.constant.training_pipeline import MODEL_EVALUATION_DIR_NAME , MODEL_EVALUATION_REPORT_NAME , MODEL_EVALUATION_THRESHOLD_SCORE
-from sensor.constant.training_pipeline import MODEL_PUSHER_DIR_NAME , MODEL_PUSHER_SAVED_MODEL_DIR, MODEL_FILE_NAME
+from sensor.constant.training_pipeline import MODEL_PUSHER_DIR_NAME , MODEL_PUSHER_SAVED_MODEL_DIR, MODEL_FILE_NAME, SAVED_MODEL_POINTER_FILE_NAME, MODEL_ARTIFACT_DIR_NAME
 
 from sensor.exception import SensorException
 
@@ -25,7 +27,11 @@ class DataIngestionConfig:
     try:
         def __init__(self , training_pipeline_config : TrainingPipelineConfig):
             self.data_ingestion_dir = os.path.join(training_pipeline_config.artifact_dir , DATA_INGESTION_DIR_NAME)
-            self.feature_store_file_path = os.path.join(self.data_ingestion_dir , DATA_INGESTION_FEATURE_STORE_DIR , FILE_NAME)
+            # The feature store lives outside the run folder so later runs only append new documents to it;
+            # with Parquet it is a folder of part files
+            self.feature_store_file_path = os.path.join(FEATURE_STORE_DIR , FILE_NAME)
+            self.feature_store_state_file_path = os.path.join(FEATURE_STORE_DIR , FEATURE_STORE_STATE_FILE_NAME)
+            self.incremental = DATA_INGESTION_INCREMENTAL
             self.train_file_path = os.path.join(self.data_ingestion_dir , DATA_INGESTION_INGESTED_DIR , TRAIN_FILE_NAME)
             self.test_file_path = os.path.join(self.data_ingestion_dir , DATA_INGESTION_INGESTED_DIR , TEST_FILE_NAME)
             self.test_size = DATA_INGESTION_TRAIN_TEST_SPLIT_RATION
@@ -57,10 +63,12 @@ class DataPreprocessingConfig:
         def __init__(self , training_pipeline_config : TrainingPipelineConfig):
             self.data_preprocessing_dir = os.path.join(training_pipeline_config.artifact_dir , DATA_PREPROCESSING_DIR_NAME)
             self.processed_data_dir =  os.path.join(self.data_preprocessing_dir , DATA_PREPROCESSING_PROCESSED_DATA_DIR)
-            self.processed_train_file_path = os.path.join(self.processed_data_dir , TRAIN_FILE_NAME.replace(".csv" , ".npy"))
-            self.processed_test_file_path = os.path.join(self.processed_data_dir , TEST_FILE_NAME.replace(".csv" , ".npy"))
+            self.processed_train_file_path = os.path.join(self.processed_data_dir , os.path.splitext(TRAIN_FILE_NAME)[0] + ".npy")
+            self.processed_test_file_path = os.path.join(self.processed_data_dir , os.path.splitext(TEST_FILE_NAME)[0] + ".npy")
             self.preprocessed_object_dir = os.path.join(self.data_preprocessing_dir , DATA_PREPROCESSING_PROCESSED_OBJECT_DIR)
             self.preprocessed_object_file_path = os.path.join(self.preprocessed_object_dir , PREPROCESSING_OBJECT_FILE_NAME)
+            self.reference_histogram_file_path = os.path.join(self.data_preprocessing_dir , DATA_PREPROCESSING_REFERENCE_HISTOGRAM_DIR , REFERENCE_HISTOGRAM_FILE_NAME)
+            self.reference_histogram_bins = REFERENCE_HISTOGRAM_BINS
 
     except Exception as e:
         raise SensorException(e , sys)
@@ -71,6 +79,7 @@ class ModelTrainerConfig:
             self.model_trainer_dir = os.path.join(training_pipeline_config.artifact_dir , MODEL_TRAINER_DIR_NAME)
             self.trained_model_dir = os.path.join(self.model_trainer_dir , MODEL_TRAINER_TRAINED_MODEL_DIR)
             self.trained_model_file_path = os.path.join(self.trained_model_dir , MODEL_TRAINER_TRAINED_MODEL_NAME)
+            self.trained_model_artifact_dir = os.path.join(self.trained_model_dir , MODEL_ARTIFACT_DIR_NAME)
             self.expected_accuracy = MODEL_TRAINER_EXPECTED_SCORE
             self.overfitting_underfitting_threshold = MODEL_TRAINER_OVERFITTING_UNDERFITTING_THRESHOLD
 
@@ -93,13 +102,17 @@ class ModelPusherConfig:
             # 1. Location in ARTIFACT folder (History)
             self.model_pusher_dir = os.path.join(training_pipeline_config.artifact_dir, MODEL_PUSHER_DIR_NAME)
             self.model_file_path = os.path.join(self.model_pusher_dir, MODEL_FILE_NAME)
+            self.model_artifact_dir = os.path.join(self.model_pusher_dir, MODEL_ARTIFACT_DIR_NAME)
 
             # 2. Location in PRODUCTION folder (For the Resolver)
             timestamp = round(datetime.now().timestamp())
+            self.saved_model_timestamp = timestamp
             self.saved_model_path = os.path.join(
                 MODEL_PUSHER_SAVED_MODEL_DIR, 
                 f"{timestamp}", 
                 MODEL_FILE_NAME
             )
+            self.saved_model_artifact_dir = os.path.join(os.path.dirname(self.saved_model_path), MODEL_ARTIFACT_DIR_NAME)
+            self.saved_model_pointer_file_path = os.path.join(MODEL_PUSHER_SAVED_MODEL_DIR, SAVED_MODEL_POINTER_FILE_NAME)
         except Exception as e:
             raise SensorException(e, sys)
\ No newline at end of file
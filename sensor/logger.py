@@ -1,15 +1,148 @@
 import logging
+import logging.handlers
 from datetime import datetime
 import os , sys
+import json
+import queue
+import atexit
+import threading
+import time
+
+from sensor.constant.application import (LOG_QUEUE_MAX_SIZE,
+                                         LOG_JSON_FORMAT,
+                                         LOG_RATE_LIMIT_MAX_RECORDS,
+                                         LOG_RATE_LIMIT_INTERVAL_SECONDS)
 
 LOG_FILE_NAME = f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"
 LOG_FILE_PATH = logs_path = os.path.join(os.getcwd() , "logs" , LOG_FILE_NAME)
-os.makedirs(os.path.dirname(logs_path) , exist_ok = True)
+LOG_TEXT_FORMAT = "[%(asctime)s] %(lineno)s %(name)s - %(levelname)s - %(message)s"
+
+
+class LazyFileHandler(logging.FileHandler):
+    """
+    FileHandler that creates the log folder and file on the first record instead of at import time.
+    """
+
+    def __init__(self, filename, mode="a", encoding=None):
+        super().__init__(filename, mode=mode, encoding=encoding, delay=True)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename) , exist_ok = True)
+        return super()._open()
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line with the same fields as the text format, plus thread and process.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "line": record.lineno,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+            "process": record.process,
+        }
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            entry["suppressed"] = suppressed
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets each call site (file and line) emit at most `max_records` INFO/DEBUG records per `interval_seconds`.
+    The next record that gets through reports how many were suppressed in between.
+    WARNING and above always pass.
+    """
+
+    def __init__(self, max_records: int = LOG_RATE_LIMIT_MAX_RECORDS,
+                 interval_seconds: float = LOG_RATE_LIMIT_INTERVAL_SECONDS):
+        super().__init__()
+        self.max_records = max_records
+        self.interval_seconds = interval_seconds
+        self.suppressed_total = 0
+        self._windows = {}  # (pathname, lineno) -> [window start, records in window, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval_seconds:
+                suppressed = window[2] if window is not None else 0
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+            if window[1] < self.max_records:
+                window[1] += 1
+                return True
+            window[2] += 1
+            self.suppressed_total += 1
+            return False
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to a bounded queue drained by a background QueueListener.
+    The calling thread never touches the disk and never blocks: when the queue is full the record is dropped.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped_total = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only resolve what cannot cross threads safely (args, live exception); formatting happens on the listener
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.stack_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped_total += 1
+
+
+def _build_file_handler() -> logging.Handler:
+    file_handler = LazyFileHandler(LOG_FILE_PATH)
+    file_handler.setFormatter(JsonFormatter() if LOG_JSON_FORMAT else logging.Formatter(LOG_TEXT_FORMAT))
+    return file_handler
+
+
+log_queue = queue.Queue(maxsize=LOG_QUEUE_MAX_SIZE)
+rate_limit_filter = RateLimitFilter()
+queue_handler = DroppingQueueHandler(log_queue)
+queue_handler.addFilter(rate_limit_filter)
+queue_listener = logging.handlers.QueueListener(log_queue, _build_file_handler(), respect_handler_level=True)
+queue_listener.start()
+# Flush what is still queued when the process exits
+atexit.register(queue_listener.stop)
+
+from sensor.utils.metrics import LOG_RECORDS_DROPPED, LOG_RECORDS_SUPPRESSED
+LOG_RECORDS_DROPPED.set_function(lambda: queue_handler.dropped_total)
+LOG_RECORDS_SUPPRESSED.set_function(lambda: rate_limit_filter.suppressed_total)
 
 logging.basicConfig(
 
-    filename = LOG_FILE_PATH,
-    format = "[%(asctime)s] %(lineno)s %(name)s - %(levelname)s - %(message)s",
+    handlers = [queue_handler],
     level = logging.INFO
 
-)
\ No newline at end of file
+)
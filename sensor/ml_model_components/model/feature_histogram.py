@@ -0,0 +1,90 @@
+# feature_histogram.py
+
+import warnings
+
+import numpy as np
+
+# Added to every bin proportion so empty bins do not make PSI infinite
+PSI_EPSILON = 1e-4
+
+
+class FeatureHistogram:
+    """
+    Fixed-size per-feature histogram used as a streaming drift sketch.
+    - Bin edges are the training quantiles of each feature, so every reference bin holds about the same share
+    - Every feature has `bins` value bins plus one bin for missing values: O(1) memory per feature
+    - update() bins a whole matrix with `bins - 1` vectorized comparisons and column counts, no per-row work
+    Edges are in raw feature units, so served rows are binned before imputation and scaling.
+    """
+
+    def __init__(self, feature_names, edges: np.ndarray, counts: np.ndarray = None):
+        self.feature_names = np.asarray(feature_names, dtype=str)
+        self.edges = np.ascontiguousarray(edges, dtype=np.float64)  # (features, bins - 1) inner edges
+        n_features, n_inner_edges = self.edges.shape
+        self.bins = n_inner_edges + 1
+        self.counts = np.zeros((n_features, self.bins + 1), dtype=np.float64) if counts is None \
+            else np.asarray(counts, dtype=np.float64)
+
+    @classmethod
+    def fit(cls, matrix: np.ndarray, feature_names, bins: int) -> "FeatureHistogram":
+        """
+        Reference histogram of a raw training matrix (NaN for missing values).
+        """
+        matrix = np.asarray(matrix, dtype=np.float64)
+        edges = np.full((matrix.shape[1], bins - 1), np.inf)
+        if len(matrix):
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)  # all-missing features
+                edges = np.nanquantile(matrix, np.linspace(0, 1, bins + 1)[1:-1], axis=0).T
+        # All-missing features get +inf edges: any value they ever receive lands in the first bin
+        edges = np.where(np.isnan(edges), np.inf, edges)
+        histogram = cls(feature_names, edges)
+        histogram.update(matrix)
+        return histogram
+
+    def empty_like(self) -> "FeatureHistogram":
+        return FeatureHistogram(self.feature_names, self.edges)
+
+    def bin_counts(self, matrix: np.ndarray) -> np.ndarray:
+        """
+        (features, bins + 1) counts of a matrix aligned to feature_names; the last bin counts missing values.
+        """
+        # at_least[:, k] = values >= the k-th lower bin edge (the first is -inf); edges are sorted,
+        # so each bin is the difference of two neighbouring columns
+        at_least = np.zeros((matrix.shape[1], self.bins + 1), dtype=np.float64)
+        mask = np.empty(matrix.shape, dtype=bool)  # reused by every pass; summed as uint8, faster than bools
+        missing = np.isnan(matrix, out=mask).view(np.uint8).sum(axis=0, dtype=np.int64)
+        at_least[:, 0] = matrix.shape[0] - missing
+        for edge in range(self.edges.shape[1]):
+            np.greater_equal(matrix, self.edges[:, edge], out=mask)
+            at_least[:, edge + 1] = mask.view(np.uint8).sum(axis=0, dtype=np.int64)
+        counts = at_least[:, :-1] - at_least[:, 1:]
+        return np.column_stack((counts, missing))
+
+    def update(self, matrix: np.ndarray) -> None:
+        self.counts += self.bin_counts(matrix)
+
+    @property
+    def total(self) -> float:
+        # Every row adds one count per feature
+        return float(self.counts[0].sum()) if len(self.counts) else 0.0
+
+    def proportions(self) -> np.ndarray:
+        totals = self.counts.sum(axis=1, keepdims=True)
+        return np.divide(self.counts, totals, out=np.zeros_like(self.counts), where=totals > 0)
+
+    def psi(self, reference: "FeatureHistogram") -> np.ndarray:
+        """
+        Population stability index of every feature of this histogram against `reference` (same edges).
+        """
+        observed = self.proportions() + PSI_EPSILON
+        expected = reference.proportions() + PSI_EPSILON
+        return ((observed - expected) * np.log(observed / expected)).sum(axis=1)
+
+    def save(self, file_path: str) -> None:
+        np.savez(file_path, feature_names=self.feature_names, edges=self.edges, counts=self.counts)
+
+    @classmethod
+    def load(cls, file_path: str) -> "FeatureHistogram":
+        with np.load(file_path, allow_pickle=False) as data:
+            return cls(data["feature_names"], data["edges"], data["counts"])
@@ -0,0 +1,151 @@
+# fused_model.py
+
+import numpy as np
+import pandas as pd
+
+_NOT_CACHED = object()
+
+
+class FusedSensorModel:
+    """
+    Compiled inference path for a SensorModel whose preprocessor is
+    Pipeline([SimpleImputer(strategy="constant"), RobustScaler()]) and whose model is a binary XGBClassifier.
+    - The column order, imputer fill values and scaler center_/scale_ are extracted once at load time
+    - predict() builds one fresh matrix, imputes and scales it in place and calls booster.inplace_predict
+    - The arithmetic is the same as the sklearn path (same dtype, same operation order), so results are identical
+    """
+
+    def __init__(self, feature_names, fill_values, center, scale, booster,
+                 missing=np.nan, iteration_range=(0, 0)):
+        self.feature_names = np.asarray(feature_names, dtype=object)
+        self.fill_values = np.ascontiguousarray(fill_values, dtype=np.float64)
+        self.center = None if center is None else np.ascontiguousarray(center, dtype=np.float64)
+        self.scale = None if scale is None else np.ascontiguousarray(scale, dtype=np.float64)
+        self.booster = booster
+        self.missing = missing
+        self.iteration_range = iteration_range
+        self._column_maps = {}
+
+    @classmethod
+    def from_sensor_model(cls, sensor_model) -> "FusedSensorModel":
+        """
+        Extracts the constants of a trained SensorModel.
+        Raises ValueError when its preprocessor or model is not the shape this kernel reproduces exactly.
+        """
+        # Imported here: unpickling the model has already loaded sklearn, importing this module should not
+        from sklearn.pipeline import Pipeline
+        from sklearn.impute import SimpleImputer
+        from sklearn.preprocessing import RobustScaler
+
+        preprocessor, model = sensor_model.preprocessor, sensor_model.model
+
+        if not isinstance(preprocessor, Pipeline) or len(preprocessor.steps) != 2:
+            raise ValueError("Fused inference needs a two step Pipeline preprocessor.")
+        imputer, scaler = preprocessor.steps[0][1], preprocessor.steps[1][1]
+        if not isinstance(imputer, SimpleImputer) or imputer.strategy != "constant" \
+                or not (isinstance(imputer.missing_values, float) and np.isnan(imputer.missing_values)) \
+                or imputer.add_indicator:
+            raise ValueError("Fused inference needs SimpleImputer(strategy='constant') on NaN values.")
+        if not isinstance(scaler, RobustScaler):
+            raise ValueError("Fused inference needs a RobustScaler.")
+        if not hasattr(preprocessor, "feature_names_in_"):
+            raise ValueError("Fused inference needs a preprocessor fitted on named features.")
+        if getattr(model, "n_classes_", None) != 2 or model.objective != "binary:logistic":
+            raise ValueError("Fused inference needs a binary:logistic XGBClassifier.")
+
+        try:
+            best_iteration = model.best_iteration
+            iteration_range = (0, best_iteration + 1)
+        except AttributeError:
+            iteration_range = (0, 0)
+
+        return cls(
+            feature_names=preprocessor.feature_names_in_,
+            fill_values=imputer.statistics_,
+            center=scaler.center_ if scaler.with_centering else None,
+            scale=scaler.scale_ if scaler.with_scaling else None,
+            booster=model.get_booster(),
+            missing=model.missing,
+            iteration_range=iteration_range,
+        )
+
+    def _column_map(self, columns) -> np.ndarray:
+        # Cached per distinct column layout; None means the frame is already in training order.
+        # Shared by the inference threads: the cache is read once and a computed map is returned from the
+        # local, so a concurrent clear() can never turn a hit into a KeyError
+        key = tuple(columns)
+        column_map = self._column_maps.get(key, _NOT_CACHED)
+        if column_map is not _NOT_CACHED:
+            return column_map
+        indexer = pd.Index(columns).get_indexer(self.feature_names)
+        if (indexer < 0).any():
+            raise KeyError(f"Missing features: {list(self.feature_names[indexer < 0])}")
+        column_map = None if np.array_equal(indexer, np.arange(len(columns))) else indexer
+        if len(self._column_maps) >= 64:
+            self._column_maps.clear()
+        self._column_maps[key] = column_map
+        return column_map
+
+    def to_matrix(self, x) -> np.ndarray:
+        """
+        Fresh matrix of the training features in training order, in the dtype sklearn would use.
+        """
+        if isinstance(x, pd.DataFrame):
+            column_map = self._column_map(x.columns)
+            if column_map is not None:
+                # Positional take (always a copy) drops extra columns such as the target before conversion
+                x = x.iloc[:, column_map]
+            # sklearn keeps float32 input as float32 and upcasts everything else to float64
+            dtype = np.float32 if len(x.columns) and all(t == np.float32 for t in x.dtypes) else np.float64
+            return x.to_numpy(dtype=dtype, na_value=np.nan, copy=column_map is None)
+
+        x = np.asarray(x)
+        dtype = np.float32 if x.dtype == np.float32 else np.float64
+        return np.array(x, dtype=dtype, copy=True)
+
+    def transform(self, x) -> np.ndarray:
+        """
+        Imputes and scales `x` (DataFrame in any column order, or an already aligned matrix)
+        into a fresh matrix, exactly like preprocessor.transform.
+        """
+        return self.transform_inplace(self.to_matrix(x))
+
+    def transform_inplace(self, matrix: np.ndarray) -> np.ndarray:
+        """
+        Imputes and scales an aligned matrix the caller owns, overwriting it.
+        """
+        missing_mask = np.isnan(matrix)
+        if missing_mask.any():
+            np.copyto(matrix, np.broadcast_to(self.fill_values.astype(matrix.dtype), matrix.shape), where=missing_mask)
+        if self.center is not None:
+            matrix -= self.center
+        if self.scale is not None:
+            matrix /= self.scale
+        return matrix
+
+    def predict_proba_positive(self, x) -> np.ndarray:
+        return self.predict_proba_transformed(self.transform(x))
+
+    def predict_proba_transformed(self, matrix: np.ndarray) -> np.ndarray:
+        return self.booster.inplace_predict(
+            matrix,
+            iteration_range=self.iteration_range,
+            predict_type="value",
+            missing=self.missing,
+            validate_features=False,
+        )
+
+    def predict(self, x) -> np.ndarray:
+        """
+        Same labels as SensorModel.predict: 1 where the positive class probability is above 0.5.
+        """
+        return self.predict_transformed(self.transform(x))
+
+    def predict_transformed(self, matrix: np.ndarray) -> np.ndarray:
+        """
+        Labels for a matrix that already went through transform().
+        """
+        class_probs = self.predict_proba_transformed(matrix)
+        labels = np.zeros(class_probs.shape[0], dtype=np.int64)
+        labels[class_probs > 0.5] = 1
+        return labels
@@ -0,0 +1,157 @@
+# input_validator.py
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+import logging
+logger = logging.getLogger(__name__)
+
+from sensor.constant.training_pipeline import SCHEMA_FILE_PATH
+from sensor.constant.application import INPUT_NA_TOKENS, INPUT_REJECTED_ROWS_REPORTED
+from sensor.utils.main_utils import parse_numeric_block, read_yaml_file
+
+NUMERICAL_SCHEMA_TYPES = ("int", "float")
+
+
+class InputValidationError(ValueError):
+    """
+    Raised when a batch cannot be scored at all, e.g. required feature columns are missing.
+    """
+
+
+@dataclass
+class ValidationReport:
+    rows_received: int = 0
+    rows_rejected: int = 0
+    rejected_rows: list = field(default_factory=list)  # positions of rejected rows, first INPUT_REJECTED_ROWS_REPORTED only
+    column_rejects: dict = field(default_factory=dict)  # feature -> rejected cells (unparseable or non-finite)
+
+    def merge(self, other: "ValidationReport", row_offset: int = 0) -> None:
+        """
+        Adds the counts of a later chunk of the same upload, whose first row is at `row_offset`.
+        """
+        self.rows_received += other.rows_received
+        self.rows_rejected += other.rows_rejected
+        room = INPUT_REJECTED_ROWS_REPORTED - len(self.rejected_rows)
+        self.rejected_rows.extend(row + row_offset for row in other.rejected_rows[:max(room, 0)])
+        for column, count in other.column_rejects.items():
+            self.column_rejects[column] = self.column_rejects.get(column, 0) + count
+
+    def to_dict(self) -> dict:
+        return {
+            "rows_received": self.rows_received,
+            "rows_rejected": self.rows_rejected,
+            "rejected_rows": self.rejected_rows,
+            "column_rejects": self.column_rejects,
+        }
+
+
+class InputValidator:
+    """
+    Serving-side counterpart of DataValidation, compiled once per champion from config/schema.yaml.
+    validate() checks and converts a whole batch in one vectorized pass:
+    - Required columns: every model feature must be present (unless the caller fills missing ones itself)
+    - Numeric columns go straight to the matrix; text columns are cast as one block once the 'na' token
+      (and empty/None) is replaced by NaN, and only columns holding other strings go through pd.to_numeric,
+      where each such string rejects its cell
+    - Infinite values reject the cell too; a row with any rejected cell is left out of scoring
+    The matrix keeps the dtype the fused kernel and sklearn use (float64), so accepted rows score exactly as before.
+    """
+
+    def __init__(self, feature_names, na_tokens=INPUT_NA_TOKENS):
+        self.feature_names = np.asarray(feature_names, dtype=object)
+        self.na_tokens = list(na_tokens)
+        self._column_maps = {}
+
+    @classmethod
+    def from_schema(cls, feature_names, schema_file_path: str = SCHEMA_FILE_PATH) -> "InputValidator":
+        """
+        Builds the validator for a model's features, checking them against the schema the model was trained on.
+        """
+        try:
+            schema_columns = {name: dtype for column in read_yaml_file(schema_file_path)["columns"]
+                              for name, dtype in column.items()}
+            not_numerical = [name for name in feature_names
+                             if schema_columns.get(name) not in NUMERICAL_SCHEMA_TYPES]
+            if not_numerical:
+                logger.warning(f"Model features not declared numerical in {schema_file_path}: {not_numerical}")
+        except Exception as e:
+            logger.warning(f"Could not read schema {schema_file_path}, validating model features only: {e}")
+        return cls(feature_names=feature_names)
+
+    def check_columns(self, columns) -> None:
+        """
+        Raises InputValidationError listing the model features missing from `columns`.
+        """
+        self._column_map(columns, allow_missing_columns=False)
+
+    def _column_map(self, columns, allow_missing_columns: bool) -> np.ndarray:
+        # Cached per distinct column layout: position of every feature in the frame, -1 when absent
+        # Only a single get and a single store, so a concurrent clear() cannot make the lookup fail
+        key = (tuple(columns), allow_missing_columns)
+        indexer = self._column_maps.get(key)
+        if indexer is None:
+            indexer = pd.Index(columns).get_indexer(self.feature_names)
+            if not allow_missing_columns and (indexer < 0).any():
+                raise InputValidationError(f"Missing required feature columns: {list(self.feature_names[indexer < 0])}")
+            if len(self._column_maps) >= 64:
+                self._column_maps.clear()
+            self._column_maps[key] = indexer
+        return indexer
+
+    def _parse_text(self, values: np.ndarray):
+        """
+        Parses an object block into float64; returns (parsed block, mask of unparseable cells or None).
+        """
+        return parse_numeric_block(values, self.na_tokens)
+
+    def validate(self, dataframe: pd.DataFrame, allow_missing_columns: bool = False):
+        """
+        Returns (matrix of the accepted rows in training feature order, boolean mask of accepted rows
+        or None when every row passed, ValidationReport).
+        With `allow_missing_columns` absent features are read as missing instead of failing the batch.
+        """
+        indexer = self._column_map(dataframe.columns, allow_missing_columns)
+        n_rows, n_features = len(dataframe), len(self.feature_names)
+        present = indexer >= 0
+        dtypes = dataframe.dtypes.to_numpy()[indexer[present]]
+        numeric = np.array([pd.api.types.is_numeric_dtype(dtype) for dtype in dtypes], dtype=bool)
+
+        # Same dtype rule as FusedSensorModel.to_matrix: float32 stays float32, anything else becomes float64
+        dtype = np.float32 if len(dtypes) == n_features and all(t == np.float32 for t in dtypes) else np.float64
+        bad_cells = None
+
+        if numeric.all() and present.all():
+            # Fast path: one positional take and conversion, like the unvalidated kernel
+            matrix = dataframe.iloc[:, indexer].to_numpy(dtype=dtype, na_value=np.nan)
+        else:
+            matrix = np.full((n_rows, n_features), np.nan, dtype=dtype)
+            positions = np.flatnonzero(present)
+            numeric_positions, text_positions = positions[numeric], positions[~numeric]
+            if len(numeric_positions):
+                matrix[:, numeric_positions] = dataframe.iloc[:, indexer[numeric_positions]].to_numpy(
+                    dtype=dtype, na_value=np.nan)
+            if len(text_positions):
+                parsed, unparsed = self._parse_text(dataframe.iloc[:, indexer[text_positions]].to_numpy(dtype=object))
+                matrix[:, text_positions] = parsed
+                if unparsed is not None:
+                    bad_cells = np.zeros((n_rows, n_features), dtype=bool)
+                    bad_cells[:, text_positions] = unparsed
+
+        non_finite = np.isinf(matrix)
+        bad_cells = non_finite if bad_cells is None else bad_cells | non_finite
+
+        report = ValidationReport(rows_received=n_rows)
+        rejected = bad_cells.any(axis=1)
+        if not rejected.any():
+            return matrix, None, report
+
+        column_counts = bad_cells.sum(axis=0)
+        rejected_positions = np.flatnonzero(rejected)
+        report.rows_rejected = len(rejected_positions)
+        report.rejected_rows = rejected_positions[:INPUT_REJECTED_ROWS_REPORTED].tolist()
+        report.column_rejects = {str(self.feature_names[i]): int(column_counts[i]) for i in np.flatnonzero(column_counts)}
+        accepted = ~rejected
+        return matrix[accepted], accepted, report
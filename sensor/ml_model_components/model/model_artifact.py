@@ -0,0 +1,167 @@
+# model_artifact.py
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import zipfile
+
+import numpy as np
+
+from sensor.constant.training_pipeline import SCHEMA_FILE_PATH, REFERENCE_HISTOGRAM_FILE_NAME
+from sensor.ml_model_components.model.fused_model import FusedSensorModel
+from sensor.ml_model_components.model.feature_histogram import FeatureHistogram
+
+MODEL_ARTIFACT_FORMAT_VERSION = 2
+BOOSTER_FILE_NAME = "booster.ubj"
+PREPROCESSOR_FILE_NAME = "preprocessor.npz"
+MANIFEST_FILE_NAME = "manifest.json"
+PREPROCESSOR_ARRAYS = ("fill_values", "center", "scale")
+
+
+def get_schema_hash(schema_file_path: str = SCHEMA_FILE_PATH):
+    """
+    SHA-256 of the schema file the model was trained against, or None if it is not found.
+    """
+    try:
+        with open(schema_file_path, "rb") as schema_file:
+            return hashlib.sha256(schema_file.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def _metric_to_dict(metric) -> dict:
+    if metric is None:
+        return None
+    return {name: float(value) for name, value in vars(metric).items()}
+
+
+def save_model_artifact(kernel: FusedSensorModel, artifact_dir: str, metrics: dict = None,
+                        schema_hash: str = None, reference_histogram: FeatureHistogram = None,
+                        overwrite: bool = False) -> bool:
+    """
+    Writes the native, versioned model artifact folder:
+    - booster.ubj: XGBoost's own binary (UBJSON) model
+    - preprocessor.npz: imputer fill values and RobustScaler center/scale, stored uncompressed so they can be mapped
+    - manifest.json: format version, feature order, schema hash, metrics and library versions
+    - reference_histogram.npz (optional): training feature histograms for drift monitoring
+    `metrics` maps a name (e.g. "train", "test") to a ClassificationMetricArtifact.
+    The folder is built under a temporary name and renamed into place, so readers only ever see a complete copy.
+    Returns False when the folder already exists (e.g. another worker published it first);
+    with `overwrite` an existing folder is replaced instead.
+    """
+    if os.path.isdir(artifact_dir) and not overwrite:
+        return False
+
+    import xgboost
+
+    tmp_dir = f"{artifact_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    try:
+        kernel.booster.save_model(os.path.join(tmp_dir, BOOSTER_FILE_NAME))
+        arrays = {name: np.ascontiguousarray(getattr(kernel, name), dtype=np.float64)
+                  for name in PREPROCESSOR_ARRAYS if getattr(kernel, name) is not None}
+        np.savez(os.path.join(tmp_dir, PREPROCESSOR_FILE_NAME), **arrays)
+        if reference_histogram is not None:
+            reference_histogram.save(os.path.join(tmp_dir, REFERENCE_HISTOGRAM_FILE_NAME))
+
+        missing = kernel.missing
+        manifest = {
+            "format_version": MODEL_ARTIFACT_FORMAT_VERSION,
+            "created_at": time.time(),
+            "feature_names": [str(name) for name in kernel.feature_names],
+            "schema_hash": schema_hash,
+            "metrics": {name: _metric_to_dict(metric) for name, metric in (metrics or {}).items()},
+            "missing": None if missing is None or np.isnan(missing) else float(missing),
+            "iteration_range": list(kernel.iteration_range),
+            "reference_histogram": None if reference_histogram is None else REFERENCE_HISTOGRAM_FILE_NAME,
+            "library_versions": {"xgboost": xgboost.__version__, "numpy": np.__version__},
+        }
+        with open(os.path.join(tmp_dir, MANIFEST_FILE_NAME), "w") as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+
+        if overwrite and os.path.isdir(artifact_dir):
+            # A folder cannot be renamed over a non-empty one, so the old copy is moved aside first
+            old_dir = f"{artifact_dir}.old-{os.getpid()}"
+            os.rename(artifact_dir, old_dir)
+            shutil.rmtree(old_dir, ignore_errors=True)
+        os.rename(tmp_dir, artifact_dir)
+        return True
+    except OSError:
+        # Lost the race against another writer: its copy is equivalent
+        if os.path.isdir(artifact_dir) and not overwrite:
+            return False
+        raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _map_npz(npz_path: str) -> dict:
+    """
+    Memory-maps every array of an uncompressed .npz read-only, so all processes share the same pages.
+    """
+    arrays = {}
+    with zipfile.ZipFile(npz_path) as archive, open(npz_path, "rb") as npz_file:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{npz_path} is compressed and cannot be memory-mapped")
+            # The member's data starts after its local file header (30 bytes + name + extra field)
+            npz_file.seek(info.header_offset)
+            local_header = npz_file.read(30)
+            name_length = int.from_bytes(local_header[26:28], "little")
+            extra_length = int.from_bytes(local_header[28:30], "little")
+            npz_file.seek(info.header_offset + 30 + name_length + extra_length)
+
+            version = np.lib.format.read_magic(npz_file)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(npz_file)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(npz_file)
+            arrays[info.filename[:-len(".npy")]] = np.memmap(
+                npz_path, dtype=dtype, mode="r", offset=npz_file.tell(), shape=shape,
+                order="F" if fortran_order else "C")
+    return arrays
+
+
+def read_manifest(artifact_dir: str) -> dict:
+    with open(os.path.join(artifact_dir, MANIFEST_FILE_NAME), "r") as manifest_file:
+        manifest = json.load(manifest_file)
+    if manifest.get("format_version") != MODEL_ARTIFACT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported model artifact format {manifest.get('format_version')} in {artifact_dir}")
+    return manifest
+
+
+def load_model_artifact(artifact_dir: str) -> FusedSensorModel:
+    """
+    Loads a folder written by save_model_artifact without unpickling anything.
+    The preprocessor arrays are memory-mapped read-only and shared by every worker;
+    XGBoost parses the booster into its own tree structures, which stay private to each process.
+    So every worker still pays for the trees (about 2-3x the size of booster.ubj): memory grows with the
+    worker count by that much, only the preprocessor arrays and the unpickled SensorModel are saved.
+    """
+    from xgboost import Booster
+
+    manifest = read_manifest(artifact_dir)
+    arrays = _map_npz(os.path.join(artifact_dir, PREPROCESSOR_FILE_NAME))
+    booster = Booster(model_file=os.path.join(artifact_dir, BOOSTER_FILE_NAME))
+    return FusedSensorModel(
+        feature_names=manifest["feature_names"],
+        fill_values=arrays["fill_values"],
+        center=arrays.get("center"),
+        scale=arrays.get("scale"),
+        booster=booster,
+        missing=np.nan if manifest["missing"] is None else manifest["missing"],
+        iteration_range=tuple(manifest["iteration_range"]),
+    )
+
+
+def load_reference_histogram(artifact_dir: str):
+    """
+    Training feature histograms saved with the model artifact, or None if it has none.
+    """
+    file_name = read_manifest(artifact_dir).get("reference_histogram")
+    if file_name is None:
+        return None
+    return FeatureHistogram.load(os.path.join(artifact_dir, file_name))
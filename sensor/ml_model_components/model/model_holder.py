@@ -0,0 +1,304 @@
+# model_holder.py
+
+import os, sys
+import time
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from sensor.exception import SensorException
+
+import logging
+logger = logging.getLogger(__name__)
+
+from sensor.constant.application import (MODEL_RELOAD_CHECK_INTERVAL_SECONDS, MODEL_ARTIFACT_ENABLED,
+                                         INPUT_VALIDATION_ENABLED)
+from sensor.constant.training_pipeline import MODEL_ARTIFACT_DIR_NAME
+from sensor.ml_model_components.model.model_resolver import ModelResolver
+from sensor.ml_model_components.model.fused_model import FusedSensorModel
+from sensor.ml_model_components.model.model_artifact import (save_model_artifact, load_model_artifact,
+                                                              load_reference_histogram)
+from sensor.ml_model_components.model.feature_histogram import FeatureHistogram
+from sensor.ml_model_components.model.input_validator import InputValidator
+from sensor.utils.main_utils import load_object
+from sensor.utils.metrics import PREDICT_STAGE_SECONDS, MODEL_LOAD_SECONDS, CHAMPION_MODEL_TIMESTAMP
+
+ALIGNMENT_SECONDS = PREDICT_STAGE_SECONDS.labels("feature_alignment")
+TRANSFORM_SECONDS = PREDICT_STAGE_SECONDS.labels("transform")
+MODEL_PREDICT_SECONDS = PREDICT_STAGE_SECONDS.labels("model_predict")
+
+
+@dataclass(frozen=True)
+class ChampionModel: # significance - one loaded champion, never mutated after it is published
+    model_id: int
+    model_path: str
+    model: object  # the unpickled SensorModel, None when the champion was mapped from its shared folder
+    load_seconds: float
+    kernel: FusedSensorModel = None  # compiled hot path, None when the model shape is not supported
+    validator: InputValidator = None  # schema checks for its features, None when disabled or features are unknown
+    reference_histogram: FeatureHistogram = None  # training feature histograms for drift monitoring, None if not saved
+
+    @property
+    def feature_names(self):
+        if self.kernel is not None:
+            return self.kernel.feature_names
+        return getattr(self.model.preprocessor, "feature_names_in_", None)
+
+    def predict(self, x):
+        """
+        Scores a DataFrame in any column order (extra columns are ignored).
+        """
+        if self.kernel is not None:
+            # to_matrix returns a fresh matrix, so the kernel can transform it in place
+            return self._predict_kernel(self.to_matrix(x), copy=False)
+
+        with ALIGNMENT_SECONDS.time():
+            feature_names = self.feature_names
+            if feature_names is not None and list(x.columns) != list(feature_names):
+                x = x[feature_names]
+        return self._predict_model(x)
+
+    def to_matrix(self, x) -> np.ndarray:
+        """
+        Aligned feature matrix of a DataFrame, as predict_matrix expects it.
+        """
+        with ALIGNMENT_SECONDS.time():
+            if self.kernel is not None:
+                return self.kernel.to_matrix(x)
+            feature_names = self.feature_names
+            if feature_names is not None:
+                x = x[feature_names]
+            return x.to_numpy(dtype=np.float64, na_value=np.nan)
+
+    def predict_matrix(self, matrix: np.ndarray, copy: bool = True) -> np.ndarray:
+        """
+        Scores an aligned matrix; pass copy=False when the caller does not need it afterwards.
+        """
+        if self.kernel is not None:
+            return self._predict_kernel(matrix, copy=copy)
+        feature_names = self.feature_names
+        return self._predict_model(matrix if feature_names is None else pd.DataFrame(matrix, columns=feature_names))
+
+    def _predict_kernel(self, matrix: np.ndarray, copy: bool) -> np.ndarray:
+        with TRANSFORM_SECONDS.time():
+            transformed = self.kernel.transform(matrix) if copy else self.kernel.transform_inplace(matrix)
+        with MODEL_PREDICT_SECONDS.time():
+            return self.kernel.predict_transformed(transformed)
+
+    def _predict_model(self, x) -> np.ndarray:
+        # Same two steps as SensorModel.predict, timed separately
+        with TRANSFORM_SECONDS.time():
+            transformed = self.model.preprocessor.transform(x)
+        with MODEL_PREDICT_SECONDS.time():
+            return self.model.model.predict(transformed)
+
+
+class ModelHolder:
+    """
+    Keeps the champion SensorModel in memory for the whole process.
+    - Loads the champion once and serves every request from memory
+    - Polls the ModelResolver publish signature (one stat call) at most every `check_interval` seconds
+    - Swaps to a newer champion by replacing a single reference, so in-flight requests finish on the old model
+    Any resolver with the ModelResolver interface works (e.g. ChallengerResolver for shadow scoring);
+    `record_metrics` publishes the champion gauges and `keep_unpublished` keeps serving a model whose
+    files disappeared from the resolver. `nthread` caps the XGBoost threads of every loaded model.
+    """
+
+    def __init__(self, model_resolver: ModelResolver = None,
+                 check_interval: float = MODEL_RELOAD_CHECK_INTERVAL_SECONDS,
+                 record_metrics: bool = True, keep_unpublished: bool = True, nthread: int = None):
+        try:
+            self.model_resolver = model_resolver if model_resolver is not None else ModelResolver()
+            self.check_interval = check_interval
+            self.nthread = nthread
+            self.record_metrics = record_metrics
+            self.keep_unpublished = keep_unpublished
+            self._champion = None
+            self._signature = None
+            self._last_check = 0.0
+            self._reload_lock = threading.Lock()
+        except Exception as e:
+            raise SensorException(e, sys)
+
+    def get_model(self) -> ChampionModel:
+        """
+        Returns the current champion, reloading first if a new model was published.
+        """
+        champion = self._champion
+        if champion is None:
+            return self.reload()
+
+        if time.monotonic() - self._last_check >= self.check_interval:
+            # Never make a request wait for a reload another thread is already doing
+            if self._reload_lock.acquire(blocking=False):
+                try:
+                    self._reload_if_published()
+                finally:
+                    self._reload_lock.release()
+
+        return self._champion
+
+    def get_model_if_available(self):
+        """
+        Like get_model, but returns None instead of raising when no model is published,
+        and looks for one at most every `check_interval` seconds.
+        """
+        if self._champion is None and time.monotonic() - self._last_check < self.check_interval:
+            return None
+        try:
+            return self.get_model()
+        except Exception:
+            return None
+
+    def reload(self, force: bool = False) -> ChampionModel:
+        """
+        Loads the champion if none is held yet (or if `force` is set), blocking until it is available.
+        """
+        with self._reload_lock:
+            if self._champion is None or force:
+                self._reload_if_published(force=True)
+            if self._champion is None:
+                raise Exception("No model is currently available in the 'saved_models' directory.")
+            return self._champion
+
+    def _reload_if_published(self, force: bool = False) -> None:
+        self._last_check = time.monotonic()
+        signature = self.model_resolver.get_publish_signature()
+        if not force and signature == self._signature:
+            return
+
+        if not self.model_resolver.is_model_exists():
+            self._signature = signature
+            if not self.keep_unpublished:
+                self._champion = None
+            return
+
+        model_id = self.model_resolver.get_best_model_timestamp()
+        if not force and self._champion is not None and self._champion.model_id == model_id:
+            self._signature = signature
+            return
+
+        try:
+            champion = self.load_model(model_id)
+        except Exception as e:
+            if self._champion is None:
+                raise
+            # Keep serving the previous champion; the next check will retry
+            logger.error(f"Failed to load published model {model_id}, keeping model {self._champion.model_id}: {e}")
+            return
+
+        self._champion = champion
+        self._signature = signature
+        if self.record_metrics:
+            MODEL_LOAD_SECONDS.set(champion.load_seconds)
+            CHAMPION_MODEL_TIMESTAMP.set(model_id)
+        logger.info(f"Loaded champion model {model_id} from {champion.model_path} in {champion.load_seconds:.3f}s")
+
+    def load_model(self, model_id) -> ChampionModel:
+        """
+        Loads and warms up the model `model_id` of the resolver without publishing it
+        (e.g. to pin every batch prediction worker to the same model).
+        """
+        model_path = self.model_resolver.get_model_path(model_id)
+        start = time.perf_counter()
+        sensor_model, kernel = self._load(model_path)
+        load_seconds = time.perf_counter() - start
+        self._limit_threads(sensor_model, kernel)
+
+        champion = ChampionModel(
+            model_id=model_id,
+            model_path=model_path,
+            model=sensor_model,
+            load_seconds=load_seconds,
+            kernel=kernel,
+            validator=self._build_validator(sensor_model, kernel),
+            reference_histogram=self._load_reference_histogram(model_path, kernel)
+        )
+        # Warm up before publishing, so no request pays for the first-call setup of the new model
+        self._warm_up(champion)
+        return champion
+
+    def _load(self, model_path: str):
+        """
+        Returns (SensorModel or None, FusedSensorModel or None) for a model file.
+        With MODEL_ARTIFACT_ENABLED the native artifact folder next to model.pkl is loaded without unpickling.
+        Models saved before that format existed are unpickled once and exported by the first worker that loads them.
+        """
+        artifact_dir = os.path.join(os.path.dirname(model_path), MODEL_ARTIFACT_DIR_NAME)
+        if MODEL_ARTIFACT_ENABLED and os.path.isdir(artifact_dir):
+            try:
+                return None, load_model_artifact(artifact_dir)
+            except Exception as e:
+                logger.warning(f"Could not load model artifact {artifact_dir}, unpickling {model_path}: {e}")
+
+        sensor_model = load_object(file_path=model_path)
+        kernel = self._compile(sensor_model)
+        if not MODEL_ARTIFACT_ENABLED or kernel is None:
+            return sensor_model, kernel
+
+        try:
+            save_model_artifact(kernel, artifact_dir)
+            # Drop the unpickled copy so this worker has the same footprint as the ones that map the folder
+            return None, load_model_artifact(artifact_dir)
+        except Exception as e:
+            logger.warning(f"Could not export model artifact to {artifact_dir}: {e}")
+            return sensor_model, kernel
+
+    def _limit_threads(self, sensor_model, kernel) -> None:
+        # A pickled XGBClassifier keeps the n_jobs it was trained with; serving uses its own budget
+        if self.nthread is None:
+            return
+        if kernel is not None:
+            kernel.booster.set_param({"nthread": self.nthread})
+        if sensor_model is not None and hasattr(sensor_model.model, "set_params"):
+            sensor_model.model.set_params(n_jobs=self.nthread)
+
+    @staticmethod
+    def _load_reference_histogram(model_path: str, kernel):
+        artifact_dir = os.path.join(os.path.dirname(model_path), MODEL_ARTIFACT_DIR_NAME)
+        if kernel is None or not os.path.isdir(artifact_dir):
+            return None
+        try:
+            reference_histogram = load_reference_histogram(artifact_dir)
+        except Exception as e:
+            logger.warning(f"Could not load the reference histogram of {artifact_dir}: {e}")
+            return None
+        if reference_histogram is not None and list(reference_histogram.feature_names) != list(kernel.feature_names):
+            logger.warning(f"Reference histogram of {artifact_dir} does not match the model features, ignoring it")
+            return None
+        return reference_histogram
+
+    @staticmethod
+    def _build_validator(sensor_model, kernel):
+        if not INPUT_VALIDATION_ENABLED:
+            return None
+        feature_names = kernel.feature_names if kernel is not None else getattr(
+            sensor_model.preprocessor, "feature_names_in_", None)
+        return None if feature_names is None else InputValidator.from_schema(feature_names)
+
+    @staticmethod
+    def _warm_up(champion: ChampionModel) -> None:
+        # One all-missing row through the real scoring path (bypassing ChampionModel so /metrics is not touched)
+        feature_names = champion.feature_names
+        if feature_names is None:
+            return
+        try:
+            start = time.perf_counter()
+            row = pd.DataFrame(np.nan, index=[0], columns=feature_names)
+            if champion.kernel is not None:
+                champion.kernel.predict(row)
+            else:
+                champion.model.predict(row)
+            logger.info(f"Warmed up champion model {champion.model_id} in {time.perf_counter() - start:.3f}s")
+        except Exception as e:
+            logger.warning(f"Warm-up of champion model {champion.model_id} failed: {e}")
+
+    @staticmethod
+    def _compile(sensor_model):
+        try:
+            return FusedSensorModel.from_sensor_model(sensor_model)
+        except ValueError as e:
+            logger.warning(f"Serving through SensorModel.predict, fused inference unavailable: {e}")
+            return None
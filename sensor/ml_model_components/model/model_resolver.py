@@ -1,31 +1,74 @@
 # model_resolver.py
 
 import os
-from sensor.constant.training_pipeline import SAVED_MODEL_DIR, MODEL_FILE_NAME
+from sensor.constant.training_pipeline import SAVED_MODEL_DIR, MODEL_FILE_NAME, SAVED_MODEL_POINTER_FILE_NAME
+from sensor.constant.training_pipeline import (ARTIFACT_DIR, MODEL_TRAINER_DIR_NAME, MODEL_TRAINER_TRAINED_MODEL_DIR,
+                                               MODEL_TRAINER_TRAINED_MODEL_NAME, MODEL_PUSHER_DIR_NAME)
 
 class ModelResolver:
 
     def __init__(self, model_dir=SAVED_MODEL_DIR):
         try:
             self.model_dir = model_dir
+            self.pointer_file_path = os.path.join(self.model_dir, SAVED_MODEL_POINTER_FILE_NAME)
         except Exception as e:
             raise e
 
+    def get_model_timestamps(self) -> list:
+        """
+        Lists the timestamps of every saved model folder (non-numeric entries such as the pointer file are skipped).
+        """
+        try:
+            return [int(name) for name in os.listdir(self.model_dir) if name.isdigit()]
+        except Exception as e:
+            raise e
+
+    def get_best_model_timestamp(self) -> int:
+        """
+        Returns the timestamp of the champion model.
+        The pointer file written by ModelPusher wins; older layouts fall back to the latest folder.
+        """
+        try:
+            if os.path.exists(self.pointer_file_path):
+                with open(self.pointer_file_path, "r") as pointer_file:
+                    pointed_timestamp = pointer_file.read().strip()
+                if pointed_timestamp.isdigit() and os.path.exists(self.get_model_path(int(pointed_timestamp))):
+                    return int(pointed_timestamp)
+
+            return max(self.get_model_timestamps())
+        except Exception as e:
+            raise e
+
+    def get_model_path(self, timestamp: int) -> str:
+        """
+        Builds the model file path for a saved model timestamp.
+        """
+        return os.path.join(self.model_dir, f"{timestamp}", MODEL_FILE_NAME)
+
     def get_best_model_path(self) -> str:
         """
         Finds the path to the latest saved model.
         """
         try:
-            # Get all subdirectory names (which are timestamps)
-            timestamps = list(map(int, os.listdir(self.model_dir)))
-            latest_timestamp = max(timestamps)
-            latest_model_path = os.path.join(
-                self.model_dir, f"{latest_timestamp}", MODEL_FILE_NAME
-            )
-            return latest_model_path
+            return self.get_model_path(self.get_best_model_timestamp())
         except Exception as e:
             raise e
 
+    def get_publish_signature(self):
+        """
+        Cheap fingerprint (a single stat call) that changes whenever a new model is published.
+        Uses the pointer file when present, otherwise the saved model directory itself.
+        Returns None if nothing has been published yet.
+        """
+        try:
+            for path in (self.pointer_file_path, self.model_dir):
+                if os.path.exists(path):
+                    stat_result = os.stat(path)
+                    return (path, stat_result.st_mtime_ns, stat_result.st_size, stat_result.st_ino)
+            return None
+        except OSError:
+            return None
+
     def is_model_exists(self) -> bool:
         """
         Checks if any model is saved and if the latest model file exists.
@@ -34,7 +77,7 @@ class ModelResolver:
             if not os.path.exists(self.model_dir):
                 return False
 
-            timestamps = os.listdir(self.model_dir)
+            timestamps = self.get_model_timestamps()
             if len(timestamps) == 0:
                 return False
             
@@ -45,4 +88,80 @@ class ModelResolver:
 
             return True
         except Exception as e:
-            raise e
\ No newline at end of file
+            raise e
+
+
+class ChallengerResolver:
+    """
+    Finds the newest challenger: a model trained under the artifact folder that ModelPusher has not promoted
+    (its run has no model_pusher copy) and that is newer than the current champion.
+    Exposes the same interface as ModelResolver so a ModelHolder can keep it loaded.
+    Model ids are the artifact run folder names.
+    """
+
+    def __init__(self, artifact_dir=ARTIFACT_DIR, champion_resolver: ModelResolver = None):
+        try:
+            self.artifact_dir = artifact_dir
+            self.champion_resolver = champion_resolver if champion_resolver is not None else ModelResolver()
+        except Exception as e:
+            raise e
+
+    def get_model_path(self, run_id: str) -> str:
+        """
+        Builds the trained model file path of an artifact run.
+        """
+        return os.path.join(self.artifact_dir, run_id, MODEL_TRAINER_DIR_NAME,
+                            MODEL_TRAINER_TRAINED_MODEL_DIR, MODEL_TRAINER_TRAINED_MODEL_NAME)
+
+    def _get_champion_mtime_ns(self) -> int:
+        try:
+            if self.champion_resolver.is_model_exists():
+                return os.stat(self.champion_resolver.get_best_model_path()).st_mtime_ns
+        except OSError:
+            pass
+        return 0
+
+    def _find_newest(self):
+        # (mtime_ns, run_id) of the newest unpromoted trained model, or None
+        if not os.path.isdir(self.artifact_dir):
+            return None
+        champion_mtime_ns = self._get_champion_mtime_ns()
+        newest = None
+        for run_id in os.listdir(self.artifact_dir):
+            if os.path.exists(os.path.join(self.artifact_dir, run_id, MODEL_PUSHER_DIR_NAME, MODEL_FILE_NAME)):
+                continue
+            try:
+                mtime_ns = os.stat(self.get_model_path(run_id)).st_mtime_ns
+            except OSError:
+                continue
+            if mtime_ns > champion_mtime_ns and (newest is None or mtime_ns > newest[0]):
+                newest = (mtime_ns, run_id)
+        return newest
+
+    def get_best_model_timestamp(self) -> str:
+        """
+        Returns the artifact run id of the newest challenger.
+        """
+        try:
+            newest = self._find_newest()
+            if newest is None:
+                raise FileNotFoundError(f"No unpromoted trained model found in '{self.artifact_dir}'.")
+            return newest[1]
+        except Exception as e:
+            raise e
+
+    def get_best_model_path(self) -> str:
+        try:
+            return self.get_model_path(self.get_best_model_timestamp())
+        except Exception as e:
+            raise e
+
+    def get_publish_signature(self):
+        """
+        Changes whenever a newer challenger appears, or the current one is promoted.
+        """
+        newest = self._find_newest()
+        return None if newest is None else (newest[1], newest[0])
+
+    def is_model_exists(self) -> bool:
+        return self._find_newest() is not None
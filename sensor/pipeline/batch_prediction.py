@@ -0,0 +1,375 @@
+"""
+Offline bulk scoring: scores a large CSV/Parquet file or a MongoDB collection with the champion model.
+
+Usage (from the project root):
+    python -m sensor.pipeline.batch_prediction --input fleet.csv --output predictions.csv
+    python -m sensor.pipeline.batch_prediction --collection aps_data --output-collection aps_predictions
+"""
+import os, sys
+import io
+import time
+import argparse
+import multiprocessing
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from sensor.exception import SensorException
+
+import logging
+logger = logging.getLogger(__name__)
+
+from sensor.constant.training_pipeline import SAVED_MODEL_DIR
+from sensor.constant.database import DATABASE_NAME
+from sensor.constant.application import BATCH_PREDICTION_PARTITION_ROWS, BATCH_PREDICTION_MONGO_WRITE_BATCH
+from sensor.configuration.resource_config import ResourceConfig, get_available_cpus
+from sensor.entity.artifact_entity import BatchPredictionArtifact
+from sensor.ml_model_components.model.estimator import TargetValueMapping
+from sensor.ml_model_components.model.model_resolver import ModelResolver
+from sensor.ml_model_components.model.model_holder import ModelHolder
+
+SOURCE_CSV = "csv"
+SOURCE_PARQUET = "parquet"
+SOURCE_MONGO = "mongo"
+
+REJECTED_PREDICTION = -1 # numerical prediction of a row left out by input validation
+
+
+@dataclass(frozen=True)
+class Partition:
+    index: int
+    start: object  # CSV byte offset, first Parquet row group, or first Mongo _id (None: from the beginning)
+    stop: object   # CSV byte offset, Parquet row group after the last, or Mongo _id after the last (None: to the end)
+
+
+# Per-process state of a pool worker, set once by _init_worker
+_worker = {}
+
+
+def _init_worker(model_dir: str, model_id, nthread: int, source: dict) -> None:
+    # Every worker loads the same pinned model; the native artifact maps the preprocessor arrays shared by all
+    ResourceConfig.limit_native_threads(nthread)
+    holder = ModelHolder(model_resolver=ModelResolver(model_dir), record_metrics=False, nthread=nthread)
+    _worker["champion"] = holder.load_model(model_id)
+    _worker["source"] = source
+    if source["type"] == SOURCE_MONGO:
+        from sensor.configuration.mongo_db_connection import MongoDBClient
+        from sensor.data_access.sensor_data import SensorData
+        _worker["sensor_data"] = SensorData()
+        database = MongoDBClient(database_name=source["database_name"]).database
+        _worker["collection"] = database[source["collection_name"]]
+        if source.get("output_collection_name"):
+            _worker["output_collection"] = database[source["output_collection_name"]]
+
+
+def _read_partition(partition: Partition) -> pd.DataFrame:
+    source = _worker["source"]
+    feature_names = _worker["champion"].feature_names
+    columns = None if feature_names is None else set(feature_names)
+
+    if source["type"] == SOURCE_CSV:
+        # Each partition is a newline-aligned byte range; the header is prepended so pandas sees a whole CSV
+        with open(source["file_path"], "rb") as csv_file:
+            header = csv_file.readline()
+            csv_file.seek(partition.start)
+            body = csv_file.read(partition.stop - partition.start)
+        # A header without any feature is read whole: selecting no column would also drop the row count,
+        # and the partition would pass as empty instead of failing validation
+        usecols = None
+        if columns is not None and any(name in columns for name in pd.read_csv(io.BytesIO(header), nrows=0).columns):
+            usecols = columns.__contains__
+        return pd.read_csv(io.BytesIO(header + body), na_values="na", usecols=usecols)
+
+    if source["type"] == SOURCE_PARQUET:
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(source["file_path"])
+        names = None if columns is None else [name for name in parquet_file.schema_arrow.names if name in columns]
+        table = parquet_file.read_row_groups(range(partition.start, partition.stop), columns=names)
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+
+    id_filter = {}
+    if partition.start is not None:
+        id_filter["$gte"] = partition.start
+    if partition.stop is not None:
+        id_filter["$lt"] = partition.stop
+    query = {"_id": id_filter} if id_filter else {}
+    feature_columns = None
+    if feature_names is not None:
+        # Only the features the documents hold are exported, so absent ones fail validation instead of reading as NaN
+        first_document = _worker["collection"].find_one(query, {**{name: 1 for name in feature_names}, "_id": 0})
+        if first_document is None:
+            return pd.DataFrame()
+        feature_columns = list(first_document)
+    # Streamed into preallocated column buffers: the documents are never materialized as dicts all at once
+    return _worker["sensor_data"].export_collection_as_dataframe(source["collection_name"], source["database_name"],
+                                                                 columns=feature_columns, query=query,
+                                                                 include_id=True)
+
+
+def _score_frame(champion, dataframe: pd.DataFrame):
+    # Same checks as the serving path: rejected rows are not scored and get REJECTED_PREDICTION
+    if champion.validator is not None:
+        matrix, accepted, report = champion.validator.validate(dataframe)
+    else:
+        if champion.feature_names is not None:
+            dataframe = dataframe.reindex(columns=champion.feature_names)
+        matrix, accepted = champion.to_matrix(dataframe.apply(pd.to_numeric, errors="coerce")), None
+
+    scored = champion.predict_matrix(matrix, copy=False) if len(matrix) else np.empty(0, dtype=np.int8)
+    if accepted is None:
+        return np.asarray(scored, dtype=np.int8)
+    predictions = np.full(len(accepted), REJECTED_PREDICTION, dtype=np.int8)
+    predictions[accepted] = scored
+    return predictions
+
+
+def _write_back(ids, labels, model_id) -> None:
+    from pymongo import UpdateOne
+    collection = _worker["output_collection"]
+    for start in range(0, len(ids), BATCH_PREDICTION_MONGO_WRITE_BATCH):
+        requests = [UpdateOne({"_id": _id}, {"$set": {"prediction": label, "model_id": model_id}}, upsert=True)
+                    for _id, label in zip(ids[start:start + BATCH_PREDICTION_MONGO_WRITE_BATCH],
+                                          labels[start:start + BATCH_PREDICTION_MONGO_WRITE_BATCH])]
+        # Unordered: the server applies the batch in parallel and one failing document does not stop the rest
+        collection.bulk_write(requests, ordered=False)
+
+
+def _score_partition(partition: Partition):
+    """
+    Pool task: reads, validates and scores one partition, and writes it back to MongoDB when asked.
+    Returns (partition index, rows read, rows rejected, row ids, numerical predictions); ids and predictions
+    are None when no output file needs them, so only the counts travel back to the parent.
+    """
+    champion = _worker["champion"]
+    dataframe = _read_partition(partition)
+    if len(dataframe) == 0:
+        # e.g. every document of a Mongo _id range was deleted after the partitions were planned.
+        # Rows without any feature column are not skipped here: validation reports the missing features
+        return partition.index, 0, 0, np.empty(0, dtype=object), np.empty(0, dtype=np.int8)
+    ids = dataframe.pop("_id").to_numpy() if "_id" in dataframe.columns else None
+    predictions = _score_frame(champion, dataframe)
+    rejected = int(np.count_nonzero(predictions == REJECTED_PREDICTION))
+
+    if "output_collection" in _worker and len(predictions):
+        labels = pd.Series(predictions).map(TargetValueMapping().reverse_mapping())
+        _write_back(ids, labels.astype(object).where(labels.notna(), None).tolist(), champion.model_id)
+    if not _worker["source"]["return_predictions"]:
+        return partition.index, len(predictions), rejected, None, None
+    return partition.index, len(predictions), rejected, ids, predictions
+
+
+class PredictionFileWriter:
+    """
+    Appends (row id, prediction) pairs to a CSV or Parquet file in partition order.
+    """
+
+    def __init__(self, file_path: str, id_column: str):
+        self.file_path = file_path
+        self.id_column = id_column
+        self.is_parquet = file_path.endswith(".parquet")
+        self._parquet_writer = None
+        self._rows_written = 0
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        if not self.is_parquet:
+            open(file_path, "w").close()
+
+    def write(self, ids, predictions: np.ndarray) -> None:
+        if ids is None:
+            ids = np.arange(self._rows_written, self._rows_written + len(predictions))
+        labels = pd.Series(predictions).map(TargetValueMapping().reverse_mapping())
+        frame = pd.DataFrame({self.id_column: ids.astype(str) if ids.dtype == object else ids,
+                              "prediction": labels.to_numpy()})
+        if self.is_parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.file_path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            frame.to_csv(self.file_path, mode="a", index=False, header=self._rows_written == 0)
+        self._rows_written += len(predictions)
+
+    def close(self) -> None:
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+class BatchPredictionPipeline:
+    """
+    Scores a whole dataset offline with a pool of processes, for the nightly full-fleet rescoring.
+    - The champion is resolved once and pinned, so every partition is scored by the same model
+      even if a new one is published during the run
+    - The input is split into partitions every worker reads by itself (CSV byte ranges, Parquet row groups,
+      Mongo _id ranges), so parsing scales with the workers instead of funnelling through the parent
+    - Workers are spawned, not forked: XGBoost's OpenMP threads and pymongo clients are not fork-safe.
+      They load the model from its native artifact, whose preprocessor arrays are memory-mapped and shared
+      (the parsed booster trees are private to each worker)
+    - Each worker gets an equal slice of the cores for XGBoost and BLAS, so the pool never oversubscribes
+    """
+
+    def __init__(self, workers: int = None, partition_rows: int = BATCH_PREDICTION_PARTITION_ROWS,
+                 model_dir: str = SAVED_MODEL_DIR):
+        try:
+            self.workers = workers if workers else get_available_cpus()
+            self.partition_rows = partition_rows
+            self.model_dir = model_dir
+            self.nthread = max(1, get_available_cpus() // self.workers)
+        except Exception as e:
+            raise SensorException(e, sys)
+
+    def _load_champion(self):
+        # Loading once here also exports the native artifact before the workers race to do it
+        model_resolver = ModelResolver(self.model_dir)
+        if not model_resolver.is_model_exists():
+            raise Exception(f"No model is currently available in the '{self.model_dir}' directory.")
+        model_id = model_resolver.get_best_model_timestamp()
+        return ModelHolder(model_resolver=model_resolver, record_metrics=False, nthread=self.nthread).load_model(model_id)
+
+    def _plan_csv(self, file_path: str) -> list:
+        file_size = os.path.getsize(file_path)
+        with open(file_path, "rb") as csv_file:
+            header = csv_file.readline()
+            sample = csv_file.read(1 << 20)
+            lines = sample.count(b"\n")
+            partition_bytes = max(1 << 16, int(len(sample) / max(lines, 1) * self.partition_rows))
+
+            partitions, start = [], len(header)
+            while start < file_size:
+                csv_file.seek(min(start + partition_bytes, file_size))
+                csv_file.readline()  # move to the end of the line the cut fell in
+                stop = min(csv_file.tell(), file_size)
+                partitions.append(Partition(len(partitions), start, stop))
+                start = stop
+        return partitions
+
+    def _plan_parquet(self, file_path: str) -> list:
+        import pyarrow.parquet as pq
+        metadata = pq.ParquetFile(file_path).metadata
+        partitions, first, rows = [], 0, 0
+        for row_group in range(metadata.num_row_groups):
+            rows += metadata.row_group(row_group).num_rows
+            if rows >= self.partition_rows:
+                partitions.append(Partition(len(partitions), first, row_group + 1))
+                first, rows = row_group + 1, 0
+        if first < metadata.num_row_groups:
+            partitions.append(Partition(len(partitions), first, metadata.num_row_groups))
+        return partitions
+
+    def _plan_mongo(self, collection) -> list:
+        # Only the _id index is scanned: every partition_rows-th _id starts a new partition
+        boundaries = [document["_id"] for i, document in enumerate(
+            collection.find({}, {"_id": 1}).sort("_id", 1).batch_size(self.partition_rows))
+            if i % self.partition_rows == 0]
+        if not boundaries:
+            return []
+        boundaries[0] = None
+        return [Partition(i, start, boundaries[i + 1] if i + 1 < len(boundaries) else None)
+                for i, start in enumerate(boundaries)]
+
+    def _run(self, source: dict, partitions: list, champion, writer: PredictionFileWriter, output: str):
+        start = time.perf_counter()
+        rows_scored = rows_rejected = 0
+        source = {**source, "return_predictions": writer is not None}
+        context = multiprocessing.get_context("spawn")
+        try:
+            with context.Pool(processes=min(self.workers, max(len(partitions), 1)), initializer=_init_worker,
+                              initargs=(self.model_dir, champion.model_id, self.nthread, source)) as pool:
+                # imap keeps partition order, so the output file is written in input order as results arrive
+                for index, rows, rejected, ids, predictions in pool.imap(_score_partition, partitions):
+                    rows_scored += rows - rejected
+                    rows_rejected += rejected
+                    if writer is not None:
+                        writer.write(ids, predictions)
+                    logger.debug(f"Scored batch prediction partition {index}: {rows} rows, {rejected} rejected")
+        finally:
+            if writer is not None:
+                writer.close()
+
+        seconds = time.perf_counter() - start
+        artifact = BatchPredictionArtifact(
+            model_id=champion.model_id,
+            rows_scored=rows_scored,
+            rows_rejected=rows_rejected,
+            partitions=len(partitions),
+            workers=self.workers,
+            seconds=seconds,
+            rows_per_second=rows_scored / seconds if seconds > 0 else 0.0,
+            output=output,
+        )
+        logger.info(f"Batch prediction finished: {artifact}")
+        return artifact
+
+    def score_file(self, input_file_path: str, output_file_path: str) -> BatchPredictionArtifact:
+        """
+        Scores a CSV or Parquet file into a CSV or Parquet file of (row, prediction), in input order.
+        """
+        try:
+            champion = self._load_champion()
+            if input_file_path.endswith(".parquet"):
+                source = {"type": SOURCE_PARQUET, "file_path": input_file_path}
+                partitions = self._plan_parquet(input_file_path)
+            else:
+                source = {"type": SOURCE_CSV, "file_path": input_file_path}
+                partitions = self._plan_csv(input_file_path)
+            logger.info(f"Scoring {input_file_path} with model {champion.model_id}: "
+                        f"{len(partitions)} partitions on {self.workers} workers")
+            return self._run(source, partitions, champion, PredictionFileWriter(output_file_path, "row"),
+                             output_file_path)
+        except Exception as e:
+            raise SensorException(e, sys)
+
+    def score_collection(self, collection_name: str, output_file_path: str = None,
+                         output_collection_name: str = None,
+                         database_name: str = DATABASE_NAME) -> BatchPredictionArtifact:
+        """
+        Scores a MongoDB collection, writing (_id, prediction) to a file and/or upserting
+        {prediction, model_id} by _id into `output_collection_name` (the source collection itself works too).
+        """
+        try:
+            if output_file_path is None and output_collection_name is None:
+                raise ValueError("Give an output file, an output collection or both.")
+            from sensor.configuration.mongo_db_connection import MongoDBClient
+
+            champion = self._load_champion()
+            collection = MongoDBClient(database_name=database_name).database[collection_name]
+            partitions = self._plan_mongo(collection)
+            source = {"type": SOURCE_MONGO, "database_name": database_name, "collection_name": collection_name,
+                      "output_collection_name": output_collection_name}
+            logger.info(f"Scoring collection {collection_name} with model {champion.model_id}: "
+                        f"{len(partitions)} partitions on {self.workers} workers")
+            writer = None if output_file_path is None else PredictionFileWriter(output_file_path, "_id")
+            return self._run(source, partitions, champion, writer, output_file_path or output_collection_name)
+        except Exception as e:
+            raise SensorException(e, sys)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Offline bulk scoring with the champion sensor model.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", help="CSV or Parquet file to score")
+    source.add_argument("--collection", help="MongoDB collection to score")
+    parser.add_argument("--output", help="CSV or Parquet file receiving the predictions")
+    parser.add_argument("--output-collection", help="MongoDB collection receiving the predictions, by _id")
+    parser.add_argument("--database", default=DATABASE_NAME, help="MongoDB database of both collections")
+    parser.add_argument("--workers", type=int, default=None, help="scoring processes (default: available cores)")
+    parser.add_argument("--partition-rows", type=int, default=BATCH_PREDICTION_PARTITION_ROWS)
+    args = parser.parse_args(argv)
+
+    pipeline = BatchPredictionPipeline(workers=args.workers, partition_rows=args.partition_rows)
+    if args.input:
+        if args.output is None:
+            parser.error("--input needs --output")
+        artifact = pipeline.score_file(args.input, args.output)
+    else:
+        artifact = pipeline.score_collection(args.collection, output_file_path=args.output,
+                                             output_collection_name=args.output_collection,
+                                             database_name=args.database)
+    print(f"Scored {artifact.rows_scored} rows ({artifact.rows_rejected} rejected) in {artifact.seconds:.1f}s "
+          f"with model {artifact.model_id}: {artifact.rows_per_second:,.0f} rows/sec "
+          f"on {artifact.workers} workers -> {artifact.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import math
+import threading
+
+import numpy as np
+
+import logging
+logger = logging.getLogger(__name__)
+
+from sensor.constant.application import (DRIFT_MAX_ROWS_PER_BATCH, DRIFT_MIN_ROWS, DRIFT_PSI_THRESHOLD,
+                                         DRIFT_TOP_FEATURES)
+from sensor.utils.metrics import FEATURE_DRIFT_MAX_PSI, FEATURE_DRIFT_FEATURES_DRIFTED
+
+
+class DriftMonitor:
+    """
+    Online feature drift of served traffic against the reference histogram saved with the champion.
+    - observe() is called with the raw, aligned matrix of every scored batch; batches larger than
+      `max_rows_per_batch` are sampled with a fixed stride, so the per-batch cost stays bounded
+    - Only one live histogram per feature is kept (a few counts each), and it restarts when the champion changes
+    - report() scores every feature with the population stability index (PSI) against the reference
+    Champions without a reference histogram (e.g. exported from an old model.pkl) are not monitored.
+    """
+
+    def __init__(self, max_rows_per_batch: int = DRIFT_MAX_ROWS_PER_BATCH, min_rows: int = DRIFT_MIN_ROWS,
+                 psi_threshold: float = DRIFT_PSI_THRESHOLD):
+        self.max_rows_per_batch = max_rows_per_batch
+        self.min_rows = min_rows
+        self.psi_threshold = psi_threshold
+        self._lock = threading.Lock()
+        self._reset(None, None)
+        FEATURE_DRIFT_MAX_PSI.set_function(lambda: self._gauge("max_psi"))
+        FEATURE_DRIFT_FEATURES_DRIFTED.set_function(lambda: self._gauge("features_drifted"))
+
+    def _reset(self, model_id, reference) -> None:
+        self.model_id = model_id
+        self.reference = reference
+        self.live = None if reference is None else reference.empty_like()
+        self.rows_seen = 0
+
+    def reset(self) -> None:
+        """
+        Starts a new observation window for the current champion.
+        """
+        with self._lock:
+            self._reset(self.model_id, self.reference)
+
+    def observe(self, champion, matrix: np.ndarray) -> None:
+        reference = champion.reference_histogram
+        if reference is None or len(matrix) == 0:
+            return
+        rows = len(matrix)
+        if rows > self.max_rows_per_batch:
+            matrix = matrix[::math.ceil(len(matrix) / self.max_rows_per_batch)]
+
+        # Binning runs outside the lock; only the addition of the counts is serialized
+        counts = reference.bin_counts(matrix)
+        with self._lock:
+            if champion.model_id != self.model_id:
+                logger.info(f"Monitoring feature drift against the reference of model {champion.model_id}")
+                self._reset(champion.model_id, reference)
+            self.live.counts += counts
+            self.rows_seen += rows
+
+    def _gauge(self, key: str) -> float:
+        report = self.report()
+        return report.get(key) or 0.0
+
+    def report(self) -> dict:
+        with self._lock:
+            if self.reference is None:
+                return {"model_id": self.model_id, "status": "no_reference"}
+            live = self.live.empty_like()
+            live.counts = self.live.counts.copy()
+            rows_seen, reference, model_id = self.rows_seen, self.reference, self.model_id
+
+        rows_binned = int(live.total)
+        if rows_binned < self.min_rows:
+            return {"model_id": model_id, "status": "insufficient_data", "rows_seen": rows_seen,
+                    "rows_binned": rows_binned, "min_rows": self.min_rows}
+
+        psi = live.psi(reference)
+        order = np.argsort(psi)[::-1]
+        drifted = int(np.count_nonzero(psi >= self.psi_threshold))
+        return {
+            "model_id": model_id,
+            "status": "drift" if drifted else "ok",
+            "rows_seen": rows_seen,
+            "rows_binned": rows_binned,
+            "psi_threshold": self.psi_threshold,
+            "max_psi": float(psi[order[0]]),
+            "mean_psi": float(psi.mean()),
+            "features_drifted": drifted,
+            "top_features": {str(reference.feature_names[i]): round(float(psi[i]), 6)
+                             for i in order[:DRIFT_TOP_FEATURES]},
+        }
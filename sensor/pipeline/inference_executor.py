@@ -0,0 +1,142 @@
+import sys
+import asyncio
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from sensor.exception import SensorException
+
+import logging
+logger = logging.getLogger(__name__)
+
+from sensor.constant.application import (INFERENCE_MAX_WORKERS,
+                                         INFERENCE_MAX_QUEUE_DEPTH,
+                                         INFERENCE_TIMEOUT_SECONDS)
+
+
+class InferenceSaturatedError(Exception):
+    """
+    Raised when every worker is busy and the wait queue is full; the caller should retry later.
+    """
+
+
+class InferenceExecutor:
+    """
+    Runs CPU-bound parsing and scoring off the event loop on a bounded thread pool.
+    - At most `max_workers` jobs run at once and at most `max_queue_depth` more may wait
+    - Anything beyond that is rejected immediately with InferenceSaturatedError
+    - Each job is awaited for at most `timeout_seconds`; a job that times out keeps its slot
+      until its thread really finishes, so timeouts cannot be used to overload the pool
+    pandas parsing, numpy and XGBoost release the GIL for their heavy loops, so threads
+    scale without having to pickle frames to worker processes.
+    """
+
+    def __init__(self, max_workers: int = INFERENCE_MAX_WORKERS,
+                 max_queue_depth: int = INFERENCE_MAX_QUEUE_DEPTH,
+                 timeout_seconds: float = INFERENCE_TIMEOUT_SECONDS):
+        try:
+            self.max_workers = max_workers
+            self.max_queue_depth = max_queue_depth
+            self.timeout_seconds = timeout_seconds
+            self.in_flight = 0
+            self.rejected = 0
+            self.timed_out = 0
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        except Exception as e:
+            raise SensorException(e, sys)
+
+    def _acquire(self) -> None:
+        # Only ever called from the event loop thread, so the counter needs no lock
+        if self.in_flight >= self.max_workers + self.max_queue_depth:
+            self.rejected += 1
+            raise InferenceSaturatedError(
+                f"Inference is saturated ({self.in_flight} jobs in flight), retry later.")
+        self.in_flight += 1
+
+    def _release(self, _=None) -> None:
+        self.in_flight -= 1
+
+    async def run(self, fn, *args, timeout: float = None):
+        """
+        Runs fn(*args) on the pool and returns its result.
+        Raises InferenceSaturatedError when full and asyncio.TimeoutError after the timeout.
+        """
+        self._acquire()
+        future = asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        future.add_done_callback(self._release)
+        try:
+            # shield: a timeout stops the wait, not the accounting of the still-running job
+            return await asyncio.wait_for(asyncio.shield(future),
+                                          timeout if timeout is not None else self.timeout_seconds)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise
+
+    def iterate(self, iterator):
+        """
+        Admits a streaming job now (raising InferenceSaturatedError if full) and returns an
+        async iterator that pulls each item of the blocking `iterator` on the pool.
+        The stream holds one slot until it is exhausted, fails or is dropped, even if it is never
+        iterated; each item gets the timeout, and like run() a timed out item keeps the slot
+        until its thread really finishes.
+        """
+        self._acquire()
+        return _SlotStream(self, iterator)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "max_workers": self.max_workers,
+            "max_queue_depth": self.max_queue_depth,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+
+_DONE = object()
+
+
+def _release_on_loop(loop, release) -> None:
+    # The slot counter belongs to the event loop thread; a stream may be garbage collected anywhere
+    if not loop.is_closed():
+        loop.call_soon_threadsafe(release)
+
+
+class _SlotStream:
+    """
+    Async iterator returned by InferenceExecutor.iterate, owning one slot of the executor.
+    """
+
+    def __init__(self, executor: InferenceExecutor, iterator):
+        self._executor = executor
+        self._iterator = iterator
+        # Releases the slot exactly once: when the stream ends, or when it is dropped without ever being
+        # iterated (e.g. the client disconnected before the response body started)
+        self._release = weakref.finalize(self, _release_on_loop, asyncio.get_running_loop(), executor._release)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._release.alive:
+            raise StopAsyncIteration
+        future = asyncio.get_running_loop().run_in_executor(self._executor._executor, next, self._iterator, _DONE)
+        try:
+            # shield: a timeout or a cancelled stream stops the wait, not the accounting of the running item
+            item = await asyncio.wait_for(asyncio.shield(future), self._executor.timeout_seconds)
+        except asyncio.TimeoutError:
+            self._executor.timed_out += 1
+            self._release_after(future)
+            raise
+        except BaseException:
+            self._release_after(future)
+            raise
+        if item is _DONE:
+            self._release()
+            raise StopAsyncIteration
+        return item
+
+    async def aclose(self) -> None:
+        self._release()
+
+    def _release_after(self, future) -> None:
+        future.add_done_callback(lambda _: self._release())
@@ -0,0 +1,159 @@
+import sys
+import time
+import asyncio
+from dataclasses import dataclass
+
+from sensor.exception import SensorException
+
+import logging
+logger = logging.getLogger(__name__)
+
+from sensor.constant.application import MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_MS, MICRO_BATCH_MAX_QUEUED_RECORDS
+from sensor.pipeline.inference_executor import InferenceSaturatedError
+from sensor.utils.metrics import RECORD_MICRO_BATCH_SIZE
+
+
+@dataclass
+class BatchResult: # significance - what every waiter of one micro-batch gets back
+    prediction: object
+    batch_size: int
+    batch_latency_ms: float
+
+
+class MicroBatcher:
+    """
+    Collects concurrent single-record requests and scores them with one vectorized call.
+    - A batch is flushed when it reaches `max_batch_size` records or `max_wait_ms` after its first record
+    - `predict_fn` receives the list of records and returns one prediction per record, in order
+    - Each waiter gets its own prediction plus the size and latency of the batch it rode in
+    - With an InferenceExecutor the batch shares its bounded pool, timeout and backpressure, and up to one
+      batch per pool worker is scored at once (one at a time without an executor); while every slot is busy
+      records keep queueing, so the next batch is larger
+    - At most `max_queued_records` records wait for a batch; further ones are rejected at once with
+      InferenceSaturatedError, and each waiter gives up after the executor timeout
+    """
+
+    def __init__(self, predict_fn, max_batch_size: int = MICRO_BATCH_MAX_SIZE,
+                 max_wait_ms: float = MICRO_BATCH_MAX_WAIT_MS, inference_executor=None,
+                 max_queued_records: int = MICRO_BATCH_MAX_QUEUED_RECORDS):
+        try:
+            self.predict_fn = predict_fn
+            self.inference_executor = inference_executor
+            self.max_batch_size = max_batch_size
+            self.max_wait_ms = max_wait_ms
+            self.max_queued_records = max_queued_records
+            self.max_concurrent_batches = inference_executor.max_workers if inference_executor is not None else 1
+            self.batches_scored = 0
+            self.rows_scored = 0
+            self.rejected = 0
+            self.timed_out = 0
+            self._queue = None
+            self._worker = None
+            self._tasks = set()
+        except Exception as e:
+            raise SensorException(e, sys)
+
+    async def submit(self, record: dict) -> BatchResult:
+        """
+        Queues one record and waits for the batch it lands in to be scored.
+        Raises InferenceSaturatedError when the queue is full and asyncio.TimeoutError after the timeout.
+        """
+        if self._worker is None or self._worker.done():
+            # Created lazily so the queue and task belong to the running event loop
+            self._queue = asyncio.Queue(maxsize=self.max_queued_records)
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+        if self._queue.full():
+            self.rejected += 1
+            raise InferenceSaturatedError(
+                f"Record queue is full ({self._queue.qsize()} records waiting), retry later.")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((record, future))
+        try:
+            # On timeout the future is cancelled, so its record is skipped if not scored yet
+            return await asyncio.wait_for(future, None if self.inference_executor is None
+                                          else self.inference_executor.timeout_seconds)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise
+
+    def stats(self) -> dict:
+        return {
+            "batches_scored": self.batches_scored,
+            "rows_scored": self.rows_scored,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "mean_batch_size": self.rows_scored / self.batches_scored if self.batches_scored else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "max_concurrent_batches": self.max_concurrent_batches,
+        }
+
+    async def _collect_batch(self) -> list:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait_ms / 1000
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.max_concurrent_batches)
+        while True:
+            # A batch is only collected once it can be scored, so it picks up everything queued meanwhile
+            await slots.acquire()
+            batch = await self._collect_batch()
+            task = loop.create_task(self._score_batch(batch))
+            # Referenced until done, so the task cannot be garbage collected mid-flight
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            task.add_done_callback(lambda _: slots.release())
+
+    async def _score_batch(self, batch: list) -> None:
+        # Records whose waiter already gave up (timeout, client gone) are not scored
+        batch = [(record, future) for record, future in batch if not future.done()]
+        if not batch:
+            return
+        records = [record for record, _ in batch]
+
+        start = time.perf_counter()
+        try:
+            # The vectorized call runs in a thread while the loop collects and starts the next batches
+            if self.inference_executor is not None:
+                predictions = await self.inference_executor.run(self.predict_fn, records)
+            else:
+                predictions = await asyncio.get_running_loop().run_in_executor(None, self.predict_fn, records)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        batch_latency_ms = (time.perf_counter() - start) * 1000
+
+        self.batches_scored += 1
+        self.rows_scored += len(batch)
+        RECORD_MICRO_BATCH_SIZE.observe(len(batch))
+        logger.debug(f"Scored micro-batch of {len(batch)} records in {batch_latency_ms:.2f} ms")
+
+        for (_, future), prediction in zip(batch, predictions):
+            # A waiter may have been cancelled (client went away) while the batch was scoring
+            if future.done():
+                continue
+            # predict_fn returns an exception for a record it refused to score; only its waiter fails
+            if isinstance(prediction, Exception):
+                future.set_exception(prediction)
+            else:
+                future.set_result(BatchResult(
+                    prediction=prediction,
+                    batch_size=len(batch),
+                    batch_latency_ms=batch_latency_ms
+                ))
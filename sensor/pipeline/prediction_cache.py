@@ -0,0 +1,219 @@
+import os, sys
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from sensor.exception import SensorException
+from sensor.ml_model_components.model.input_validator import ValidationReport
+
+import logging
+logger = logging.getLogger(__name__)
+
+from sensor.constant.application import (PREDICTION_CACHE_MAX_ROWS,
+                                         PREDICTION_CACHE_MAX_FILES,
+                                         PREDICTION_CACHE_DISK_DIR)
+
+SQLITE_MAX_VARIABLES = 900 # stays under SQLite's bound-parameter limit on old builds
+
+
+def hash_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    One vectorized 64-bit hash per row of an aligned feature matrix.
+    """
+    return pd.util.hash_pandas_object(pd.DataFrame(matrix, copy=False), index=False).to_numpy()
+
+
+def file_digest(file_obj) -> str:
+    """
+    SHA-256 of an upload's content; the file is rewound afterwards.
+    """
+    digest = hashlib.sha256()
+    for block in iter(lambda: file_obj.read(1 << 20), b""):
+        digest.update(block)
+    file_obj.seek(0)
+    return digest.hexdigest()
+
+
+class PredictionCache:
+    """
+    Caches predictions of the current champion.
+    - Row tier: direct-mapped table of `max_rows` slots (rounded up to a power of two), keyed by the hash
+      of the aligned feature row; lookups and inserts are numpy operations over the whole batch, and a new
+      row replaces whatever row shared its slot
+    - File tier: bounded LRU of whole-upload predictions and their validation report, keyed by the upload's SHA-256
+    - Optional on-disk tier (one SQLite file per champion under `disk_dir`) backing both
+    Every entry belongs to one champion model id; binding a different id drops them all,
+    so a newly resolved champion never serves the previous model's predictions.
+    """
+
+    def __init__(self, max_rows: int = PREDICTION_CACHE_MAX_ROWS,
+                 max_files: int = PREDICTION_CACHE_MAX_FILES,
+                 disk_dir: str = PREDICTION_CACHE_DISK_DIR):
+        try:
+            self.max_rows = max_rows
+            self.max_files = max_files
+            self.disk_dir = disk_dir
+            self.model_id = None
+            self.row_hits = 0
+            self.row_misses = 0
+            self.disk_hits = 0
+            self.file_hits = 0
+            self.file_misses = 0
+            capacity = 1 << (max(max_rows, 1) - 1).bit_length()
+            self._slot_mask = np.int64(capacity - 1)
+            self._row_keys = np.zeros(capacity, dtype=np.int64)
+            self._row_labels = np.full(capacity, -1, dtype=np.int8)  # -1: empty slot
+            self._files = OrderedDict()
+            self._disk = None
+            self._lock = threading.Lock()
+        except Exception as e:
+            raise SensorException(e, sys)
+
+    def _bind(self, model_id: int) -> None:
+        # Called with the lock held
+        if model_id == self.model_id:
+            return
+        logger.info(f"Prediction cache invalidated: champion changed from {self.model_id} to {model_id}")
+        self._row_labels.fill(-1)
+        self._files.clear()
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+        if self.disk_dir is not None:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            for file_name in os.listdir(self.disk_dir):
+                if file_name.endswith(".sqlite") and file_name != f"{model_id}.sqlite":
+                    os.remove(os.path.join(self.disk_dir, file_name))
+            self._disk = sqlite3.connect(os.path.join(self.disk_dir, f"{model_id}.sqlite"), check_same_thread=False)
+            self._disk.execute("CREATE TABLE IF NOT EXISTS rows (key INTEGER PRIMARY KEY, label INTEGER)")
+            self._disk.execute("DROP TABLE IF EXISTS files")  # layout without the validation report
+            self._disk.execute("CREATE TABLE IF NOT EXISTS uploads (digest TEXT PRIMARY KEY, labels BLOB, report TEXT)")
+        self.model_id = model_id
+
+    def _store_rows(self, slots: np.ndarray, keys: np.ndarray, labels: np.ndarray) -> None:
+        # Called with the lock held; one row per slot, so each slot gets a key and label of the same row
+        slots, first = np.unique(slots, return_index=True)
+        self._row_keys[slots] = keys[first]
+        self._row_labels[slots] = labels[first]
+
+    def _disk_get_rows(self, keys: list) -> dict:
+        found = {}
+        for start in range(0, len(keys), SQLITE_MAX_VARIABLES):
+            batch = keys[start:start + SQLITE_MAX_VARIABLES]
+            query = f"SELECT key, label FROM rows WHERE key IN ({','.join('?' * len(batch))})"
+            found.update(self._disk.execute(query, batch).fetchall())
+        return found
+
+    def _promote_from_disk(self, keys: np.ndarray, slots: np.ndarray, labels: np.ndarray, missing: np.ndarray) -> None:
+        # Called with the lock held: fills the rows found on disk and copies them to the memory tier
+        missing_positions = np.flatnonzero(missing)
+        found = self._disk_get_rows(keys[missing_positions].tolist())
+        if not found:
+            return
+        found_keys = np.fromiter(found.keys(), dtype=np.int64, count=len(found))
+        found_labels = np.fromiter(found.values(), dtype=np.int64, count=len(found))
+        order = np.argsort(found_keys)
+        found_keys, found_labels = found_keys[order], found_labels[order]
+        position = np.searchsorted(found_keys, keys[missing_positions]).clip(max=len(found_keys) - 1)
+        is_found = found_keys[position] == keys[missing_positions]
+        found_positions = missing_positions[is_found]
+        labels[found_positions] = found_labels[position[is_found]]
+        missing[found_positions] = False
+        self.disk_hits += len(found_positions)
+        self._store_rows(slots[found_positions], keys[found_positions], labels[found_positions])
+
+    def predict(self, model_id: int, matrix: np.ndarray, predict_fn) -> np.ndarray:
+        """
+        Returns one label per row of `matrix`, calling predict_fn only on the rows not cached.
+        """
+        keys = hash_rows(matrix).view(np.int64)
+        slots = keys & self._slot_mask
+
+        with self._lock:
+            self._bind(model_id)
+            labels = self._row_labels[slots].astype(np.int64)
+            missing = (labels < 0) | (self._row_keys[slots] != keys)
+            if self._disk is not None and missing.any():
+                self._promote_from_disk(keys, slots, labels, missing)
+            n_missing = int(np.count_nonzero(missing))
+            self.row_hits += len(keys) - n_missing
+            self.row_misses += n_missing
+
+        if n_missing == 0:
+            return labels
+
+        # Score outside the lock so concurrent requests are not serialized
+        labels[missing] = predict_fn(matrix[missing])
+
+        with self._lock:
+            if self.model_id != model_id:
+                return labels
+            self._store_rows(slots[missing], keys[missing], labels[missing])
+            if self._disk is not None:
+                self._disk.executemany("INSERT OR REPLACE INTO rows VALUES (?, ?)",
+                                       zip(keys[missing].tolist(), labels[missing].tolist()))
+                self._disk.commit()
+
+        return labels
+
+    def get_file(self, model_id: int, digest: str):
+        """
+        Returns the cached (labels, ValidationReport or None) of a whole upload, or None.
+        The report is rebuilt on every hit, so callers may merge into it.
+        """
+        with self._lock:
+            self._bind(model_id)
+            entry = self._files.get(digest)
+            if entry is not None:
+                self._files.move_to_end(digest)
+            elif self._disk is not None:
+                row = self._disk.execute("SELECT labels, report FROM uploads WHERE digest = ?", (digest,)).fetchone()
+                if row is not None:
+                    entry = (np.frombuffer(row[0], dtype=np.int8), row[1])
+
+            if entry is None:
+                self.file_misses += 1
+                return None
+            self.file_hits += 1
+
+        labels, report = entry
+        return labels, None if report is None else ValidationReport(**json.loads(report))
+
+    def put_file(self, model_id: int, digest: str, labels: np.ndarray, report: ValidationReport = None) -> None:
+        """
+        Stores the labels of a whole upload (kept as int8, one byte per row) with its validation report.
+        Uploads with more rows than the row tier holds are not kept in memory.
+        """
+        labels = np.asarray(labels, dtype=np.int8)
+        report = None if report is None else json.dumps(report.to_dict())
+        with self._lock:
+            if self.model_id != model_id:
+                return
+            if len(labels) <= self.max_rows:
+                self._files[digest] = (labels, report)
+                while len(self._files) > self.max_files:
+                    self._files.popitem(last=False)
+            if self._disk is not None:
+                self._disk.execute("INSERT OR REPLACE INTO uploads VALUES (?, ?, ?)", (digest, labels.tobytes(), report))
+                self._disk.commit()
+
+    def stats(self) -> dict:
+        row_lookups = self.row_hits + self.row_misses
+        file_lookups = self.file_hits + self.file_misses
+        return {
+            "model_id": self.model_id,
+            "row_entries": int(np.count_nonzero(self._row_labels >= 0)),
+            "row_hits": self.row_hits,
+            "row_misses": self.row_misses,
+            "row_hit_rate": self.row_hits / row_lookups if row_lookups else 0.0,
+            "disk_hits": self.disk_hits,
+            "file_entries": len(self._files),
+            "file_hits": self.file_hits,
+            "file_misses": self.file_misses,
+            "file_hit_rate": self.file_hits / file_lookups if file_lookups else 0.0,
+        }
@@ -1,69 +1,358 @@
 import os
 import sys
+import itertools
 import pandas as pd
 import numpy as np
+import threading
 from sensor.logger import logging
 from sensor.exception import SensorException
 from sensor.ml_model_components.model.model_resolver import ModelResolver
-from sensor.utils.main_utils import load_object
+from sensor.ml_model_components.model.model_holder import ModelHolder
+from sensor.ml_model_components.model.estimator import TargetValueMapping
 from sensor.constant.training_pipeline import TARGET_COLUMN
+from sensor.constant.application import (PREDICTION_CHUNK_SIZE, PREDICTION_CACHE_ENABLED, SHADOW_SAMPLE_RATE,
+                                         DRIFT_MONITORING_ENABLED, INPUT_RECORD_MIN_FEATURES)
+from sensor.utils.upload_utils import detect_upload_format, read_upload, iter_upload_chunks
+from sensor.pipeline.prediction_cache import PredictionCache, file_digest
+from sensor.ml_model_components.model.input_validator import ValidationReport, InputValidationError
+from sensor.pipeline.shadow_scorer import ShadowScorer
+from sensor.pipeline.drift_monitor import DriftMonitor
+from sensor.configuration.resource_config import ResourceConfig
+from sensor.utils.metrics import PREDICT_STAGE_SECONDS, ROWS_SCORED, ROWS_REJECTED, SCORING_BATCH_ROWS, time_iterator
+
+UPLOAD_PARSE_SECONDS = PREDICT_STAGE_SECONDS.labels("upload_parse")
+ALIGNMENT_SECONDS = PREDICT_STAGE_SECONDS.labels("feature_alignment")
+VALIDATION_SECONDS = PREDICT_STAGE_SECONDS.labels("validation")
+
+REJECTED_PREDICTION = -1 # numerical prediction of a row left out by input validation (label: missing)
 
 class PredictionPipeline:
+    model_holder = None  # Class-level holder so every pipeline in the process shares one loaded champion
+    prediction_cache = None  # Class-level cache shared the same way (stays None when disabled)
+    shadow_scorer = None  # Class-level challenger shadow scorer (stays None when SHADOW_SAMPLE_RATE is 0)
+    resource_config = None  # Class-level CPU thread budget of this serving worker
+    drift_monitor = None  # Class-level feature drift histograms of served traffic (stays None when disabled)
+    _model_holder_lock = threading.Lock()
 
     def __init__(self):
         try:
-            self.model_resolver = ModelResolver()
+            if PredictionPipeline.model_holder is None:
+                with PredictionPipeline._model_holder_lock:
+                    if PredictionPipeline.model_holder is None:
+                        PredictionPipeline.resource_config = ResourceConfig()
+                        predict_threads = PredictionPipeline.resource_config.predict_threads
+                        if PREDICTION_CACHE_ENABLED:
+                            PredictionPipeline.prediction_cache = PredictionCache()
+                        if DRIFT_MONITORING_ENABLED:
+                            PredictionPipeline.drift_monitor = DriftMonitor()
+                        if SHADOW_SAMPLE_RATE > 0:
+                            PredictionPipeline.shadow_scorer = ShadowScorer(nthread=predict_threads)
+                        PredictionPipeline.model_holder = ModelHolder(model_resolver=ModelResolver(),
+                                                                      nthread=predict_threads)
+
+            self.model_holder = PredictionPipeline.model_holder
+            self.prediction_cache = PredictionPipeline.prediction_cache
+            self.shadow_scorer = PredictionPipeline.shadow_scorer
+            self.drift_monitor = PredictionPipeline.drift_monitor
+            self.model_resolver = self.model_holder.model_resolver
+            self.validation_report = None  # ValidationReport of the rows scored by this pipeline instance
         except Exception as e:
             raise SensorException(e, sys)
 
+    def align_features(self, dataframe: pd.DataFrame, champion) -> pd.DataFrame:
+        """
+        Checks the frame holds every feature the champion was trained on and returns it unchanged:
+        the validator and the kernel pick the features by position when they build the matrix.
+        Only a champion without feature names gets the target column dropped here.
+        """
+        # We extract the feature names the preprocessor was fitted on
+        expected_features = champion.feature_names
+        if expected_features is None:
+            logging.warning("Could not find 'feature_names_in_' in preprocessor. Proceeding with raw data.")
+            # Handle Target Column (if using training CSV for testing)
+            if TARGET_COLUMN in dataframe.columns:
+                dataframe = dataframe.drop(columns=[TARGET_COLUMN])
+            return dataframe
+
+        # Fail the whole batch up front, naming every missing feature
+        if champion.validator is not None:
+            champion.validator.check_columns(dataframe.columns)
+
+        # No label-based selection (a full copy): building the matrix by position already leaves out
+        # the target column and the extra columns (ab_000, bn_000, etc.)
+        return dataframe
+
+    @staticmethod
+    def to_labels(predictions) -> pd.Series:
+        """
+        Converts numerical predictions back to labels: 0 -> neg, 1 -> pos
+        """
+        return pd.Series(predictions).map(TargetValueMapping().reverse_mapping())
+
+    def _validate(self, champion, dataframe: pd.DataFrame, allow_missing_columns: bool = False,
+                  row_offset: int = 0):
+        """
+        Aligned matrix of the rows that pass input validation, and the mask of those rows (None when all pass).
+        The report is added to self.validation_report; `row_offset` is the position of the frame in its upload.
+        """
+        if champion.validator is None:
+            return champion.to_matrix(dataframe), None
+
+        with VALIDATION_SECONDS.time():
+            matrix, accepted, report = champion.validator.validate(dataframe, allow_missing_columns)
+        if accepted is not None:
+            ROWS_REJECTED.inc(report.rows_rejected)
+            logging.warning(f"Input validation rejected {report.rows_rejected} of {report.rows_received} rows, "
+                            f"rejected cells per column: {report.column_rejects}")
+
+        if self.validation_report is None and row_offset == 0:
+            self.validation_report = report
+        else:
+            if self.validation_report is None:
+                self.validation_report = ValidationReport()
+            self.validation_report.merge(report, row_offset)
+        return matrix, accepted
+
+    def _score(self, champion, dataframe: pd.DataFrame, allow_missing_columns: bool = False,
+               row_offset: int = 0) -> np.ndarray:
+        """
+        Numerical predictions for a frame, served from the prediction cache where possible.
+        Rows rejected by input validation are not scored and get REJECTED_PREDICTION.
+        """
+        matrix, accepted = self._validate(champion, dataframe, allow_missing_columns, row_offset)
+        # Binned before scoring: without the cache the matrix is imputed and scaled in place
+        if self.drift_monitor is not None:
+            self.drift_monitor.observe(champion, matrix)
+
+        SCORING_BATCH_ROWS.observe(len(matrix))
+        ROWS_SCORED.inc(len(matrix))
+        # A sample of batches is re-scored by the unpromoted challenger on a background thread
+        shadow_sampled = self.shadow_scorer is not None and len(matrix) > 0 and self.shadow_scorer.sample()
+        if len(matrix) == 0:
+            scored = np.empty(0, dtype=np.int64)
+        elif self.prediction_cache is None:
+            # Only a batch the shadow scorer reads afterwards must keep its matrix untransformed
+            scored = champion.predict_matrix(matrix, copy=shadow_sampled)
+        else:
+            # The cache hands predict_fn a fresh subset of the matrix, so it can be transformed in place
+            scored = self.prediction_cache.predict(champion.model_id, matrix,
+                                                   lambda subset: champion.predict_matrix(subset, copy=False))
+
+        if shadow_sampled:
+            self.shadow_scorer.submit(champion, matrix)
+
+        if accepted is None:
+            return scored
+        predictions = np.full(len(accepted), REJECTED_PREDICTION, dtype=np.int64)
+        predictions[accepted] = scored
+        return predictions
+
     def predict(self, dataframe: pd.DataFrame):
         """
         Logic: 
-        1. Drops target column if present.
-        2. Aligns columns to match training schema.
-        3. Loads latest model and generates predictions.
+        1. Checks the training features are present (the target and extra columns are ignored).
+        2. Validates the rows against the schema; rejected rows get no prediction.
+        3. Generates predictions with the in-memory champion model.
         """
         try:
             logging.info("Starting prediction process...")
 
-            # 1. Handle Target Column (if using training CSV for testing)
-            if TARGET_COLUMN in dataframe.columns:
-                logging.info(f"Target column '{TARGET_COLUMN}' found. Dropping for prediction.")
-                dataframe = dataframe.drop(columns=[TARGET_COLUMN], axis=1)
+            # Get the 'Champion' model held in memory (reloaded only when ModelPusher publishes a new one)
+            # Keep this reference for the whole request so a concurrent swap cannot mix two models
+            champion = self.model_holder.get_model()
 
-            # 2. Check if a model exists
-            if not self.model_resolver.is_model_exists():
-                raise Exception("No model is currently available in the 'saved_models' directory.")
+            with ALIGNMENT_SECONDS.time():
+                dataframe = self.align_features(dataframe, champion)
 
-            # 3. Load the latest 'Champion' model (The SensorModel object)
-            best_model_path = self.model_resolver.get_best_model_path()
-            sensor_model = load_object(file_path=best_model_path)
-            logging.info(f"Successfully loaded champion model from: {best_model_path}")
+            # Fused impute + scale + booster call (or SensorModel.predict for unsupported models)
+            predictions = self._score(champion, dataframe)
+            return self._attach_labels(dataframe, predictions)
 
-            # 4. Feature Alignment (The Fix for your error)
-            # We extract the feature names the preprocessor was fitted on
-            try:
-                # If your preprocessor is a Scikit-Learn Pipeline/Transformer
-                expected_features = sensor_model.preprocessor.feature_names_in_
-                logging.info(f"Aligning {len(expected_features)} features with the model schema.")
-                
-                # Filter out the extra columns (ab_000, bn_000, etc.)
-                dataframe = dataframe[expected_features]
-            except AttributeError:
-                logging.warning("Could not find 'feature_names_in_' in preprocessor. Proceeding with raw data.")
-
-            # 5. Generate Predictions
-            # SensorModel.predict internally calls preprocessor.transform then model.predict
-            predictions = sensor_model.predict(dataframe)
-
-            # 6. Optional: Convert numerical predictions back to labels
-            # 0 -> neg, 1 -> pos
-            df_with_predictions = dataframe.copy()
-            df_with_predictions["prediction"] = predictions
-            df_with_predictions["prediction"] = df_with_predictions["prediction"].replace({0: "neg", 1: "pos"})
-
-            logging.info("Prediction completed successfully.")
-            return df_with_predictions
+        except Exception as e:
+            raise SensorException(e, sys)
+
+    def predict_upload(self, file_obj, content_type: str = None, preview_rows: int = None):
+        """
+        Reads an uploaded CSV, Parquet or Arrow IPC file and scores it.
+        Only the columns the champion was trained on are deserialized.
+        With `preview_rows` only the leading rows are returned with their predictions (every row is still
+        scored), and an upload this champion already scored is not parsed beyond those rows.
+        """
+        try:
+            champion = self.model_holder.get_model()
+            upload_format = detect_upload_format(file_obj, content_type)
+
+            # Whole-file fast path: an identical upload already scored by this champion
+            cached_labels = cached_report = digest = None
+            if self.prediction_cache is not None:
+                digest = file_digest(file_obj)
+                cached = self.prediction_cache.get_file(champion.model_id, digest)
+                if cached is not None:
+                    cached_labels, cached_report = cached
+
+            if cached_labels is not None and preview_rows:
+                with UPLOAD_PARSE_SECONDS.time():
+                    chunks = iter_upload_chunks(file_obj, upload_format, preview_rows, columns=champion.feature_names)
+                    preview = next(chunks, None)
+                    chunks.close()
+                if preview is not None:
+                    ROWS_SCORED.inc(len(cached_labels))
+                    self.validation_report = cached_report
+                    preview = self.align_features(preview, champion)
+                    return self._attach_labels(preview, cached_labels[:len(preview)], inplace=True)
+                file_obj.seek(0)
+
+            with UPLOAD_PARSE_SECONDS.time():
+                dataframe = read_upload(file_obj, upload_format, columns=champion.feature_names)
+            logging.info(f"Read {upload_format} upload with {len(dataframe)} rows.")
+            with ALIGNMENT_SECONDS.time():
+                dataframe = self.align_features(dataframe, champion)
+
+            if cached_labels is not None and len(cached_labels) == len(dataframe):
+                predictions = cached_labels
+                self.validation_report = cached_report
+                ROWS_SCORED.inc(len(dataframe))
+            else:
+                predictions = self._score(champion, dataframe)
+                if digest is not None:
+                    self.prediction_cache.put_file(champion.model_id, digest, predictions, self.validation_report)
+
+            if preview_rows:
+                dataframe, predictions = dataframe.head(preview_rows).copy(), predictions[:preview_rows]
+            # The frame was read here, so nobody else holds it
+            return self._attach_labels(dataframe, predictions, inplace=True)
 
         except Exception as e:
-            raise SensorException(e, sys)
\ No newline at end of file
+            raise SensorException(e, sys)
+
+    def _attach_labels(self, dataframe: pd.DataFrame, predictions, inplace: bool = False) -> pd.DataFrame:
+        # A caller's frame is left untouched (assign copies it); a frame the pipeline read itself gets the column in place
+        labels = self.to_labels(predictions).to_numpy()
+        if inplace:
+            dataframe["prediction"] = labels
+            df_with_predictions = dataframe
+        else:
+            df_with_predictions = dataframe.assign(prediction=labels)
+
+        logging.info("Prediction completed successfully.")
+        return df_with_predictions
+
+    def predict_records(self, records: list) -> list:
+        """
+        Scores a list of single-record dicts (feature name -> value) in one vectorized call.
+        Features a record does not send are treated as missing; the 'na' token is read as missing too.
+        A record rejected by input validation gets None; one naming fewer than INPUT_RECORD_MIN_FEATURES model
+        features is not scored at all and gets an InputValidationError listing its unknown keys.
+        """
+        try:
+            champion = self.model_holder.get_model()
+            results = [None] * len(records)
+            if champion.feature_names is not None:
+                known_features = set(champion.feature_names)
+                scored_positions = []
+                for position, record in enumerate(records):
+                    unknown_keys = [key for key in record if key not in known_features]
+                    matched = len(record) - len(unknown_keys)
+                    if matched < INPUT_RECORD_MIN_FEATURES:
+                        results[position] = InputValidationError(
+                            f"Record names {matched} model features, at least {INPUT_RECORD_MIN_FEATURES} required; "
+                            f"unknown keys: {unknown_keys}")
+                    else:
+                        scored_positions.append(position)
+                if len(scored_positions) < len(records):
+                    records = [records[position] for position in scored_positions]
+                    if not records:
+                        return results
+            else:
+                scored_positions = range(len(records))
+
+            with UPLOAD_PARSE_SECONDS.time():
+                dataframe = pd.DataFrame.from_records(records)
+
+                if champion.validator is None:
+                    expected_features = champion.feature_names
+                    if expected_features is not None:
+                        dataframe = dataframe.reindex(columns=expected_features)
+                    # Coercion also turns the 'na' token into NaN
+                    dataframe = dataframe.apply(pd.to_numeric, errors="coerce")
+
+            # The validator maps the record keys itself and reads absent features as missing
+            predictions = self._score(champion, dataframe, allow_missing_columns=True)
+            labels = self.to_labels(predictions)
+            for position, label in zip(scored_positions, labels.astype(object).where(labels.notna(), None)):
+                results[position] = label
+            return results
+
+        except Exception as e:
+            raise SensorException(e, sys)
+
+    def predict_chunks(self, file_obj, content_type: str = None, chunk_size: int = PREDICTION_CHUNK_SIZE):
+        """
+        Scores a CSV, Parquet or Arrow IPC upload `chunk_size` rows at a time so memory stays bounded by one chunk.
+        Returns a generator of DataFrames with the row number in the upload and its prediction.
+        The champion is resolved and the first chunk read and checked up front, so a missing model, a malformed
+        upload or missing features fail before anything is streamed, and the whole upload is scored by the same
+        model even if a new one is published meanwhile.
+        """
+        try:
+            champion = self.model_holder.get_model()
+            upload_format = detect_upload_format(file_obj, content_type)
+
+            cached_labels = digest = None
+            if self.prediction_cache is not None:
+                digest = file_digest(file_obj)
+                cached = self.prediction_cache.get_file(champion.model_id, digest)
+                if cached is not None:
+                    cached_labels, self.validation_report = cached
+
+            chunks = first_chunk = None
+            if cached_labels is None:
+                chunks = iter_upload_chunks(file_obj, upload_format, chunk_size, columns=champion.feature_names)
+                with UPLOAD_PARSE_SECONDS.time():
+                    first_chunk = next(chunks, None)
+                if first_chunk is not None:
+                    try:
+                        with ALIGNMENT_SECONDS.time():
+                            self.align_features(first_chunk, champion)
+                    except Exception:
+                        # Close the reader while the upload is still open, rather than when it is collected
+                        chunks.close()
+                        raise
+        except Exception as e:
+            raise SensorException(e, sys)
+
+        def generate_cached():
+            # Identical upload already scored by this champion: stream the stored labels, no parsing
+            for start in range(0, len(cached_labels), chunk_size):
+                labels = cached_labels[start:start + chunk_size]
+                ROWS_SCORED.inc(len(labels))
+                yield pd.DataFrame({"row": np.arange(start, start + len(labels)),
+                                    "prediction": self.to_labels(labels).to_numpy()})
+
+        def generate():
+            try:
+                rows_scored = 0
+                all_predictions = []
+                remaining = time_iterator(chunks, UPLOAD_PARSE_SECONDS)
+                if first_chunk is not None:
+                    # Already read and checked by predict_chunks
+                    remaining = itertools.chain([first_chunk], remaining)
+                for chunk in remaining:
+                    # The champion maps columns itself, so the chunk needs no label-based reindex
+                    predictions = self._score(champion, chunk, row_offset=rows_scored)
+                    rows_scored += len(chunk)
+                    if digest is not None:
+                        all_predictions.append(np.asarray(predictions, dtype=np.int8))
+                    yield pd.DataFrame({"row": chunk.index, "prediction": self.to_labels(predictions).to_numpy()})
+                if digest is not None:
+                    self.prediction_cache.put_file(champion.model_id, digest,
+                                                   np.concatenate(all_predictions) if all_predictions else np.empty(0),
+                                                   self.validation_report)
+                logging.info(f"Streaming prediction completed successfully for {rows_scored} rows.")
+            except Exception as e:
+                raise SensorException(e, sys)
+
+        if cached_labels is not None:
+            return generate_cached()
+
+        return generate()
@@ -0,0 +1,154 @@
+import sys
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from sensor.exception import SensorException
+
+import logging
+logger = logging.getLogger(__name__)
+
+from sensor.constant.application import (SHADOW_SAMPLE_RATE,
+                                         SHADOW_MAX_PENDING_BATCHES,
+                                         SHADOW_CHALLENGER_CHECK_INTERVAL_SECONDS)
+from sensor.ml_model_components.model.model_resolver import ChallengerResolver
+from sensor.ml_model_components.model.model_holder import ModelHolder
+from sensor.utils.metrics import SHADOW_PREDICT_SECONDS, SHADOW_ROWS_COMPARED, SHADOW_ROWS_AGREED
+
+
+def _score(model, dataframe: pd.DataFrame) -> np.ndarray:
+    # Scores outside ChampionModel so shadow work does not show up in the serving stage metrics
+    if model.kernel is not None:
+        return model.kernel.predict(dataframe)
+    feature_names = model.feature_names
+    return model.model.predict(dataframe if feature_names is None else dataframe[feature_names])
+
+
+class ShadowScorer:
+    """
+    Scores a sample of live batches with the newest unpromoted challenger, off the response path.
+    - `sample` picks a `sample_rate` fraction of the batches before they are scored, `submit` queues them after
+    - A single background thread scores a kept batch with the champion and the challenger, back to back,
+      so both latencies are measured on the same rows under the same conditions
+    - At most `max_pending` batches wait for that thread; further samples are skipped instead of queued
+    - Counters restart whenever the champion or the challenger changes
+    """
+
+    def __init__(self, sample_rate: float = SHADOW_SAMPLE_RATE,
+                 max_pending: int = SHADOW_MAX_PENDING_BATCHES,
+                 challenger_holder: ModelHolder = None, nthread: int = None):
+        try:
+            self.sample_rate = sample_rate
+            self.max_pending = max_pending
+            self.challenger_holder = challenger_holder if challenger_holder is not None else ModelHolder(
+                model_resolver=ChallengerResolver(),
+                check_interval=SHADOW_CHALLENGER_CHECK_INTERVAL_SECONDS,
+                record_metrics=False,
+                keep_unpublished=False,
+                nthread=nthread,
+            )
+            self.pending = 0
+            self.skipped = 0
+            self._lock = threading.Lock()
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+            self._reset(None, None)
+        except Exception as e:
+            raise SensorException(e, sys)
+
+    def _reset(self, champion_id, challenger_id) -> None:
+        self.champion_id = champion_id
+        self.challenger_id = challenger_id
+        self.batches_compared = 0
+        self.rows_compared = 0
+        self.rows_agreed = 0
+        self.champion_seconds = 0.0
+        self.challenger_seconds = 0.0
+        self.errors = 0
+
+    def sample(self) -> bool:
+        """
+        Decides whether the next batch is shadow scored: a `sample_rate` fraction, none while the queue is full.
+        Called before scoring, so only sampled batches have to keep an untransformed copy of their matrix.
+        """
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return False
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.skipped += 1
+                return False
+        return True
+
+    def submit(self, champion, batch) -> bool:
+        """
+        Queues `batch` (a DataFrame or aligned matrix already scored by `champion`) chosen by `sample`.
+        Never blocks; returns whether the batch was queued.
+        """
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.skipped += 1
+                return False
+            self.pending += 1
+        self._executor.submit(self._compare, champion, batch)
+        return True
+
+    def _compare(self, champion, batch) -> None:
+        try:
+            challenger = self.challenger_holder.get_model_if_available()
+            if challenger is None:
+                return
+            # A validated matrix is in the champion's feature order; name its columns so the challenger can map them
+            dataframe = batch if isinstance(batch, pd.DataFrame) else pd.DataFrame(batch, columns=champion.feature_names)
+
+            start = time.perf_counter()
+            champion_labels = _score(champion, dataframe)
+            champion_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            challenger_labels = _score(challenger, dataframe)
+            challenger_seconds = time.perf_counter() - start
+
+            agreed = int(np.count_nonzero(np.asarray(champion_labels) == np.asarray(challenger_labels)))
+            with self._lock:
+                if (champion.model_id, challenger.model_id) != (self.champion_id, self.challenger_id):
+                    logger.info(f"Shadow scoring champion {champion.model_id} against challenger {challenger.model_id}")
+                    self._reset(champion.model_id, challenger.model_id)
+                self.batches_compared += 1
+                self.rows_compared += len(dataframe)
+                self.rows_agreed += agreed
+                self.champion_seconds += champion_seconds
+                self.challenger_seconds += challenger_seconds
+
+            SHADOW_PREDICT_SECONDS.labels("champion").observe(champion_seconds)
+            SHADOW_PREDICT_SECONDS.labels("challenger").observe(challenger_seconds)
+            SHADOW_ROWS_COMPARED.inc(len(dataframe))
+            SHADOW_ROWS_AGREED.inc(agreed)
+
+        except Exception as e:
+            # The response was already sent; a failing challenger must only show up in the stats
+            with self._lock:
+                self.errors += 1
+            logger.warning(f"Shadow scoring failed: {e}")
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sample_rate": self.sample_rate,
+                "champion_model_id": self.champion_id,
+                "challenger_model_id": self.challenger_id,
+                "batches_compared": self.batches_compared,
+                "rows_compared": self.rows_compared,
+                "agreement_rate": self.rows_agreed / self.rows_compared if self.rows_compared else None,
+                "champion_ms_per_1k_rows": 1e6 * self.champion_seconds / self.rows_compared if self.rows_compared else None,
+                "challenger_ms_per_1k_rows": 1e6 * self.challenger_seconds / self.rows_compared if self.rows_compared else None,
+                "challenger_latency_ratio": self.challenger_seconds / self.champion_seconds if self.champion_seconds else None,
+                "pending": self.pending,
+                "skipped": self.skipped,
+                "errors": self.errors,
+            }
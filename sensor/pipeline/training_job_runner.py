@@ -0,0 +1,261 @@
+import os, sys
+import json
+import time
+import uuid
+import threading
+import multiprocessing
+
+from sensor.exception import SensorException
+
+import logging
+logger = logging.getLogger(__name__)
+
+from sensor.constant.training_pipeline import (TRAINING_JOBS_DIR, TRAINING_LOCK_FILE_PATH, TRAINING_START_TIMEOUT_SECONDS,
+                                               TRAINING_LOCK_RETRY_SECONDS)
+from sensor.utils.metrics import TRAINING_STAGE_SECONDS
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+class TrainingLock:
+    """
+    Host-wide, non-blocking exclusive lock on a file (flock on POSIX, msvcrt on Windows).
+    The OS releases it when the holding process exits, so a crashed run never leaves it stuck.
+    The holder writes its job id into the file so others can report which job is running.
+    """
+
+    def __init__(self, lock_file_path: str = TRAINING_LOCK_FILE_PATH):
+        self.lock_file_path = lock_file_path
+        self._file = None
+
+    def acquire(self, job_id: str = "", retry_seconds: float = 0.0) -> bool:
+        """
+        Takes the lock, trying again every 50 ms for up to `retry_seconds` while it is held.
+        """
+        os.makedirs(os.path.dirname(self.lock_file_path) or ".", exist_ok=True)
+        lock_file = open(self.lock_file_path, "a+")
+        deadline = time.monotonic() + retry_seconds
+        while True:
+            try:
+                if os.name == "nt":
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+                else:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    lock_file.close()
+                    return False
+                time.sleep(0.05)
+
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(job_id)
+        lock_file.flush()
+        self._file = lock_file
+        return True
+
+    def release(self) -> None:
+        if self._file is None:
+            return
+        try:
+            self._file.seek(0)
+            self._file.truncate()
+            if os.name == "nt":
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._file.close()
+            self._file = None
+
+    def holder(self) -> str:
+        """
+        Job id written by the current holder ("" if none or unknown).
+        """
+        try:
+            with open(self.lock_file_path, "r") as lock_file:
+                return lock_file.read().strip()
+        except OSError:
+            return ""
+
+
+def _write_status(status_file_path: str, status: dict) -> None:
+    # Write-then-rename so readers in other workers never see a half-written file
+    os.makedirs(os.path.dirname(status_file_path), exist_ok=True)
+    with open(f"{status_file_path}.tmp", "w") as status_file:
+        json.dump(status, status_file, indent=2)
+    os.replace(f"{status_file_path}.tmp", status_file_path)
+
+
+def _run_training_job(job_id: str, status_file_path: str, lock_file_path: str, lock_conn=None) -> None:
+    """
+    Entry point of the training child process.
+    `lock_conn` receives ("acquired", job_id) or ("rejected", holder job id) once the lock was tried.
+    """
+    status = {"job_id": job_id, "status": "pending", "pid": os.getpid(), "created_at": time.time(),
+              "started_at": None, "finished_at": None, "current_stage": None, "stages": {}, "error": None}
+
+    lock = TrainingLock(lock_file_path)
+    # Retried: running_job_id() in any worker holds the lock for a moment to probe it
+    acquired = lock.acquire(job_id, retry_seconds=TRAINING_LOCK_RETRY_SECONDS)
+    holder = job_id if acquired else lock.holder()
+    if not acquired:
+        status.update(status="rejected", finished_at=time.time(),
+                      error=f"Training job {holder} is already running.")
+        _write_status(status_file_path, status)
+    if lock_conn is not None:
+        lock_conn.send(("acquired" if acquired else "rejected", holder))
+        lock_conn.close()
+    if not acquired:
+        return
+
+    def on_stage(stage_name, event, duration_seconds):
+        if event == "started":
+            status["current_stage"] = stage_name
+            status["stages"][stage_name] = {"status": "running", "started_at": time.time(), "duration_seconds": None}
+        else:
+            status["stages"][stage_name].update(status=event, duration_seconds=duration_seconds)
+        _write_status(status_file_path, status)
+
+    try:
+        status.update(status="running", started_at=time.time())
+        _write_status(status_file_path, status)
+
+        # Cap OpenMP/BLAS pools to the training share of the cores before the training libraries load
+        from sensor.configuration.resource_config import ResourceConfig
+        ResourceConfig().apply_training()
+
+        # Imported here so serving processes never pay for the training dependencies
+        from sensor.pipeline.training_pipeline import TrainPipeline
+        TrainPipeline(stage_callback=on_stage).run_pipeline()
+
+        status.update(status="succeeded", current_stage=None, finished_at=time.time())
+    except Exception as e:
+        status.update(status="failed", finished_at=time.time(), error=str(e))
+        logger.error(f"Training job {job_id} failed: {e}")
+    finally:
+        _write_status(status_file_path, status)
+        lock.release()
+
+
+class TrainingJobRunner:
+    """
+    Starts TrainPipeline runs in a separate process and tracks them through JSON status files,
+    so any uvicorn worker on the host can answer status queries.
+    - start() returns a job id immediately; serving is not blocked while the run progresses
+    - A host-wide TrainingLock guarantees a single run across all worker processes; start() waits until the
+      new process reports whether it got the lock, so a run started concurrently by another worker is
+      answered with "rejected" rather than reported as started
+    - Per-stage progress and timings are written to <jobs_dir>/<job_id>.json
+    """
+
+    def __init__(self, jobs_dir: str = TRAINING_JOBS_DIR, lock_file_path: str = TRAINING_LOCK_FILE_PATH):
+        try:
+            self.jobs_dir = jobs_dir
+            self.lock_file_path = lock_file_path
+            # spawn: the child must not inherit the server's threads, sockets and event loop
+            self._context = multiprocessing.get_context("spawn")
+            self._process = None
+            self._job_id = None
+            self._start_lock = threading.Lock()
+        except Exception as e:
+            raise SensorException(e, sys)
+
+    def get_status_file_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def running_job_id(self):
+        """
+        Id of the job currently holding the training lock, or None.
+        Probes by taking the lock for a moment; a training process starting meanwhile retries, so it is not rejected.
+        """
+        lock = TrainingLock(self.lock_file_path)
+        if lock.acquire():
+            lock.release()
+            return None
+        return lock.holder() or "unknown"
+
+    def start(self) -> dict:
+        """
+        Launches a training run and waits until its process has taken the training lock (blocking: call it
+        off the event loop). Returns the job's status, or the running job id with "status": "already_running"
+        when another run holds the lock, or "rejected" when another worker's run took it first.
+        """
+        try:
+            with self._start_lock:
+                return self._start()
+        except Exception as e:
+            raise SensorException(e, sys)
+
+    def _start(self) -> dict:
+        # A child started by this worker may still be booting and not hold the file lock yet
+        if self._process is not None and self._process.is_alive():
+            return {"job_id": self._job_id, "status": "already_running"}
+
+        running_job_id = self.running_job_id()
+        if running_job_id is not None:
+            return {"job_id": running_job_id, "status": "already_running"}
+
+        job_id = uuid.uuid4().hex
+        status_file_path = self.get_status_file_path(job_id)
+        status = {"job_id": job_id, "status": "pending", "pid": None, "created_at": time.time(),
+                  "started_at": None, "finished_at": None, "current_stage": None, "stages": {}, "error": None}
+        _write_status(status_file_path, status)
+
+        parent_conn, child_conn = self._context.Pipe(duplex=False)
+        process = self._context.Process(target=_run_training_job,
+                                        args=(job_id, status_file_path, self.lock_file_path, child_conn),
+                                        name=f"training-{job_id}")
+        process.start()
+        child_conn.close()
+        self._process, self._job_id = process, job_id
+        threading.Thread(target=self._watch, args=(process, job_id), daemon=True).start()
+        logger.info(f"Started training job {job_id} in process {process.pid}")
+
+        # The check above and the child's lock are separate steps: another worker may have started a run
+        # in between, so the answer waits for the child's own lock attempt
+        try:
+            lock_result = parent_conn.recv() if parent_conn.poll(TRAINING_START_TIMEOUT_SECONDS) else None
+        except EOFError:
+            lock_result = None  # the child died before trying; _watch records the failure
+        finally:
+            parent_conn.close()
+        if lock_result is not None and lock_result[0] == "rejected":
+            logger.info(f"Training job {job_id} rejected: job {lock_result[1]} holds the training lock")
+            return {"job_id": lock_result[1] or "unknown", "status": "rejected", "rejected_job_id": job_id}
+        return self.get_status(job_id) or status
+
+    def _watch(self, process, job_id: str) -> None:
+        # Reap the child and record crashes that happened before it could write a final status
+        process.join()
+        status = self.get_status(job_id)
+        if status is None:
+            return
+        if status["status"] in ("pending", "running"):
+            status.update(status="failed", finished_at=time.time(),
+                          error=f"Training process exited with code {process.exitcode}.")
+            _write_status(self.get_status_file_path(job_id), status)
+
+        # The stages ran in the child, so their durations reach this process's /metrics through the status file
+        for stage_name, stage in status["stages"].items():
+            if stage["duration_seconds"] is not None:
+                TRAINING_STAGE_SECONDS.labels(stage_name, stage["status"]).observe(stage["duration_seconds"])
+
+    def get_status(self, job_id: str):
+        """
+        Status dict of a job, or None if the job id is unknown.
+        """
+        if not job_id.isalnum():
+            return None
+        try:
+            with open(self.get_status_file_path(job_id), "r") as status_file:
+                return json.load(status_file)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            raise SensorException(e, sys)
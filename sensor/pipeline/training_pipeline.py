@@ -1,7 +1,10 @@
 import os , sys
+import time
 
 from sensor.exception import SensorException
 from sensor.logger import logging
+from sensor.utils.metrics import TRAINING_STAGE_SECONDS
+from sensor.utils.artifact_writer import artifact_writer
 
 from sensor.entity.config_entity import TrainingPipelineConfig , DataIngestionConfig
 from sensor.entity.artifact_entity import DataIngestionArtifact
@@ -30,8 +33,36 @@ from sensor.components.model_pusher import ModelPusher
 class TrainPipeline:
     is_pipeline_running=False
 
-    def __init__(self):
+    def __init__(self, stage_callback=None):
+        """
+        stage_callback: optional callable(stage_name, event, duration_seconds) invoked with
+        event "started" (duration None) and "completed"/"failed" around every pipeline stage.
+        """
         self.training_pipeline_config = TrainingPipelineConfig()
+        self.stage_callback = stage_callback
+        self.stage_timings = {}
+
+    def run_stage(self, stage, **kwargs):
+        """
+        Runs one stage method, recording its duration in stage_timings and notifying stage_callback.
+        """
+        stage_name = stage.__name__
+        if self.stage_callback is not None:
+            self.stage_callback(stage_name, "started", None)
+        start = time.perf_counter()
+        try:
+            artifact = stage(**kwargs)
+        except Exception:
+            TRAINING_STAGE_SECONDS.labels(stage_name, "failed").observe(time.perf_counter() - start)
+            if self.stage_callback is not None:
+                self.stage_callback(stage_name, "failed", time.perf_counter() - start)
+            raise
+        self.stage_timings[stage_name] = time.perf_counter() - start
+        TRAINING_STAGE_SECONDS.labels(stage_name, "completed").observe(self.stage_timings[stage_name])
+        logging.info(f"Stage {stage_name} took {self.stage_timings[stage_name]:.2f}s")
+        if self.stage_callback is not None:
+            self.stage_callback(stage_name, "completed", self.stage_timings[stage_name])
+        return artifact
 
     def start_data_ingestion(self)->DataIngestionArtifact:
         try:
@@ -108,17 +139,20 @@ class TrainPipeline:
     def run_pipeline(self):
         try:
             TrainPipeline.is_pipeline_running = True
-            data_ingestion_artifact = self.start_data_ingestion()
-            data_validation_artifact = self.start_data_validaton(data_ingestion_artifact=data_ingestion_artifact)
-            data_preprocessing_artifact = self.start_data_preprocessing(data_validation_artifact=data_validation_artifact)
-            model_trainer_artifact = self.start_model_trainer(data_preprocessing_artifact=data_preprocessing_artifact)
-            model_evaluation_artifact = self.start_model_evaluation(
+            data_ingestion_artifact = self.run_stage(self.start_data_ingestion)
+            data_validation_artifact = self.run_stage(self.start_data_validaton, data_ingestion_artifact=data_ingestion_artifact)
+            data_preprocessing_artifact = self.run_stage(self.start_data_preprocessing, data_validation_artifact=data_validation_artifact)
+            model_trainer_artifact = self.run_stage(self.start_model_trainer, data_preprocessing_artifact=data_preprocessing_artifact)
+            # Stages hand their results over in memory; every file they save is on disk before a model can be pushed
+            artifact_writer.wait()
+            model_evaluation_artifact = self.run_stage(
+                self.start_model_evaluation,
                 data_validation_artifact=data_validation_artifact,
                 model_trainer_artifact=model_trainer_artifact
             )
 
             if model_evaluation_artifact.is_model_accepted:
-                model_pusher_artifact = self.start_model_pusher(model_evaluation_artifact=model_evaluation_artifact)
+                model_pusher_artifact = self.run_stage(self.start_model_pusher, model_evaluation_artifact=model_evaluation_artifact)
                 logging.info(f"Model pusher artifact: {model_pusher_artifact}")
             else:
                 logging.info("Trained model rejected.")
@@ -126,4 +160,5 @@ class TrainPipeline:
         except Exception as e:
             raise SensorException(e, sys)
         finally:
+            artifact_writer.wait(raise_errors=False) # a failed run still leaves the artifacts of its completed stages
             TrainPipeline.is_pipeline_running = False # Reset the flag
\ No newline at end of file
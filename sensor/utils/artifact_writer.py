@@ -0,0 +1,57 @@
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from sensor.exception import SensorException
+
+import logging
+logger = logging.getLogger(__name__)
+
+from sensor.constant.training_pipeline import ARTIFACT_WRITER_THREADS
+
+
+class ArtifactWriter:
+    """
+    Persists stage artifacts on background threads while the next stage already works on them in memory.
+    - `submit` queues a save call (save_dataframe, save_numpy_array_data ...) and returns at once
+    - `wait` blocks until every queued save has finished and raises the first one that failed
+    - With `threads=0` every save runs inline, as before
+    What is submitted must not be modified afterwards: stages treat the frames and arrays they receive
+    from the previous stage as read-only.
+    """
+
+    def __init__(self, threads: int = ARTIFACT_WRITER_THREADS):
+        self.threads = threads
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pending = []
+
+    def submit(self, function, *args, **kwargs) -> None:
+        try:
+            if self.threads <= 0:
+                function(*args, **kwargs)
+                return
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="artifact-writer")
+                self._pending.append(self._executor.submit(function, *args, **kwargs))
+        except Exception as e:
+            raise SensorException(e, sys)
+
+    def wait(self, raise_errors: bool = True) -> None:
+        """
+        Waits for the queued saves. With raise_errors=False failures are only logged, for cleanup paths
+        that are already handling another error.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+        errors = [future.exception() for future in pending]
+        errors = [error for error in errors if error is not None]
+        for error in errors:
+            logger.error(f"Artifact could not be persisted: {error!r}")
+        if errors and raise_errors:
+            raise errors[0]
+
+
+# Shared by the pipeline stages of this process
+artifact_writer = ArtifactWriter()
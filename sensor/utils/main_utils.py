@@ -1,5 +1,4 @@
 import os , sys
-import dill
 
 import numpy as np
 import yaml
@@ -77,8 +76,11 @@ def save_object(file_path: str , obj: object) -> None:
     try:
         logging.info("Entered the save_object method of MainUtils class")
         os.makedirs(os.path.dirname(file_path) , exist_ok=True)
-        with open(file_path, 'wb') as file_obj:
+        # Written under a temporary name and renamed, so a process watching the path never loads half a file
+        with open(f"{file_path}.tmp", 'wb') as file_obj:
+            import dill # imported on first use: serving workers only need it when loading a model
             dill.dump(obj , file_obj)
+        os.replace(f"{file_path}.tmp", file_path)
         logging.info("Exited the save_object method of MainUtils class")
 
     except Exception as e:
@@ -94,9 +96,106 @@ def load_object(file_path: str) -> object:
     try:
         logging.info("Entered the load_object method of MainUtils class")
         with open(file_path , 'rb') as file_obj:
+            import dill
             obj = dill.load(file_obj)
         logging.info("Exited the load_object method of MainUtils class")
         return obj
 
     except Exception as e:
-        raise SensorException(e , sys)
\ No newline at end of file
+        raise SensorException(e , sys)
+
+def parse_numeric_block(values: np.ndarray, na_tokens) -> tuple:
+    """
+    Parses a 2-D object block of numbers, numeric strings and missing-value tokens into float64.
+    values: the block, modified in place (NA tokens are replaced by NaN)
+    return: (parsed block, boolean mask of the cells holding other text, or None when every cell parsed)
+    """
+    import pandas as pd
+
+    # NA tokens become NaN first, so a block of numbers, numeric strings and 'na' parses in one cast
+    is_na_token = pd.Series(values.ravel(order="F")).isin(list(na_tokens)).to_numpy()
+    values[is_na_token.reshape(values.shape, order="F")] = np.nan
+    try:
+        return values.astype(np.float64), None
+    except (TypeError, ValueError):
+        pass
+
+    # Some column holds other text: cast the clean columns, coerce only the offending ones
+    parsed = np.empty(values.shape, dtype=np.float64)
+    unparsed = np.zeros(values.shape, dtype=bool)
+    for position in range(values.shape[1]):
+        column = values[:, position]
+        try:
+            parsed[:, position] = column.astype(np.float64)
+        except (TypeError, ValueError):
+            parsed[:, position] = pd.to_numeric(pd.Series(column), errors="coerce").to_numpy(
+                dtype=np.float64, na_value=np.nan)
+            unparsed[:, position] = np.isnan(parsed[:, position]) & ~pd.isna(column)
+    return parsed, unparsed
+
+
+def get_schema_dtypes(schema_config: dict) -> dict:
+    """
+    Column -> pandas dtype from config/schema.yaml: numerical columns are float64 (sensor readings can be
+    missing), every other column is text.
+    """
+    return {name: "float64" if dtype in ("int", "float") else "object"
+            for column in schema_config["columns"] for name, dtype in column.items()}
+
+
+def get_schema_export_spec(schema_config: dict) -> tuple:
+    """
+    Compiles config/schema.yaml into what is asked of MongoDB: (fields the server never sends, query filter).
+    The fields are the schema drop_columns; the filter is the optional `export_filter` MongoDB query
+    (empty: every document).
+    """
+    return list(schema_config.get("drop_columns") or []), dict(schema_config.get("export_filter") or {})
+
+
+def cast_dataframe(dataframe, dtypes: dict):
+    """
+    Applies column -> dtype (see get_schema_dtypes) to the columns present; returns the frame itself when
+    every column already has its dtype.
+    """
+    casts = {column: dtype for column, dtype in dtypes.items()
+             if column in dataframe.columns and dataframe[column].dtype != dtype}
+    return dataframe.astype(casts) if casts else dataframe
+
+
+def save_dataframe(file_path: str, dataframe, dtypes: dict = None) -> None:
+    """
+    Saves a stage DataFrame as Parquet, or as CSV when file_path ends with .csv
+    file_path: str location of file to save
+    dataframe: pd.DataFrame to save
+    dtypes: column -> dtype applied to the columns present before saving (see get_schema_dtypes)
+    """
+    try:
+        dir_path = os.path.dirname(file_path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+        if dtypes:
+            dataframe = cast_dataframe(dataframe, dtypes)
+        if file_path.endswith(".csv"):
+            dataframe.to_csv(file_path, index=False, header=True)
+        else:
+            dataframe.to_parquet(file_path, index=False)
+
+    except Exception as e:
+        raise SensorException(e, sys)
+
+
+def load_dataframe(file_path: str, columns: list = None):
+    """
+    Loads a DataFrame saved by save_dataframe (Parquet, or CSV with 'na' as missing)
+    file_path: str location of file to load
+    columns: only these columns are read; Parquet skips the others entirely
+    return: pd.DataFrame loaded
+    """
+    try:
+        import pandas as pd
+        if file_path.endswith(".csv"):
+            return pd.read_csv(file_path, na_values="na", usecols=columns)
+        return pd.read_parquet(file_path, columns=columns)
+
+    except Exception as e:
+        raise SensorException(e, sys)
@@ -0,0 +1,267 @@
+import time
+import threading
+from bisect import bisect_left
+
+from sensor.constant.application import (METRICS_LATENCY_BUCKETS_SECONDS,
+                                         METRICS_BATCH_SIZE_BUCKETS,
+                                         METRICS_TRAINING_BUCKETS_SECONDS)
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _format_labels(label_names, label_values, extra: str = "") -> str:
+    pairs = [f'{name}="{str(value)}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Timer:
+    # Context manager observing the elapsed wall time into a histogram child
+    __slots__ = ("_child", "_start")
+
+    def __init__(self, child):
+        self._child = child
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._child.observe(time.perf_counter() - self._start)
+        return False
+
+
+class _HistogramChild:
+    __slots__ = ("upper_bounds", "counts", "sum", "_lock")
+
+    def __init__(self, upper_bounds):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        # One bisect and two additions: cheap enough for the per-request hot path
+        index = bisect_left(self.upper_bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self) -> _Timer:
+        return _Timer(self)
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ("value", "function")
+
+    def __init__(self):
+        self.value = 0.0
+        self.function = None
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def set_function(self, function) -> None:
+        # Evaluated at scrape time instead of being pushed on every change
+        self.function = function
+
+    def get(self) -> float:
+        if self.function is not None:
+            value = self.function()
+            return float("nan") if value is None else value
+        return self.value
+
+
+class _Metric:
+    metric_type = None
+    child_class = None
+
+    def __init__(self, name: str, documentation: str, label_names: tuple = (), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._children = {}
+        self._children_lock = threading.Lock()
+        if not self.label_names:
+            self._default = self._children[()] = self._new_child()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _new_child(self):
+        return self.child_class()
+
+    def labels(self, *label_values):
+        """
+        Child metric for one combination of label values (created on first use, then cached).
+        """
+        label_values = tuple(str(value) for value in label_values)
+        child = self._children.get(label_values)
+        if child is None:
+            if len(label_values) != len(self.label_names):
+                raise ValueError(f"{self.name} expects labels {self.label_names}")
+            with self._children_lock:
+                child = self._children.setdefault(label_values, self._new_child())
+        return child
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        for label_values, child in list(self._children.items()):
+            lines.extend(self._render_child(label_values, child))
+        return lines
+
+
+class Counter(_Metric):
+    """
+    Monotonically increasing total, e.g. rows scored.
+    """
+    metric_type = "counter"
+    child_class = _CounterChild
+
+    def inc(self, amount: float = 1) -> None:
+        self._default.inc(amount)
+
+    def _render_child(self, label_values, child) -> list:
+        return [f"{self.name}{_format_labels(self.label_names, label_values)} {_format_value(child.value)}"]
+
+
+class Gauge(_Metric):
+    """
+    Value that can go up and down, e.g. the champion model timestamp.
+    """
+    metric_type = "gauge"
+    child_class = _GaugeChild
+
+    def set(self, value: float) -> None:
+        self._default.set(value)
+
+    def set_function(self, function) -> None:
+        self._default.set_function(function)
+
+    def _render_child(self, label_values, child) -> list:
+        return [f"{self.name}{_format_labels(self.label_names, label_values)} {_format_value(child.get())}"]
+
+
+class Histogram(_Metric):
+    """
+    Distribution of observations in fixed buckets, e.g. per-stage latency.
+    """
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: tuple = METRICS_LATENCY_BUCKETS_SECONDS,
+                 label_names: tuple = (), registry=None):
+        self.upper_bounds = tuple(float(bucket) for bucket in sorted(buckets))
+        super().__init__(name, documentation, label_names, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.upper_bounds)
+
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+
+    def time(self) -> _Timer:
+        return self._default.time()
+
+    def _render_child(self, label_values, child) -> list:
+        with child._lock:
+            counts, total = list(child.counts), child.sum
+        lines, cumulative = [], 0
+        for upper_bound, count in zip(self.upper_bounds + (float("inf"),), counts):
+            cumulative += count
+            le = f'le="{_format_value(upper_bound)}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.label_names, label_values, le)} {cumulative}")
+        labels = _format_labels(self.label_names, label_values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Process-wide collection of metrics rendered in the Prometheus text exposition format.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def time_iterator(iterator, histogram_child):
+    """
+    Re-yields `iterator`, observing the time spent producing each item (e.g. parsing each chunk).
+    """
+    iterator = iter(iterator)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        histogram_child.observe(time.perf_counter() - start)
+        yield item
+
+
+REGISTRY = MetricsRegistry()
+
+# Serving metrics
+PREDICT_STAGE_SECONDS = Histogram(
+    "sensor_predict_stage_seconds",
+    "Time spent in each prediction stage (upload_parse, feature_alignment, validation, transform, model_predict, serialize).",
+    label_names=("stage",))
+ROWS_SCORED = Counter("sensor_rows_scored_total", "Rows that received a prediction, including cache hits.")
+SCORING_BATCH_ROWS = Histogram("sensor_scoring_batch_rows", "Rows per scoring call.",
+                               buckets=METRICS_BATCH_SIZE_BUCKETS)
+RECORD_MICRO_BATCH_SIZE = Histogram("sensor_record_micro_batch_size", "Records per /predict/record micro-batch.",
+                                    buckets=METRICS_BATCH_SIZE_BUCKETS)
+ROWS_REJECTED = Counter("sensor_rows_rejected_total", "Rows left out of scoring by input validation.")
+MODEL_LOAD_SECONDS = Gauge("sensor_model_load_seconds", "Time taken to load the current champion model.")
+CHAMPION_MODEL_TIMESTAMP = Gauge("sensor_champion_model_timestamp",
+                                 "Timestamp (saved_models folder name) of the champion resolved by ModelResolver.")
+
+# Shadow scoring metrics (champion and challenger timed on the same sampled batches)
+SHADOW_PREDICT_SECONDS = Histogram("sensor_shadow_predict_seconds", "Scoring time of sampled batches per model.",
+                                   label_names=("model",))
+SHADOW_ROWS_COMPARED = Counter("sensor_shadow_rows_compared_total", "Rows scored by both champion and challenger.")
+SHADOW_ROWS_AGREED = Counter("sensor_shadow_rows_agreed_total", "Shadow rows where challenger and champion agree.")
+
+# Drift metrics (served traffic against the champion's reference histogram, evaluated at scrape time)
+FEATURE_DRIFT_MAX_PSI = Gauge("sensor_feature_drift_max_psi", "Highest per-feature PSI of served traffic.")
+FEATURE_DRIFT_FEATURES_DRIFTED = Gauge("sensor_feature_drift_features_drifted",
+                                       "Features whose PSI is above DRIFT_PSI_THRESHOLD.")
+
+# Logging metrics (wired to the queue handler in sensor.logger)
+LOG_RECORDS_DROPPED = Gauge("sensor_log_records_dropped", "Log records dropped because the log queue was full.")
+LOG_RECORDS_SUPPRESSED = Gauge("sensor_log_records_suppressed", "INFO/DEBUG log records suppressed by rate limiting.")
+
+# Training metrics
+TRAINING_STAGE_SECONDS = Histogram("sensor_training_stage_seconds", "Duration of each TrainPipeline stage.",
+                                   buckets=METRICS_TRAINING_BUCKETS_SECONDS, label_names=("stage", "status"))
@@ -0,0 +1,140 @@
+import os, sys
+
+import pandas as pd
+
+from sensor.exception import SensorException
+
+import logging
+logger = logging.getLogger(__name__)
+
+UPLOAD_FORMAT_CSV = "csv"
+UPLOAD_FORMAT_PARQUET = "parquet"
+UPLOAD_FORMAT_ARROW_FILE = "arrow_file"
+UPLOAD_FORMAT_ARROW_STREAM = "arrow_stream"
+
+CONTENT_TYPE_FORMATS = {
+    "application/vnd.apache.parquet": UPLOAD_FORMAT_PARQUET,
+    "application/x-parquet": UPLOAD_FORMAT_PARQUET,
+    "application/parquet": UPLOAD_FORMAT_PARQUET,
+    "application/vnd.apache.arrow.file": UPLOAD_FORMAT_ARROW_FILE,
+    "application/vnd.apache.arrow.stream": UPLOAD_FORMAT_ARROW_STREAM,
+}
+
+
+class UploadParseError(ValueError):
+    """
+    Raised when an upload cannot be read in its detected format (malformed CSV, truncated Parquet/Arrow ...).
+    """
+
+
+def detect_upload_format(file_obj, content_type: str = None) -> str:
+    """
+    Works out the upload format from its leading magic bytes, then from the content type.
+    Anything unrecognised is treated as CSV.
+    """
+    try:
+        head = file_obj.read(8)
+        file_obj.seek(0)
+
+        if head[:4] == b"PAR1":
+            return UPLOAD_FORMAT_PARQUET
+        if head[:6] == b"ARROW1":
+            return UPLOAD_FORMAT_ARROW_FILE
+        if head[:4] == b"\xff\xff\xff\xff":
+            return UPLOAD_FORMAT_ARROW_STREAM
+
+        if content_type:
+            return CONTENT_TYPE_FORMATS.get(content_type.split(";")[0].strip().lower(), UPLOAD_FORMAT_CSV)
+        return UPLOAD_FORMAT_CSV
+
+    except Exception as e:
+        raise SensorException(e, sys)
+
+
+def _select_columns(available: list, columns) -> list:
+    # Only project columns the file actually has; missing ones are reported later by feature alignment
+    if columns is None:
+        return None
+    available = set(available)
+    return [column for column in columns if column in available]
+
+
+def _arrow_to_dataframe(table, start: int = 0, self_destruct: bool = False) -> pd.DataFrame:
+    # split_blocks keeps one block per column, so null-free numeric columns convert without a copy.
+    # self_destruct frees Arrow buffers while converting; only safe when nothing else shares them
+    dataframe = table.to_pandas(split_blocks=True, self_destruct=self_destruct)
+    dataframe.index = pd.RangeIndex(start, start + len(dataframe))
+    return dataframe
+
+
+def _open_arrow_table(file_obj, upload_format: str):
+    import pyarrow.ipc as ipc
+
+    if upload_format == UPLOAD_FORMAT_ARROW_FILE:
+        return ipc.open_file(file_obj)
+    return ipc.open_stream(file_obj)
+
+
+def read_upload(file_obj, upload_format: str, columns=None) -> pd.DataFrame:
+    """
+    Reads a whole upload into a DataFrame, deserializing only `columns` when given.
+    """
+    try:
+        if upload_format == UPLOAD_FORMAT_PARQUET:
+            import pyarrow.parquet as pq
+            parquet_file = pq.ParquetFile(file_obj)
+            table = parquet_file.read(columns=_select_columns(parquet_file.schema_arrow.names, columns))
+            return _arrow_to_dataframe(table, self_destruct=True)
+
+        if upload_format in (UPLOAD_FORMAT_ARROW_FILE, UPLOAD_FORMAT_ARROW_STREAM):
+            table = _open_arrow_table(file_obj, upload_format).read_all()
+            if columns is not None:
+                table = table.select(_select_columns(table.column_names, columns))
+            return _arrow_to_dataframe(table, self_destruct=True)
+
+        usecols = None if columns is None else set(columns).__contains__
+        return pd.read_csv(file_obj, na_values="na", usecols=usecols)
+
+    except Exception as e:
+        raise SensorException(UploadParseError(f"Could not read {upload_format} upload: {e}"), sys)
+
+
+def iter_upload_chunks(file_obj, upload_format: str, chunk_size: int, columns=None):
+    """
+    Yields the upload as DataFrames of at most `chunk_size` rows, indexed by row number in the upload.
+    Parquet and Arrow are read record batch by record batch, so only one chunk is ever materialized.
+    """
+    try:
+        if upload_format == UPLOAD_FORMAT_PARQUET:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            parquet_file = pq.ParquetFile(file_obj)
+            start = 0
+            for batch in parquet_file.iter_batches(batch_size=chunk_size,
+                                                   columns=_select_columns(parquet_file.schema_arrow.names, columns)):
+                yield _arrow_to_dataframe(pa.Table.from_batches([batch]), start)
+                start += batch.num_rows
+            return
+
+        if upload_format in (UPLOAD_FORMAT_ARROW_FILE, UPLOAD_FORMAT_ARROW_STREAM):
+            import pyarrow as pa
+            reader = _open_arrow_table(file_obj, upload_format)
+            if upload_format == UPLOAD_FORMAT_ARROW_FILE:
+                batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+            else:
+                batches = iter(reader)
+            start = 0
+            for batch in batches:
+                for offset in range(0, batch.num_rows, chunk_size):
+                    table = pa.Table.from_batches([batch.slice(offset, chunk_size)])
+                    if columns is not None:
+                        table = table.select(_select_columns(table.column_names, columns))
+                    yield _arrow_to_dataframe(table, start)
+                    start += table.num_rows
+            return
+
+        usecols = None if columns is None else set(columns).__contains__
+        yield from pd.read_csv(file_obj, chunksize=chunk_size, na_values="na", usecols=usecols)
+
+    except Exception as e:
+        raise SensorException(UploadParseError(f"Could not read {upload_format} upload: {e}"), sys)